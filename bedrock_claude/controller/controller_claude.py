@@ -1,4 +1,8 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from services.batch_inference import BatchSummarizer
 from services.bedrock_claude import BedrockService
+from services.map_reduce_summarizer import EMPTY_DOCUMENT_MESSAGE, MapReduceSummarizer, is_empty_document
+from services.tracing import traced
 from utils.check_aws import AWS_SERVICES
 
 class Controller:
@@ -31,12 +35,20 @@ class Controller:
             raise ValueError('Erro: As credenciais fornecidas são inválidas. Verifique suas credenciais e tente novamente.')
         
         try:
+            # Um documento sem texto geraria um prompt vazio: falha antes de qualquer chamada ao Bedrock
+            if is_empty_document(extract_text):
+                raise ValueError(f"o arquivo {extract_text['filename']} não tem texto extraído")
+
             # Define a intenção do processamento do texto usando AWS Lex ou outro serviço apropriado
             self.bedrock_service.set_document(extract_text['filename'], extract_text['content_text'])
+
+            # Mantém o documento completo (com as páginas) para o resumo map-reduce
+            self.document = extract_text
         
         except Exception as e:
             raise ValueError(f"Erro ao processar o documento: {e}")
 
+    @traced("summarize")
     def execute_bedrock_model(self):
         """
         Executa o modelo de processamento Bedrock e retorna a resposta do serviço.
@@ -60,3 +72,146 @@ class Controller:
         
         except Exception as e:
             raise ValueError(f"Erro ao executar o modelo do Bedrock: {e}")
+
+    @traced("summarize", strategy="map_reduce")
+    def execute_bedrock_model_map_reduce(self, max_concurrency=4, window_tokens=20000, map_output_tokens=2000,
+                                         reduce_input_tokens=60000, reduce_output_tokens=8000):
+        """
+        Resume o documento atual com a estratégia map-reduce: janelas de páginas resumidas de forma
+        concorrente e combinadas em um resumo final. Indicado para documentos que excedem a janela
+        de contexto do modelo.
+        
+        Parâmetros:
+            max_concurrency (int): Número máximo de chamadas simultâneas ao Bedrock.
+            window_tokens (int): Orçamento de tokens de entrada de cada janela de páginas.
+            map_output_tokens (int): Máximo de tokens gerados por janela.
+            reduce_input_tokens (int): Orçamento de tokens de entrada de cada chamada de combinação.
+            reduce_output_tokens (int): Máximo de tokens gerados no resumo final.
+
+        Retorna:
+            output_text (str): Resumo final do documento.
+        
+        Exceções:
+            Levanta ValueError se as credenciais da AWS forem inválidas.
+            Levanta uma exceção genérica se a execução do modelo Bedrock falhar.
+        """
+        if not self.credentials_valid: 
+            raise ValueError('Erro: As credenciais fornecidas são inválidas. Verifique suas credenciais e tente novamente.')
+        
+        try:
+            summarizer = MapReduceSummarizer(self.bedrock_service, max_concurrency, window_tokens, map_output_tokens,
+                                             reduce_input_tokens, reduce_output_tokens)
+            return summarizer.summarize(self.document)
+        
+        except Exception as e:
+            raise ValueError(f"Erro ao executar o modelo do Bedrock: {e}")
+
+    @traced("summarize")
+    def summarize_document(self, document, map_reduce=False, map_concurrency=4):
+        """
+        Resume um único documento usando apenas estado local à chamada, sem `set_document`.
+        Erros são devolvidos no resultado para não interromper o processamento em lote. Documentos
+        sem texto (ex.: PDF digitalizado sem OCR) não são enviados ao modelo e voltam com status 422.
+
+        Parâmetros:
+            document (dict): Dicionário com 'filename' e 'content_text' (e opcionalmente 'pages').
+            map_reduce (bool): Usa o resumo map-reduce em vez do resumo em uma única chamada.
+            map_concurrency (int): Número máximo de janelas resumidas ao mesmo tempo no modo map-reduce.
+
+        Retorna:
+            result (dict): Nome do arquivo, código de status e texto gerado (ou mensagem de erro).
+        """
+        if is_empty_document(document):
+            return {'filename': document.get('filename'), 'statusCode': 422, 'body': EMPTY_DOCUMENT_MESSAGE}
+
+        try:
+            if map_reduce:
+                body = MapReduceSummarizer(self.bedrock_service, max_concurrency=map_concurrency).summarize(document)
+                return {'filename': document['filename'], 'statusCode': 200, 'body': body}
+
+            response = self.bedrock_service.summarize_document(document['filename'], document['content_text'])
+            return {'filename': document['filename'], **response}
+
+        except Exception as e:
+            return {'filename': document.get('filename'), 'statusCode': 500, 'body': f"Erro ao executar o modelo do Bedrock: {e}"}
+
+    def summarize_documents(self, documents, max_in_flight=4, map_reduce=False):
+        """
+        Resume vários documentos de forma concorrente, com no máximo `max_in_flight` streams
+        do Bedrock abertos ao mesmo tempo. O tempo total tende ao do documento mais lento,
+        e não à soma de todos.
+
+        Os documentos são consumidos sob demanda: só se lê o próximo quando um dos `max_in_flight`
+        em andamento termina, preservando a janela de memória de `iter_texts_from_directory`.
+
+        Parâmetros:
+            documents (Iterable[dict]): Documentos extraídos (ex.: saída de `iter_texts_from_directory`).
+            max_in_flight (int): Número máximo de chamadas simultâneas ao Bedrock.
+            map_reduce (bool): Usa o resumo map-reduce para cada documento.
+
+        Retorna:
+            results (list[dict]): Resultado de cada documento, na mesma ordem da entrada.
+        
+        Exceções:
+            Levanta ValueError se as credenciais da AWS forem inválidas.
+        """
+        if not self.credentials_valid: 
+            raise ValueError('Erro: As credenciais fornecidas são inválidas. Verifique suas credenciais e tente novamente.')
+
+        # No modo map-reduce cada documento usa uma única janela por vez, para que o total de
+        # streams abertos continue limitado por `max_in_flight`
+        max_in_flight = max(max_in_flight, 1)
+        documents = enumerate(documents)
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            pending = {}
+
+            # Preenche a janela inicial de documentos em processamento
+            for position, document in documents:
+                pending[executor.submit(self.summarize_document, document, map_reduce, 1)] = position
+                if len(pending) >= max_in_flight:
+                    break
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+
+                    # Repõe a janela com o próximo documento, se houver
+                    position, document = next(documents, (None, None))
+                    if position is not None:
+                        pending[executor.submit(self.summarize_document, document, map_reduce, 1)] = position
+
+        # Devolve os resultados na ordem de entrada
+        return [results[position] for position in range(len(results))]
+
+    @traced("summarize", strategy="batch")
+    def summarize_documents_batch(self, documents, backend, poll_interval=60.0, work_directory="batch_jobs", job_name=None):
+        """
+        Resume vários documentos em um único job de inferência em lote do Bedrock, em vez de uma
+        chamada em streaming por documento. Indicado para acervos grandes, em que a latência de
+        minutos a horas do job é aceitável em troca do custo menor e de não consumir a cota de
+        requisições sob demanda.
+
+        Parâmetros:
+            documents (Iterable[dict]): Documentos extraídos (ex.: saída de `iter_texts_from_directory`).
+            backend: Backend do job (`BedrockBatchBackend` com S3 e papel IAM, ou `LocalBatchBackend` para testes).
+            poll_interval (float): Intervalo, em segundos, entre as consultas de estado do job.
+            work_directory (str): Diretório dos arquivos JSONL e do mapeamento registro -> arquivo.
+            job_name (str): Nome do job (opcional).
+
+        Retorna:
+            results (list[dict]): Resultado de cada documento, na mesma ordem da entrada. Documentos maiores
+            que a janela de contexto do modelo não entram no job e voltam com status 413: resuma-os com
+            `summarize_document(document, map_reduce=True)`.
+
+        Exceções:
+            Levanta ValueError se as credenciais da AWS forem inválidas.
+        """
+        if not self.credentials_valid: 
+            raise ValueError('Erro: As credenciais fornecidas são inválidas. Verifique suas credenciais e tente novamente.')
+
+        summarizer = BatchSummarizer(backend, work_directory=work_directory, poll_interval=poll_interval)
+        return summarizer.summarize(documents, job_name)
@@ -1,4 +1,11 @@
-from services.ocr_services import extract_texts_from_directory
+import os
+import sys
+
+# rag_common/ (código compartilhado com o langchain_ollama_rag) fica na raiz do repositório; quem
+# importar os módulos do projeto a partir de outro script precisa da raiz no PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ocr_services import OcrFallback, iter_texts_from_directory
 from controller.controller_claude import Controller
 
 # Bloco principal executado ao rodar o script diretamente
@@ -13,18 +20,21 @@ if __name__ == "__main__":
     path = '../data/legal_docs/ARE1467492' 
 
     # Extrai os textos de todos os arquivos PDF encontrados no diretório e suas subpastas.
-    # A função `process_pdfs_in_directory` retorna uma lista de textos extraídos dos PDFs.
-    extract_texts = extract_texts_from_directory(path)
+    # A função `iter_texts_from_directory` processa os PDFs em paralelo e gera cada texto assim que fica pronto.
+    # Páginas digitalizadas (sem texto embutido) passam por OCR com o Tesseract, em um pool de processos,
+    # encerrado ao sair do bloco `with` (inclusive em caso de erro).
+    with OcrFallback(dpi=300) as ocr:
+        extract_texts = iter_texts_from_directory(path, backend="pymupdf", ocr=ocr)
 
-    # Inicializa uma variável para armazenar o resultado final após o processamento dos documentos.
-    output_text = ""
+        # Inicializa uma instância da classe `Controller`, que será responsável por processar os documentos e executar o modelo Bedrock.
+        controller = Controller()
 
-    # Inicializa uma instância da classe `Controller`, que será responsável por processar os documentos e executar o modelo Bedrock.
-    controller = Controller()
+        # Resume todos os documentos de forma concorrente; os resultados voltam na ordem de entrada.
+        results = controller.summarize_documents(extract_texts, max_in_flight=4)
 
-    for text in extract_texts:
-        # Para cada texto extraído, chama o método `process_documents` do `Controller` para processar o conteúdo.
-        controller.process_documents(text)
+    # Junta os resumos gerados na variável `output_text`.
+    output_text = "".join(result['body'] for result in results if result['statusCode'] == 200)
 
-        # Executa o modelo Bedrocke o resultado é adicionado à variável `output_text`.
-        output_text += controller.execute_bedrock_model()
+    for result in results:
+        if result['statusCode'] != 200:
+            print(f"Erro ao resumir o arquivo {result['filename']}: {result['body']}")
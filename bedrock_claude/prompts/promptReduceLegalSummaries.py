@@ -0,0 +1,59 @@
+from prompts.promptSummarizeLegalText import LEGAL_GUIDELINES
+
+def PromptReduceLegalSummaries(name_pdf, partial_summaries, final=True):
+    """
+    Cria o prompt da etapa "reduce" do resumo map-reduce: combina as anotações parciais de
+    cada trecho do documento. Na etapa final, o retorno segue o mesmo padrão do resumo direto;
+    nas etapas intermediárias, apenas condensa as anotações mantendo as citações de página.
+
+    Returns:
+        str: O prompt formatado para ser enviado ao modelo.
+    """
+
+    if not final:
+        return f"""\n
+        Você é um assistente jurídico especializado em resumir documentos legais. Abaixo estão anotações parciais extraídas de trechos consecutivos do documento {name_pdf}.
+        \n ANOTAÇÕES: {partial_summaries} \n
+
+        Combine as anotações em uma única anotação mais curta, organizada pelas próximas diretrizes.
+
+        Diretrizes:
+{LEGAL_GUIDELINES}
+
+        Instruções Adicionais:
+        - Mantenha todas as citações de página no formato (p. N).
+        - Preserve literalmente a ementa e os dispositivos legais citados.
+        - Elimine repetições entre as anotações.
+        """
+
+    prompt = f"""\n
+        Você é um assistente jurídico especializado em resumir documentos legais. Abaixo estão anotações extraídas, trecho a trecho, de um documento jurídico longo. Utilize as anotações como contexto único.
+        \n NOME DO DOCUMENTO: {name_pdf} \n
+        \n ANOTAÇÕES: {partial_summaries} \n
+
+        Baseie-se nas próximas diretrizes ao resumir o texto.
+
+        Diretrizes:
+{LEGAL_GUIDELINES}
+
+        ---
+
+        Padrão de Retorno:
+            # NOME DO COUMENTO [Extrair do texto do documento: <NOME DO DOCUMENTO:XXXXXXX>, exemplo:Acordo Recorrido, Agravo, ...] \n
+            # RESUMO DO DOCUMENTO [Elabore um resumo abrangente baseado nas diretrizes no idioma português]
+
+        ---
+
+        Instruções Adicionais:
+        - O resumo deve ser apresentado em parágrafos contínuos, incorporando naturalmente todas as diretrizes solicitadas.
+        - Caso não consiga incorporar as diretrizes, faça um resumo abrangente.
+        - O texto deve ter entre uma e duas páginas, utilizando linguagem clara e objetiva.
+        - Sempre que mencionar legislação ou dispositivos legais, inclua a referência ao trecho correspondente.
+        - Cite as páginas do documento de onde as informações foram extraídas, conforme indicado nas anotações (p. N).
+        - Todas os resumos devem ser traduzidos para Português Brasil. 
+
+        ---
+
+        Reforço: O retorno deve ser um texto fluido e coeso, evitando a apresentação em forma de tópicos ou listas. Incorpore todas as informações de forma harmoniosa.
+        """
+    return prompt
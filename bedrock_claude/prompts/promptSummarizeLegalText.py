@@ -1,3 +1,17 @@
+# Diretrizes do resumo jurídico, compartilhadas pelos prompts de resumo direto e map-reduce
+LEGAL_GUIDELINES = """\
+        1. Tipo de recurso em julgamento (ex.: recurso extraordinário, agravo).
+        2. Órgão julgador que proferiu o acórdão recorrido.
+        3. Decisão anterior: se foi reformada ou confirmada.
+        4. Votação: se o acórdão foi proferido por unanimidade ou por maioria de votos.
+        5. Fundamentos apresentados pelo relator.
+        6. Transcrição literal da ementa.
+        7. Juízo de admissibilidade do recurso extraordinário: admissão ou inadmissão, com os fundamentos (ex.: matéria infraconstitucional, súmula 279, etc.).
+        8. Dispositivo constitucional no qual o recurso extraordinário foi interposto (ex.: art. 102, III, a, b, c ou d da CF).
+        9. Dispositivos legais indicados como violados e argumentos relevantes do recurso.
+        10. Pedidos formulados no recurso.
+        11. Contrarrazões e argumentos relevantes."""
+
 def PromptSummarizeLegalText(name_pdf, message_pdf):
     """
     Cria um prompt detalhado para o modelo Bedrock.
@@ -16,17 +30,7 @@ def PromptSummarizeLegalText(name_pdf, message_pdf):
         Baseie-se nas próximas diretrizes ao resumir o texto.
 
         Diretrizes:
-        1. Tipo de recurso em julgamento (ex.: recurso extraordinário, agravo).
-        2. Órgão julgador que proferiu o acórdão recorrido.
-        3. Decisão anterior: se foi reformada ou confirmada.
-        4. Votação: se o acórdão foi proferido por unanimidade ou por maioria de votos.
-        5. Fundamentos apresentados pelo relator.
-        6. Transcrição literal da ementa.
-        7. Juízo de admissibilidade do recurso extraordinário: admissão ou inadmissão, com os fundamentos (ex.: matéria infraconstitucional, súmula 279, etc.).
-        8. Dispositivo constitucional no qual o recurso extraordinário foi interposto (ex.: art. 102, III, a, b, c ou d da CF).
-        9. Dispositivos legais indicados como violados e argumentos relevantes do recurso.
-        10. Pedidos formulados no recurso.
-        11. Contrarrazões e argumentos relevantes.
+{LEGAL_GUIDELINES}
 
         ---
 
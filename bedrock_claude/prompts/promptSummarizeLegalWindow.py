@@ -0,0 +1,31 @@
+from prompts.promptSummarizeLegalText import LEGAL_GUIDELINES
+
+def PromptSummarizeLegalWindow(name_pdf, message_window, first_page, last_page):
+    """
+    Cria o prompt da etapa "map" do resumo map-reduce: extrai de um trecho do documento
+    (um intervalo de páginas) as informações ligadas às diretrizes do resumo.
+
+    Returns:
+        str: O prompt formatado para ser enviado ao modelo.
+    """
+
+    prompt = f"""\n
+        Você é um assistente jurídico especializado em resumir documentos legais. Você receberá apenas um trecho de um documento jurídico maior, das páginas {first_page} a {last_page}.
+        \n NOME DO DOCUMENTO: {name_pdf} \n
+        \n TRECHO DO DOCUMENTO: {message_window} \n
+
+        Extraia do trecho todas as informações relacionadas às próximas diretrizes. As páginas estão marcadas no texto como [Página N].
+
+        Diretrizes:
+{LEGAL_GUIDELINES}
+
+        ---
+
+        Instruções Adicionais:
+        - Registre apenas o que consta do trecho; não invente informações sobre as partes ausentes do documento.
+        - Indique, ao lado de cada informação, a página de onde ela foi extraída, no formato (p. N).
+        - Preserve literalmente a ementa e os dispositivos legais citados, se aparecerem no trecho.
+        - Se o trecho não contiver informação sobre uma diretriz, omita a diretriz.
+        - Responda em Português Brasil, de forma concisa.
+        """
+    return prompt
@@ -0,0 +1,387 @@
+import os
+import json
+import time
+import uuid
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+from prompts.promptSummarizeLegalText import PromptSummarizeLegalText
+from services.bedrock_claude import MODEL_CONTEXT_TOKENS, MODEL_ID, MODEL_MAX_OUTPUT_TOKENS, BedrockService
+from services.map_reduce_summarizer import EMPTY_DOCUMENT_MESSAGE, estimate_tokens, is_empty_document
+from services.tracing import get_tracer
+
+"""
+Inferência em lote do Bedrock (batch inference): os resumos de um acervo inteiro são gravados
+como registros JSONL, enviados como um único job assíncrono e lidos de volta quando o job termina.
+Cada registro custa cerca de metade de uma chamada sob demanda e não disputa a cota de requisições
+por minuto, em troca de uma latência de minutos a horas.
+
+Requisitos do backend Bedrock: um bucket S3 para entrada e saída, um papel IAM que o Bedrock possa
+assumir com acesso ao bucket e o modelo habilitado para inferência em lote na região. A cota mínima
+de registros por job (hoje 100) vale para o Bedrock; abaixo dela, prefira `summarize_documents`.
+"""
+
+# Estados finais do job (nomes usados pelo Bedrock em get_model_invocation_job)
+TERMINAL_STATUSES = ("Completed", "PartiallyCompleted", "Failed", "Stopped", "Expired")
+
+# Estados finais em que há saídas a ler
+SUCCESS_STATUSES = ("Completed", "PartiallyCompleted")
+
+# Quantidade mínima de registros aceita pelo Bedrock em um job de inferência em lote
+MIN_RECORDS_PER_JOB = 100
+
+# Resposta para documentos que não cabem na janela de contexto do modelo em uma única requisição
+OVERSIZED_DOCUMENT_MESSAGE = ("Documento maior que a janela de contexto do modelo; não foi enviado ao job. "
+                              "Resuma-o com `Controller.summarize_document(document, map_reduce=True)`.")
+
+def record_id(index: int) -> str:
+    """
+    Identificador do registro no JSONL (11 caracteres alfanuméricos, formato aceito pelo Bedrock).
+    """
+    return f"DOC{index:08d}"
+
+def write_batch_input(documents: Iterable[Dict[str, Any]], input_path: str,
+                      max_tokens: int = MODEL_MAX_OUTPUT_TOKENS) -> Tuple[Dict[str, str], Dict[str, str], Dict[str, str]]:
+    """
+    Grava um registro JSONL por documento, com o corpo da requisição de resumo em `modelInput`.
+    Documentos sem texto e documentos cujo prompt (estimado) mais `max_tokens` excede a janela de
+    contexto do modelo não são gravados, mas recebem um `recordId`, para manter a ordem de entrada:
+    o job não tem janelamento, e esses registros falhariam só depois de horas de espera.
+
+    Args:
+        documents (Iterable[Dict[str, Any]]): Documentos extraídos, com 'filename' e 'content_text'.
+        input_path (str): Caminho do arquivo JSONL a criar.
+        max_tokens (int): Número máximo de tokens gerados por resumo (limitado a `MODEL_MAX_OUTPUT_TOKENS`).
+
+    Returns:
+        Tuple[Dict[str, str], Dict[str, str], Dict[str, str]]: Nome do arquivo de cada registro gravado,
+        de cada documento sem texto e de cada documento grande demais, indexados pelo `recordId`.
+    """
+    max_tokens = min(max_tokens, MODEL_MAX_OUTPUT_TOKENS)
+    filenames, skipped, oversized = {}, {}, {}
+    os.makedirs(os.path.dirname(input_path) or ".", exist_ok=True)
+
+    with open(input_path, "w", encoding="utf-8") as input_file:
+        for index, document in enumerate(documents):
+            if is_empty_document(document):
+                skipped[record_id(index)] = document['filename']
+                continue
+
+            prompt = PromptSummarizeLegalText(document['filename'], document['content_text'])
+            if estimate_tokens(prompt) + max_tokens > MODEL_CONTEXT_TOKENS:
+                oversized[record_id(index)] = document['filename']
+                continue
+
+            record = {"recordId": record_id(index), "modelInput": BedrockService.build_request_payload(prompt, max_tokens)}
+            input_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            filenames[record["recordId"]] = document['filename']
+
+    return filenames, skipped, oversized
+
+def read_jsonl(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Converte linhas JSONL em dicionários, ignorando linhas vazias.
+    """
+    return [json.loads(line) for line in lines if line.strip()]
+
+def output_text(output_record: Dict[str, Any]) -> str:
+    """
+    Extrai o texto gerado de um registro de saída (resposta da Messages API em `modelOutput`).
+    """
+    content = output_record["modelOutput"].get("content", [])
+    return "".join(block.get("text", "") for block in content if block.get("type") == "text")
+
+class BedrockBatchBackend:
+    def __init__(self, bucket, role_arn, prefix="batch-inference", model_id=MODEL_ID, session=None):
+        """
+        Executa os jobs no Bedrock: envia o JSONL ao S3, cria o job com `create_model_invocation_job`,
+        consulta o estado com `get_model_invocation_job` e lê os arquivos `.jsonl.out` gerados.
+
+        Args:
+            bucket (str): Bucket S3 de entrada e saída dos jobs.
+            role_arn (str): ARN do papel IAM assumido pelo Bedrock para ler e gravar no bucket.
+            prefix (str): Prefixo das chaves no bucket (cada job usa `<prefix>/<nome do job>/`).
+            model_id (str): Modelo usado no job.
+            session (boto3.Session): Sessão AWS (padrão: nova sessão em us-east-1).
+        """
+        import boto3
+
+        session = session or boto3.Session(region_name='us-east-1')
+        self.bedrock = session.client("bedrock")
+        self.s3 = session.client("s3")
+        self.bucket = bucket
+        self.role_arn = role_arn
+        self.prefix = prefix.strip("/")
+        self.model_id = model_id
+        self._output_prefixes = {}
+
+    def submit(self, job_name: str, input_path: str) -> str:
+        """
+        Envia o JSONL ao S3 e cria o job de inferência em lote.
+
+        Args:
+            job_name (str): Nome do job (único na conta).
+            input_path (str): Arquivo JSONL local.
+
+        Returns:
+            str: ARN do job criado.
+        """
+        input_key = f"{self.prefix}/{job_name}/input/{os.path.basename(input_path)}"
+        output_prefix = f"{self.prefix}/{job_name}/output/"
+        self.s3.upload_file(input_path, self.bucket, input_key)
+
+        response = self.bedrock.create_model_invocation_job(
+            jobName=job_name,
+            roleArn=self.role_arn,
+            modelId=self.model_id,
+            inputDataConfig={'s3InputDataConfig': {'s3Uri': f"s3://{self.bucket}/{input_key}", 's3InputFormat': 'JSONL'}},
+            outputDataConfig={'s3OutputDataConfig': {'s3Uri': f"s3://{self.bucket}/{output_prefix}"}},
+        )
+        self._output_prefixes[response['jobArn']] = output_prefix
+        return response['jobArn']
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """
+        Consulta o estado do job.
+
+        Returns:
+            Dict[str, Any]: 'status' (ex.: 'InProgress', 'Completed') e 'message' (motivo de falha, se houver).
+        """
+        response = self.bedrock.get_model_invocation_job(jobIdentifier=job_id)
+        return {'status': response['status'], 'message': response.get('message')}
+
+    def fetch_outputs(self, job_id: str) -> List[Dict[str, Any]]:
+        """
+        Lê os registros de saída do job (um `.jsonl.out` por arquivo de entrada).
+
+        Returns:
+            List[Dict[str, Any]]: Registros com 'recordId' e 'modelOutput' ou 'error'.
+        """
+        if job_id not in self._output_prefixes:
+            response = self.bedrock.get_model_invocation_job(jobIdentifier=job_id)
+            self._output_prefixes[job_id] = response['outputDataConfig']['s3OutputDataConfig']['s3Uri'].split(f"s3://{self.bucket}/", 1)[1]
+
+        records = []
+        paginator = self.s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._output_prefixes[job_id]):
+            for item in page.get("Contents", []):
+                if item["Key"].endswith(".jsonl.out"):
+                    body = self.s3.get_object(Bucket=self.bucket, Key=item["Key"])["Body"].read().decode("utf-8")
+                    records.extend(read_jsonl(body.splitlines()))
+        return records
+
+class LocalBatchBackend:
+    def __init__(self, work_directory: str, responder: Optional[Callable[[Dict[str, Any]], str]] = None, polls_until_done: int = 1):
+        """
+        Substituto local do Bedrock para testar o fluxo em lote sem AWS: lê o JSONL enviado e grava
+        respostas prontas no mesmo formato de saída do Bedrock.
+
+        Args:
+            work_directory (str): Diretório onde os arquivos de saída são gravados.
+            responder (Callable[[Dict[str, Any]], str]): Gera o texto de resposta a partir do `modelInput`
+                (padrão: resposta fixa com o tamanho do prompt). Uma exceção vira um registro com 'error'.
+            polls_until_done (int): Consultas de estado que respondem 'InProgress' antes de 'Completed'.
+        """
+        self.work_directory = work_directory
+        self.responder = responder or (lambda model_input: f"Resumo simulado ({len(model_input['messages'][0]['content'][0]['text'])} caracteres de entrada).")
+        self.polls_until_done = polls_until_done
+        self._jobs = {}
+
+    def submit(self, job_name: str, input_path: str) -> str:
+        job_id = f"local/{job_name}"
+        self._jobs[job_id] = {'input_path': input_path, 'polls': 0, 'output_path': None}
+        return job_id
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        job = self._jobs[job_id]
+        job['polls'] += 1
+
+        if job['polls'] <= self.polls_until_done:
+            return {'status': 'InProgress', 'message': None}
+
+        if job['output_path'] is None:
+            job['output_path'] = self._run(job_id, job['input_path'])
+        return {'status': 'Completed', 'message': None}
+
+    def fetch_outputs(self, job_id: str) -> List[Dict[str, Any]]:
+        with open(self._jobs[job_id]['output_path'], encoding="utf-8") as output_file:
+            return read_jsonl(output_file)
+
+    def _run(self, job_id, input_path):
+        # Gera as respostas de todos os registros, como o Bedrock faria ao concluir o job
+        output_path = os.path.join(self.work_directory, job_id.replace("/", "_"), os.path.basename(input_path) + ".out")
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+        with open(input_path, encoding="utf-8") as input_file, open(output_path, "w", encoding="utf-8") as output_file:
+            for record in read_jsonl(input_file):
+                try:
+                    text = self.responder(record["modelInput"])
+                    result = {"modelOutput": {"type": "message", "role": "assistant", "content": [{"type": "text", "text": text}],
+                                              "stop_reason": "end_turn", "usage": {"output_tokens": len(text.split())}}}
+                except Exception as e:
+                    result = {"error": {"errorCode": 500, "errorMessage": str(e)}}
+                output_file.write(json.dumps({"recordId": record["recordId"], "modelInput": record["modelInput"], **result}, ensure_ascii=False) + "\n")
+
+        return output_path
+
+class BatchSummarizer:
+    def __init__(self, backend, work_directory="batch_jobs", poll_interval=60.0, timeout=24 * 3600.0, max_tokens=MODEL_MAX_OUTPUT_TOKENS):
+        """
+        Resume muitos documentos em um único job de inferência em lote.
+
+        Args:
+            backend: Backend do job (`BedrockBatchBackend` ou `LocalBatchBackend`), com `submit`, `status` e `fetch_outputs`.
+            work_directory (str): Diretório dos arquivos JSONL de entrada e do mapeamento registro -> arquivo.
+            poll_interval (float): Intervalo, em segundos, entre as consultas de estado do job.
+            timeout (float): Tempo máximo de espera pelo job, em segundos.
+            max_tokens (int): Número máximo de tokens gerados por resumo (limitado a `MODEL_MAX_OUTPUT_TOKENS`).
+        """
+        self.backend = backend
+        self.work_directory = work_directory
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+
+    def submit(self, documents: Iterable[Dict[str, Any]], job_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Grava o JSONL e envia o job. O mapeamento registro -> arquivo é salvo em disco, para que o
+        resultado possa ser coletado depois por `collect`, inclusive em outro processo.
+
+        Args:
+            documents (Iterable[Dict[str, Any]]): Documentos extraídos, com 'filename' e 'content_text'.
+            job_name (str): Nome do job (padrão: gerado a partir da data e de um sufixo aleatório).
+
+        Returns:
+            Dict[str, Any]: Nome e identificador do job, nomes dos arquivos por `recordId` e documentos sem
+            texto ou grandes demais (não enviados).
+        """
+        job_name = job_name or f"resumo-juridico-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        job_directory = os.path.join(self.work_directory, job_name)
+        tracer = get_tracer()
+
+        with tracer.span("batch.write") as span:
+            filenames, skipped, oversized = write_batch_input(documents, os.path.join(job_directory, "input.jsonl"), self.max_tokens)
+            span.set(records=len(filenames), skipped=len(skipped), oversized=len(oversized), bytes=os.path.getsize(os.path.join(job_directory, "input.jsonl")))
+
+        if skipped:
+            print(f"Aviso: {len(skipped)} documento(s) sem texto não foram enviados ao job: {', '.join(skipped.values())}")
+
+        if oversized:
+            print(f"Aviso: {len(oversized)} documento(s) maiores que a janela de contexto não foram enviados ao job "
+                  f"(use summarize_document com map_reduce=True): {', '.join(oversized.values())}")
+
+        if filenames and len(filenames) < MIN_RECORDS_PER_JOB and isinstance(self.backend, BedrockBatchBackend):
+            print(f"Aviso: o job tem {len(filenames)} registros; o Bedrock exige ao menos {MIN_RECORDS_PER_JOB} por job de inferência em lote.")
+
+        # Sem nenhum documento com texto, não há job a enviar
+        job_id = None
+        if filenames:
+            with tracer.span("batch.submit", records=len(filenames)):
+                job_id = self.backend.submit(job_name, os.path.join(job_directory, "input.jsonl"))
+
+        job = {'job_name': job_name, 'job_id': job_id, 'filenames': filenames, 'skipped': skipped, 'oversized': oversized}
+        with open(os.path.join(job_directory, "job.json"), "w", encoding="utf-8") as job_file:
+            json.dump(job, job_file, ensure_ascii=False)
+
+        if job_id is None:
+            print(f"Nenhum documento a enviar: o job {job_name} não foi enviado")
+        else:
+            print(f"Job de inferência em lote enviado: {job_name} ({len(filenames)} documentos)")
+        return job
+
+    def wait(self, job_id: str) -> Dict[str, Any]:
+        """
+        Consulta o estado do job a cada `poll_interval` segundos até um estado final.
+
+        Args:
+            job_id (str): Identificador do job retornado por `submit`.
+
+        Returns:
+            Dict[str, Any]: Último estado consultado.
+
+        Raises:
+            TimeoutError: Se o job não terminar dentro de `timeout`.
+        """
+        deadline = time.monotonic() + self.timeout
+
+        with get_tracer().span("batch.wait") as span:
+            while True:
+                status = self.backend.status(job_id)
+                if status['status'] in TERMINAL_STATUSES:
+                    span.set(status=status['status'])
+                    return status
+
+                if time.monotonic() + self.poll_interval > deadline:
+                    raise TimeoutError(f"O job {job_id} não terminou em {self.timeout:.0f} s (estado: {status['status']})")
+
+                print(f"Job {job_id}: {status['status']}")
+                time.sleep(self.poll_interval)
+
+    def collect(self, job: Dict[str, Any], status: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Lê as saídas do job e as associa aos arquivos de origem.
+
+        Args:
+            job (Dict[str, Any]): Job retornado por `submit` (ou lido do job.json).
+            status (Dict[str, Any]): Estado final retornado por `wait`.
+
+        Returns:
+            List[Dict[str, Any]]: Nome do arquivo, código de status e texto gerado (ou mensagem de erro) de
+            cada documento, na ordem de entrada, no mesmo formato de `Controller.summarize_document`.
+        """
+        # Documentos não enviados voltam na posição de entrada: sem texto com status 422 e grandes
+        # demais para a janela de contexto com status 413
+        not_sent = {current_record_id: {'filename': filename, 'statusCode': 422, 'body': EMPTY_DOCUMENT_MESSAGE}
+                    for current_record_id, filename in job.get('skipped', {}).items()}
+        not_sent.update({current_record_id: {'filename': filename, 'statusCode': 413, 'body': OVERSIZED_DOCUMENT_MESSAGE}
+                         for current_record_id, filename in job.get('oversized', {}).items()})
+        ordered_ids = sorted({**job['filenames'], **not_sent})
+
+        if status['status'] not in SUCCESS_STATUSES:
+            return [not_sent[current_record_id] if current_record_id in not_sent
+                    else {'filename': job['filenames'][current_record_id], 'statusCode': 500, 'body': f"Job {status['status']}: {status.get('message')}"}
+                    for current_record_id in ordered_ids]
+
+        outputs = {}
+        if job['job_id'] is not None:
+            with get_tracer().span("batch.collect") as span:
+                outputs = {record['recordId']: record for record in self.backend.fetch_outputs(job['job_id'])}
+                span.set(records=len(outputs))
+
+        results = []
+        for current_record_id in ordered_ids:
+            if current_record_id in not_sent:
+                results.append(not_sent[current_record_id])
+                continue
+
+            filename = job['filenames'][current_record_id]
+            record = outputs.get(current_record_id)
+
+            if record is None:
+                results.append({'filename': filename, 'statusCode': 500, 'body': "Registro sem saída no job"})
+            elif 'error' in record:
+                results.append({'filename': filename, 'statusCode': 500, 'body': f"Erro ao executar o modelo do Bedrock: {record['error']}"})
+            else:
+                results.append({'filename': filename, 'statusCode': 200, 'body': output_text(record)})
+
+        return results
+
+    def summarize(self, documents: Iterable[Dict[str, Any]], job_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Envia o job, espera sua conclusão e devolve os resumos associados aos arquivos de origem.
+
+        Args:
+            documents (Iterable[Dict[str, Any]]): Documentos extraídos, com 'filename' e 'content_text'.
+            job_name (str): Nome do job (opcional).
+
+        Returns:
+            List[Dict[str, Any]]: Resultado de cada documento, na ordem de entrada.
+        """
+        job = self.submit(documents, job_name)
+        status = self.wait(job['job_id']) if job['job_id'] is not None else {'status': 'Completed', 'message': None}
+        return self.collect(job, status)
+
+    def load_job(self, job_name: str) -> Dict[str, Any]:
+        """
+        Lê o job.json gravado por `submit`, para coletar os resultados de um job enviado anteriormente.
+        """
+        with open(os.path.join(self.work_directory, job_name, "job.json"), encoding="utf-8") as job_file:
+            return json.load(job_file)
@@ -1,12 +1,21 @@
 import json
+import time
 import boto3
 from botocore.exceptions import ClientError
 from prompts.promptSummarizeLegalText import PromptSummarizeLegalText
+from services.tracing import get_tracer
 
 """
 Caso for testar o Bedrock veja se está habilitado o modelo no AWS Bedrock (https://us-east-1.console.aws.amazon.com/bedrock/home?region=us-east-1#/modelaccess)
 """
 
+# Modelo usado nas chamadas diretas e nos jobs de inferência em lote
+MODEL_ID = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+
+# Limites do modelo: tokens gerados por resposta e janela de contexto (entrada + saída)
+MODEL_MAX_OUTPUT_TOKENS = 4096
+MODEL_CONTEXT_TOKENS = 200000
+
 class BedrockService:
     def __init__(self):
         """
@@ -34,70 +43,185 @@ class BedrockService:
         self.message_pdf = msg
         return True
 
-     
-    def generate_request_body(self):
+    def summarize_document(self, pdf_name, msg, max_tokens=60000):
+        """
+        Resume um documento sem alterar o estado da instância, de modo que várias threads
+        possam compartilhar o mesmo serviço (o cliente do Boto3 é thread-safe).
+
+        Parameters:
+            pdf_name (str): Nome do arquivo PDF.
+            msg (str): Texto extraído do documento.
+            max_tokens (int): Número máximo de tokens gerados.
+
+        Returns:
+            dict: Resposta formatada com o código de status e o texto gerado pelo modelo.
+        """
+        return self.invoke_model(PromptSummarizeLegalText(pdf_name, msg), max_tokens)
+
+    def generate_request_body(self, prompt=None, max_tokens=60000):
         """
         Gera o corpo da requisição para enviar ao modelo Bedrock.
 
         Inclui o prompt e configurações de geração de texto como o número máximo de tokens, temperatura e topP.
 
+        Parameters:
+            prompt (str): Prompt a ser enviado. Se None, usa o resumo do documento definido em `set_document`.
+            max_tokens (int): Número máximo de tokens gerados.
+
         Returns:
             str: O corpo da requisição em formato JSON.
         """
-        request_body = {
+        with get_tracer().span("prompt.build", max_tokens=max_tokens) as span:
+            request_body = self._build_request_body(prompt, max_tokens)
+            span.set(bytes=len(request_body.encode("utf-8")))
+        return request_body
+
+    def _build_request_body(self, prompt, max_tokens):
+        # Monta o prompt (se necessário) e serializa o corpo da requisição
+        if prompt is None:
+            prompt = PromptSummarizeLegalText(self.name_pdf, self.message_pdf)
+        return json.dumps(self.build_request_payload(prompt, max_tokens))
+
+    @staticmethod
+    def build_request_payload(prompt, max_tokens=60000):
+        """
+        Monta o corpo da requisição como dicionário, usado tanto nas chamadas diretas (serializado
+        em JSON) quanto como `modelInput` dos registros de inferência em lote.
+
+        Parameters:
+            prompt (str): Prompt a ser enviado.
+            max_tokens (int): Número máximo de tokens gerados, limitado a `MODEL_MAX_OUTPUT_TOKENS`
+                (acima dele o Bedrock rejeita a requisição).
+
+        Returns:
+            dict: Corpo da requisição no formato da Messages API da Anthropic.
+        """
+        return {
             "anthropic_version" : 'bedrock-2023-05-31',
-            "max_tokens": 60000,
+            "max_tokens": min(max_tokens, MODEL_MAX_OUTPUT_TOKENS),
             "temperature": 0.2,         # temperature: aleatoriedade na geração de texto (quanto maior, mais aleatório e menos conservador o texto é)
             "top_p": 0.3,                 # topP: tokens que compõem o top p% da probabilidade cumulativa
             'messages' : [
                             {
                             'role' : 'user', 
-                            'content': [{'type' : 'text', 'text' : PromptSummarizeLegalText(self.name_pdf, self.message_pdf)}]
+                            'content': [{'type' : 'text', 'text' : prompt}]
                             }
                          ]  
         }
-        return json.dumps(request_body)
 
-    def invoke_model(self):
+    def stream_model(self, prompt=None, max_tokens=60000):
+        """
+        Invoca o modelo Bedrock em modo streaming e retorna um iterador sobre os trechos de texto
+        gerados, à medida que chegam. Após a iteração, `metrics` traz o tempo até o primeiro token
+        e a taxa de tokens por segundo.
+
+        Parameters:
+            prompt (str): Prompt a ser enviado. Se None, usa o resumo do documento definido em `set_document`.
+            max_tokens (int): Número máximo de tokens gerados.
+
+        Returns:
+            BedrockStream: Iterador sobre os trechos de texto gerados.
+
+        Raises:
+            ClientError: Se a chamada ao Bedrock for rejeitada.
+        """
+        request_body = self.generate_request_body(prompt, max_tokens)
+        start_time = time.perf_counter()
+
+        # Invoca o modelo com o corpo da requisição gerado
+        response = self.bedrock.invoke_model_with_response_stream(
+            modelId=MODEL_ID, 
+            contentType='application/json',
+            accept="*/*",
+            body=request_body
+        )
+        return BedrockStream(response.get("body"), start_time)
+
+    def invoke_model(self, prompt=None, max_tokens=60000):
         """
         Invoca o modelo Bedrock com o corpo da requisição gerado.
 
         Configura os parâmetros de invocação, incluindo o ID do modelo, o tipo de conteúdo e o corpo da requisição. Processa a resposta do modelo e retorna a resposta formatada.
 
+        Parameters:
+            prompt (str): Prompt a ser enviado. Se None, usa o resumo do documento definido em `set_document`.
+            max_tokens (int): Número máximo de tokens gerados.
+
         Returns:
-            dict: Resposta formatada com o código de status e o texto gerado pelo modelo.
+            dict: Resposta formatada com o código de status, o texto gerado pelo modelo e as métricas do stream.
         """
-        model_id = "anthropic.claude-3-5-sonnet-20240620-v1:0"
-
         try:
-            # Invoca o modelo com o corpo da requisição gerado
-            response = self.bedrock.invoke_model_with_response_stream(
-                modelId=model_id, 
-                contentType='application/json',
-                accept="*/*",
-                body=self.generate_request_body()
-            )
-            
-            output_text = ""
-            for event in response.get("body"):
-                chunk = json.loads(event["chunk"]["bytes"])
-
-                # if chunk['type'] == 'message_delta':
-                #     print(f"\nStop reason: {chunk['delta']['stop_reason']}")
-                #     print(f"Stop sequence: {chunk['delta']['stop_sequence']}")
-                #     print(f"Output tokens: {chunk['usage']['output_tokens']}")
-
-                if chunk['type'] == 'content_block_delta':
-                    if chunk['delta']['type'] == 'text_delta':
-                        output_text += f"{chunk['delta']['text']}"
-            
-            # # Processa a resposta do modelo
-            # model_response = json.loads(response["body"].read().decode('utf-8'))
-            # response_text = model_response["results"][0]["outputText"]
+            stream = self.stream_model(prompt, max_tokens)
+
+            # Acumula os trechos em uma lista e junta apenas no final
+            output_parts = []
+            for text_delta in stream:
+                output_parts.append(text_delta)
+
+            # Registra as etapas do modelo a partir das métricas medidas pelo stream
+            metrics = stream.metrics
+            start_time = time.time() - metrics['total_time']
+            tracer = get_tracer()
+            if metrics['time_to_first_token'] is not None:
+                tracer.record("llm.first_token", metrics['time_to_first_token'], start_time=start_time)
+            tracer.record("llm.completion", metrics['total_time'], start_time=start_time, max_tokens=max_tokens,
+                          input_tokens=metrics['input_tokens'], output_tokens=metrics['output_tokens'],
+                          tokens_per_second=metrics['tokens_per_second'])
 
             # Retorna a resposta formatada
-            return {'statusCode': 200, 'body': output_text}
+            return {'statusCode': 200, 'body': "".join(output_parts), 'metrics': metrics}
         
         except ClientError as e:
             print(f"Error invoking model: {e}")
-            return {'statusCode': 500, 'body': json.dumps(str(e))}
\ No newline at end of file
+            return {'statusCode': 500, 'body': json.dumps(str(e))}
+
+class BedrockStream:
+    def __init__(self, event_stream, start_time):
+        """
+        Iterador sobre os trechos de texto de uma resposta em streaming do Bedrock.
+
+        Parameters:
+            event_stream (EventStream): Corpo da resposta de `invoke_model_with_response_stream`.
+            start_time (float): Instante (time.perf_counter) em que a requisição foi enviada.
+        """
+        self.event_stream = event_stream
+        self.start_time = start_time
+        self.metrics = {}
+
+    def __iter__(self):
+        first_token_time = None
+        output_tokens = None
+        invocation_metrics = {}
+
+        for event in self.event_stream:
+            # Eventos sem "chunk" indicam erro no meio do stream (ex.: modelStreamErrorException)
+            if "chunk" not in event:
+                raise RuntimeError(f"Erro no stream do Bedrock: {event}")
+
+            chunk = json.loads(event["chunk"]["bytes"])
+
+            if chunk['type'] == 'content_block_delta':
+                if chunk['delta']['type'] == 'text_delta':
+                    if first_token_time is None:
+                        first_token_time = time.perf_counter()
+                    yield chunk['delta']['text']
+
+            elif chunk['type'] == 'message_delta':
+                output_tokens = chunk.get('usage', {}).get('output_tokens', output_tokens)
+
+            elif chunk['type'] == 'message_stop':
+                invocation_metrics = chunk.get('amazon-bedrock-invocationMetrics', {})
+
+        end_time = time.perf_counter()
+        output_tokens = invocation_metrics.get('outputTokenCount', output_tokens) or 0
+        generation_seconds = end_time - (first_token_time or end_time)
+
+        self.metrics = {
+            'time_to_first_token': (first_token_time - self.start_time) if first_token_time else None,
+            'total_time': end_time - self.start_time,
+            'input_tokens': invocation_metrics.get('inputTokenCount'),
+            'output_tokens': output_tokens,
+            'tokens_per_second': output_tokens / generation_seconds if generation_seconds > 0 else None,
+            'first_byte_latency_ms': invocation_metrics.get('firstByteLatency'),
+            'invocation_latency_ms': invocation_metrics.get('invocationLatency'),
+        }
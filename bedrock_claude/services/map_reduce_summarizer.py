@@ -0,0 +1,179 @@
+import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple
+from prompts.promptSummarizeLegalWindow import PromptSummarizeLegalWindow
+from prompts.promptReduceLegalSummaries import PromptReduceLegalSummaries
+from services.tracing import get_tracer
+from rag_common.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+# Páginas com menos caracteres visíveis que isto são tratadas como imagem sem texto: os carimbos de
+# assinatura digital que os sistemas dos tribunais acrescentam às peças digitalizadas têm algumas dezenas
+MIN_PAGE_CHARACTERS = int(os.environ.get("MIN_PAGE_CHARACTERS", "50"))
+
+# Resposta para documentos sem texto, que não são enviados ao modelo
+EMPTY_DOCUMENT_MESSAGE = "Documento sem texto extraído (PDF digitalizado sem OCR?); o modelo não foi chamado."
+
+def document_pages(document: Dict[str, Any]) -> List[Tuple[int, str]]:
+    """
+    Obtém as páginas de um documento extraído, numeradas a partir de 1.
+
+    Aceita os formatos produzidos pelos serviços de OCR: lista de páginas em `pages`
+    (PyMuPDF), lista de `Document` da LangChain em `content_text` (PyPDFLoader) ou o
+    texto completo em `content_text` (tratado como uma única página).
+
+    Args:
+        document (Dict[str, Any]): Dicionário com o nome do arquivo e o texto extraído.
+
+    Returns:
+        List[Tuple[int, str]]: Número e texto de cada página.
+    """
+    if document.get("pages") is not None:
+        return [(page_number, text) for page_number, text in enumerate(document["pages"], start=1)]
+
+    content = document["content_text"]
+    if isinstance(content, list):
+        return [(page.metadata.get("page", index) + 1, page.page_content) for index, page in enumerate(content)]
+
+    return [(1, content)]
+
+def is_empty_page(text: str, min_characters: int = MIN_PAGE_CHARACTERS) -> bool:
+    """
+    Indica se a página tem menos de `min_characters` caracteres visíveis (ex.: página digitalizada
+    sem texto embutido, ou apenas com o carimbo de assinatura).
+    """
+    return sum(not character.isspace() for character in text) < min_characters
+
+def is_empty_document(document: Dict[str, Any], min_characters: int = MIN_PAGE_CHARACTERS) -> bool:
+    """
+    Indica se nenhuma página do documento extraído tem texto (ex.: PDF digitalizado sem OCR),
+    caso em que não deve ser enviado ao modelo.
+    """
+    return all(is_empty_page(text, min_characters) for _, text in document_pages(document))
+
+def split_into_windows(pages: List[Tuple[int, str]], window_tokens: int) -> List[Tuple[int, int, str]]:
+    """
+    Agrupa páginas consecutivas em janelas de até `window_tokens` tokens, sem quebrar páginas
+    entre janelas. Uma página maior que a janela é dividida em partes que mantêm o número da página.
+
+    Args:
+        pages (List[Tuple[int, str]]): Número e texto de cada página.
+        window_tokens (int): Orçamento de tokens de entrada de cada janela.
+
+    Returns:
+        List[Tuple[int, int, str]]: Primeira página, última página e texto marcado de cada janela.
+    """
+    window_chars = window_tokens * CHARS_PER_TOKEN
+    windows, current, current_chars = [], [], 0
+
+    def flush():
+        if current:
+            windows.append((current[0][0], current[-1][0], "\n".join(text for _, text in current)))
+
+    for page_number, text in pages:
+        # Divide páginas que sozinhas não cabem em uma janela
+        parts = [text[start:start + window_chars] for start in range(0, len(text), window_chars)] or [""]
+
+        for part in parts:
+            marked_text = f"[Página {page_number}]\n{part}"
+
+            if current and current_chars + len(marked_text) > window_chars:
+                flush()
+                current, current_chars = [], 0
+
+            current.append((page_number, marked_text))
+            current_chars += len(marked_text)
+
+    flush()
+    return windows
+
+class MapReduceSummarizer:
+    def __init__(self, bedrock_service, max_concurrency=4, window_tokens=20000, map_output_tokens=2000,
+                 reduce_input_tokens=60000, reduce_output_tokens=8000):
+        """
+        Resume documentos longos em duas etapas: cada janela de páginas é resumida de forma
+        concorrente ("map") e as anotações parciais são combinadas em um resumo final ("reduce")
+        que segue as diretrizes e o padrão de retorno do resumo direto.
+
+        Parameters:
+            bedrock_service (BedrockService): Serviço usado para invocar o modelo.
+            max_concurrency (int): Número máximo de chamadas simultâneas ao Bedrock.
+            window_tokens (int): Orçamento de tokens de entrada de cada janela na etapa map.
+            map_output_tokens (int): Máximo de tokens gerados por janela na etapa map.
+            reduce_input_tokens (int): Orçamento de tokens de entrada de cada chamada da etapa reduce.
+            reduce_output_tokens (int): Máximo de tokens gerados na etapa reduce.
+        """
+        self.bedrock_service = bedrock_service
+        self.max_concurrency = max(max_concurrency, 1)
+        self.window_tokens = window_tokens
+        self.map_output_tokens = map_output_tokens
+        self.reduce_input_tokens = reduce_input_tokens
+        self.reduce_output_tokens = reduce_output_tokens
+
+    def _invoke(self, prompt, max_tokens):
+        # Invoca o modelo e converte respostas de erro em exceção
+        response = self.bedrock_service.invoke_model(prompt, max_tokens)
+
+        if response['statusCode'] != 200:
+            raise RuntimeError(f"Erro ao invocar o modelo do Bedrock: {response['body']}")
+
+        return response['body']
+
+    def _run_all(self, executor, function, items):
+        # Executa `function` para cada item no pool, preservando a ordem e o span ativo (contexto) da chamada
+        futures = [executor.submit(contextvars.copy_context().run, function, item) for item in items]
+        return [future.result() for future in futures]
+
+    def _map(self, executor, name_pdf, windows):
+        # Resume cada janela de forma concorrente, preservando a ordem das páginas
+        return self._run_all(
+            executor,
+            lambda window: self._invoke(PromptSummarizeLegalWindow(name_pdf, window[2], window[0], window[1]), self.map_output_tokens),
+            windows,
+        )
+
+    def _collapse(self, executor, name_pdf, summaries):
+        # Combina as anotações em grupos que cabem no orçamento da etapa reduce, até restar um único grupo
+        while estimate_tokens("\n\n".join(summaries)) > self.reduce_input_tokens and len(summaries) > 1:
+            groups, current = [], []
+
+            for summary in summaries:
+                if current and estimate_tokens("\n\n".join(current + [summary])) > self.reduce_input_tokens:
+                    groups.append(current)
+                    current = []
+                current.append(summary)
+            groups.append(current)
+
+            # Sem progresso possível (cada anotação já excede o orçamento sozinha)
+            if len(groups) == len(summaries):
+                break
+
+            summaries = self._run_all(
+                executor,
+                lambda group: self._invoke(PromptReduceLegalSummaries(name_pdf, "\n\n".join(group), final=False), self.map_output_tokens),
+                groups,
+            )
+
+        return summaries
+
+    def summarize(self, document: Dict[str, Any]) -> str:
+        """
+        Resume um documento com a estratégia map-reduce.
+
+        Parameters:
+            document (Dict[str, Any]): Dicionário com o nome do arquivo e o texto extraído.
+
+        Returns:
+            str: Resumo final do documento.
+        """
+        name_pdf = document["filename"]
+        with get_tracer().span("split", window_tokens=self.window_tokens) as span:
+            pages = document_pages(document)
+            windows = split_into_windows(pages, self.window_tokens)
+            span.set(pages=len(pages), windows=len(windows))
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            summaries = self._map(executor, name_pdf, windows)
+            summaries = self._collapse(executor, name_pdf, summaries)
+
+        return self._invoke(PromptReduceLegalSummaries(name_pdf, "\n\n".join(summaries), final=True), self.reduce_output_tokens)
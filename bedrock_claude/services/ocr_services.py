@@ -1,33 +1,58 @@
 import os
+import time
+import subprocess
 import fitz  # PyMuPDF
-from typing import Dict, Any, List
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Iterator, Optional
+from langchain_core.documents import Document
+from .map_reduce_summarizer import MIN_PAGE_CHARACTERS, is_empty_page
 from .ocr_services_langchain import extract_text_langchain
+from .pdf_text_cache import get_pdf_text_cache, parser_id
+from .tracing import get_tracer
+
+# Identificador do PyMuPDF no cache de texto dos PDFs
+PYMUPDF_PARSER = parser_id("pymupdf")
+
+# OCR das páginas sem texto embutido (PDFs digitalizados): binário do Tesseract, idioma e resolução da rasterização
+TESSERACT_CMD = os.environ.get("TESSERACT_CMD", "tesseract")
+OCR_LANGUAGE = os.environ.get("OCR_LANGUAGE", "por")
+OCR_DPI = int(os.environ.get("OCR_DPI", "300"))
+
+def _parse_pymupdf(pdf_file_path: str) -> List[Dict[str, Any]]:
+    pdf_document = fitz.open(pdf_file_path)  # Abre o PDF
+
+    # Itera por todas as páginas do PDF e extrai o texto de cada uma
+    pages = [{"text": pdf_document.load_page(page_number).get_text(), "metadata": {"page": page_number}}
+             for page_number in range(pdf_document.page_count)]
+
+    pdf_document.close()  # Fecha o arquivo PDF após a leitura
+    return pages
 
 # Função para extrair texto de um arquivo PDF usando PyMuPDF (fitz)
 def extract_text_pymupdf(pdf_file_path: str) -> Dict[str, Any]:
     """
     Extrai o texto de um arquivo PDF usando PyMuPDF (fitz).
 
+    O texto de cada página fica no cache em disco (`PDF_TEXT_CACHE_PATH`), indexado pelo hash
+    do conteúdo: um arquivo inalterado não é lido de novo.
+
     Args:
         pdf_file_path (str): Caminho para o arquivo PDF a ser processado.
 
     Returns:
-        Dict[str, Any]: Um dicionário contendo o nome do arquivo e o texto extraído.
+        Dict[str, Any]: Um dicionário contendo o nome do arquivo, o texto extraído e o texto de cada página.
     """
     try:
-        pdf_document = fitz.open(pdf_file_path)  # Abre o PDF
-        full_text = ""
+        # Consulta o cache de texto extraído antes de abrir o PDF
+        cache = get_pdf_text_cache()
+        records = cache.load(pdf_file_path, PYMUPDF_PARSER, _parse_pymupdf) if cache else _parse_pymupdf(pdf_file_path)
+        pages = [record["text"] for record in records]
 
-        # Itera por todas as páginas do PDF e extrai o texto
-        for page_number in range(pdf_document.page_count):
-            page = pdf_document.load_page(page_number)
-            full_text += page.get_text()
-
-        pdf_document.close()  # Fecha o arquivo PDF após a leitura
-        
         return {
             "filename": os.path.basename(pdf_file_path),  # Nome do arquivo PDF
-            "content_text": full_text  # Texto extraído do PDF
+            "content_text": "".join(pages),  # Texto extraído do PDF
+            "pages": pages  # Texto de cada página, na ordem do documento
         }
 
     except fitz.fitz.EmptyFileError:
@@ -38,6 +63,284 @@ def extract_text_pymupdf(pdf_file_path: str) -> Dict[str, Any]:
         # Captura outras exceções durante o processamento
         raise RuntimeError(f"Erro ao processar o arquivo {pdf_file_path}: {str(e)}")
 
+# Backends de extração disponíveis para o processamento paralelo
+PDF_BACKENDS = {
+    "pymupdf": extract_text_pymupdf,
+    "pypdf": extract_text_langchain,
+}
+
+# Função executada nos processos do pool: extrai o texto e mede o tempo da extração
+def _extract_with_timing(extract_function, pdf_file_path: str):
+    start_time = time.time()
+    start_counter = time.perf_counter()
+    document = extract_function(pdf_file_path)
+    return document, start_time, time.perf_counter() - start_counter
+
+@lru_cache(maxsize=None)
+def tesseract_version(command: str = TESSERACT_CMD) -> Optional[str]:
+    """
+    Versão do Tesseract instalado (ex.: "5.3.0"), ou None se o binário não for encontrado.
+    """
+    try:
+        result = subprocess.run([command, "--version"], capture_output=True, text=True, check=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    # Versões antigas escrevem a versão no stderr
+    first_line = (result.stdout or result.stderr).strip().split("\n", 1)[0]
+    return first_line.split()[-1] if first_line else "unknown"
+
+# Função executada nos processos do pool de OCR: rasteriza uma página e a reconhece com o Tesseract
+def ocr_page(pdf_file_path: str, page_number: int, dpi: int = OCR_DPI, language: str = OCR_LANGUAGE,
+             command: str = TESSERACT_CMD):
+    """
+    Rasteriza a página com PyMuPDF (em tons de cinza, na resolução `dpi`) e extrai o texto da
+    imagem com o Tesseract.
+
+    Args:
+        pdf_file_path (str): Caminho do arquivo PDF.
+        page_number (int): Índice da página, a partir de 0.
+        dpi (int): Resolução da rasterização.
+        language (str): Idioma(s) do Tesseract (ex.: "por" ou "por+eng").
+        command (str): Binário do Tesseract.
+
+    Returns:
+        Tuple[str, float, float]: Texto reconhecido, instante de início e duração do OCR.
+    """
+    start_time = time.time()
+    start_counter = time.perf_counter()
+
+    with fitz.open(pdf_file_path) as pdf_document:
+        image = pdf_document.load_page(page_number).get_pixmap(dpi=dpi, colorspace=fitz.csGRAY).tobytes("png")
+
+    # Uma thread por Tesseract: o paralelismo vem do pool de processos
+    result = subprocess.run([command, "stdin", "stdout", "-l", language, "--dpi", str(dpi)], input=image,
+                            capture_output=True, timeout=300, env={**os.environ, "OMP_THREAD_LIMIT": "1"})
+    if result.returncode != 0:
+        # Ex.: dados do idioma ausentes ("Error opening data file por.traineddata")
+        raise RuntimeError(f"Tesseract terminou com código {result.returncode}: {result.stderr.decode('utf-8', errors='replace').strip()}")
+
+    return result.stdout.decode("utf-8", errors="replace"), start_time, time.perf_counter() - start_counter
+
+def _page_texts(document: Dict[str, Any]) -> Optional[List[str]]:
+    # Texto de cada página, na ordem do PDF (None quando o documento não guarda as páginas)
+    if document.get("pages") is not None:
+        return list(document["pages"])
+    if isinstance(document.get("content_text"), list):
+        return [page.page_content for page in document["content_text"]]
+    return None
+
+def _with_page_texts(document: Dict[str, Any], texts: List[str]) -> Dict[str, Any]:
+    # Cópia do documento com o texto das páginas substituído, no mesmo formato de entrada
+    if document.get("pages") is not None:
+        return {**document, "pages": texts, "content_text": "".join(texts)}
+    return {**document, "content_text": [Document(page_content=text, metadata=page.metadata)
+                                         for page, text in zip(document["content_text"], texts)]}
+
+class OcrFallback:
+    def __init__(self, dpi: int = OCR_DPI, language: str = OCR_LANGUAGE, max_workers: int = None,
+                 min_characters: int = MIN_PAGE_CHARACTERS, command: str = TESSERACT_CMD):
+        """
+        OCR das páginas sem texto embutido. As páginas de um documento que o detector considera
+        vazias são rasterizadas e reconhecidas pelo Tesseract em um pool de processos (uma página
+        por tarefa). Só as páginas reconhecidas ficam no cache de texto dos PDFs, indexadas pelo
+        hash do conteúdo e pelos parâmetros do OCR: o texto das demais vem do backend de extração
+        usado (PyMuPDF ou PyPDFLoader), que tem o seu próprio registro no cache.
+
+        Sem o Tesseract instalado, os documentos são devolvidos sem alteração (com um aviso).
+
+        Args:
+            dpi (int): Resolução da rasterização: 300 é o recomendado para o Tesseract; valores
+                menores aceleram o OCR e perdem precisão em letras pequenas.
+            language (str): Idioma(s) do Tesseract.
+            max_workers (int): Número de processos do pool de OCR (padrão: número de CPUs).
+            min_characters (int): Caracteres visíveis abaixo dos quais a página recebe OCR.
+            command (str): Binário do Tesseract.
+        """
+        self.dpi = dpi
+        self.language = language
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_characters = min_characters
+        self.command = command
+        self.stats = {"documents": 0, "pages": 0, "failed_pages": 0}
+        self._executor = None
+        self._warned = False
+
+    @property
+    def parser(self) -> str:
+        # Identificador das páginas reconhecidas no cache: rasterização do PyMuPDF + versão e parâmetros
+        # do OCR. Não depende do backend de extração nem de `min_characters`, que só decidem quais páginas
+        # são reconhecidas.
+        return f"ocr,{PYMUPDF_PARSER},tesseract={tesseract_version(self.command)},lang={self.language},dpi={self.dpi}"
+
+    def apply(self, pdf_file_path: str, document: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Substitui o texto das páginas vazias do documento pelo texto reconhecido por OCR.
+
+        Args:
+            pdf_file_path (str): Caminho do arquivo PDF de origem do documento.
+            document (Dict[str, Any]): Documento extraído (ex.: saída de `extract_text_pymupdf`).
+
+        Returns:
+            Dict[str, Any]: O mesmo documento, ou uma cópia com o texto das páginas reconhecidas.
+        """
+        texts = _page_texts(document)
+        empty_pages = [page_number for page_number, text in enumerate(texts or []) if is_empty_page(text, self.min_characters)]
+        if not empty_pages:
+            return document
+
+        if tesseract_version(self.command) is None:
+            if not self._warned:
+                print(f"Aviso: Tesseract não encontrado ({self.command}); páginas digitalizadas ficarão sem texto.")
+                self._warned = True
+            return document
+
+        cache = get_pdf_text_cache()
+        file_hash = cache.hash_file(pdf_file_path) if cache else None
+        recognized = {record["metadata"]["page"]: record for record in (cache.get(file_hash, self.parser) or [])} if cache else {}
+
+        missing_pages = [page_number for page_number in empty_pages if page_number not in recognized]
+        if missing_pages:
+            new_records = self._recognize(pdf_file_path, missing_pages)
+            recognized.update(new_records)
+            # Páginas que falharam não entram no cache, para serem tentadas de novo na próxima execução
+            if cache and new_records:
+                cache.put(file_hash, self.parser, [recognized[page_number] for page_number in sorted(recognized)])
+
+        self.stats["documents"] += 1
+        return _with_page_texts(document, [recognized[page_number]["text"] if page_number in recognized and page_number in empty_pages
+                                           else text for page_number, text in enumerate(texts)])
+
+    def _recognize(self, pdf_file_path, empty_pages):
+        # Reconhece as páginas informadas e devolve os registros das que tiveram sucesso, por página
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        tracer = get_tracer()
+        futures = {page_number: self._executor.submit(ocr_page, pdf_file_path, page_number, self.dpi, self.language, self.command)
+                   for page_number in empty_pages}
+
+        records = {}
+        failed_pages = 0
+
+        with tracer.span("ocr", file=os.path.basename(pdf_file_path), pages=len(empty_pages), dpi=self.dpi) as span:
+            for page_number, future in futures.items():
+                try:
+                    text, start_time, duration = future.result()
+                except Exception as e:
+                    failed_pages += 1
+                    print(f"Erro no OCR da página {page_number + 1} de {pdf_file_path}: {str(e)}")
+                    continue
+
+                # O OCR roda em outro processo: registra o span da página com os instantes medidos lá
+                tracer.record("ocr.page", duration, start_time=start_time, page=page_number + 1,
+                              bytes=len(text.encode("utf-8")))
+                records[page_number] = {"text": text, "metadata": {"page": page_number, "ocr": True}}
+
+            span.set(failed_pages=failed_pages)
+
+        self.stats["pages"] += len(records)
+        self.stats["failed_pages"] += failed_pages
+        return records
+
+    def close(self):
+        """
+        Encerra o pool de processos do OCR.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Função para listar os arquivos PDF de um diretório e suas subpastas
+def find_pdf_files(directory: str) -> Iterator[str]:
+    """
+    Percorre o diretório e suas subpastas e gera o caminho de cada arquivo PDF encontrado.
+
+    Args:
+        directory (str): Caminho do diretório que contém os arquivos PDF.
+
+    Yields:
+        str: Caminho de um arquivo PDF.
+    """
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if file.lower().endswith('.pdf'):  # Verifica se o arquivo tem extensão .pdf
+                yield os.path.join(root, file)
+
+# Função para extrair os textos dos PDFs de um diretório em paralelo, à medida que ficam prontos
+def iter_texts_from_directory(directory: str, backend: str = "pymupdf", max_workers: int = None,
+                              max_in_flight: int = None, ocr: Optional[OcrFallback] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Extrai o texto dos PDFs de um diretório usando um pool de processos e gera cada resultado
+    assim que o arquivo termina de ser processado (a ordem de saída não é a ordem do diretório).
+
+    Apenas `max_in_flight` arquivos ficam pendentes ao mesmo tempo, de modo que a memória
+    usada depende do tamanho da janela e não do tamanho do diretório.
+
+    Args:
+        directory (str): Caminho do diretório que contém os arquivos PDF.
+        backend (str): Biblioteca de extração: "pymupdf" (padrão) ou "pypdf" (PyPDFLoader da LangChain).
+        max_workers (int): Número de processos do pool (padrão: número de CPUs).
+        max_in_flight (int): Número máximo de arquivos submetidos e ainda não consumidos (padrão: 2 x max_workers).
+        ocr (OcrFallback): OCR das páginas sem texto embutido (None mantém apenas o texto embutido).
+
+    Yields:
+        Dict[str, Any]: Dicionário contendo o nome do arquivo e o texto extraído.
+    """
+    if backend not in PDF_BACKENDS:
+        raise ValueError(f"Backend de extração inválido: {backend}. Opções: {', '.join(PDF_BACKENDS)}")
+
+    extract_function = PDF_BACKENDS[backend]
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max(max_in_flight or 2 * max_workers, 1)
+
+    pdf_paths = find_pdf_files(directory)
+    tracer = get_tracer()
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+
+        # Preenche a janela inicial de arquivos em processamento
+        for pdf_path in pdf_paths:
+            pending[executor.submit(_extract_with_timing, extract_function, pdf_path)] = pdf_path
+            if len(pending) >= max_in_flight:
+                break
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                pdf_path = pending.pop(future)
+
+                # Repõe a janela com o próximo arquivo do diretório, se houver
+                next_path = next(pdf_paths, None)
+                if next_path is not None:
+                    pending[executor.submit(_extract_with_timing, extract_function, next_path)] = next_path
+
+                try:
+                    document, start_time, duration = future.result()
+
+                except Exception as e:
+                    print(f"Erro ao processar o arquivo {pdf_path}: {str(e)}")
+                    continue
+
+                # A extração roda em outro processo: registra o span com os instantes medidos lá
+                content = document["content_text"]
+                page_texts = document.get("pages") or ([page.page_content for page in content] if isinstance(content, list) else [content])
+                tracer.record("pdf.load", duration, start_time=start_time, file=document["filename"], backend=backend,
+                              pages=len(page_texts), bytes=sum(len(text.encode("utf-8")) for text in page_texts))
+
+                # Páginas digitalizadas passam pelo OCR enquanto o pool de extração segue com os próximos arquivos
+                if ocr is not None:
+                    document = ocr.apply(pdf_path, document)
+                yield document
+
 # Função para processar todos os PDFs em um diretório e extrair seus textos
 def extract_texts_from_directory(directory: str) -> List[Dict[str, Any]]:
     """
@@ -52,18 +355,14 @@ def extract_texts_from_directory(directory: str) -> List[Dict[str, Any]]:
     extracted_texts = []
 
     # Percorre o diretório e subpastas
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.lower().endswith('.pdf'):  # Verifica se o arquivo tem extensão .pdf
-                pdf_path = os.path.join(root, file)
-                
-                # Extrai o texto do PDF utilizando a função de extração
-                try:
-                    extracted_text = extract_text_langchain(pdf_path)
-                    extracted_texts.append(extracted_text)
-                
-                except Exception as e:
-                    print(f"Erro ao processar o arquivo {pdf_path}: {str(e)}")
+    for pdf_path in find_pdf_files(directory):
+        # Extrai o texto do PDF utilizando a função de extração
+        try:
+            extracted_text = extract_text_langchain(pdf_path)
+            extracted_texts.append(extracted_text)
+        
+        except Exception as e:
+            print(f"Erro ao processar o arquivo {pdf_path}: {str(e)}")
     
     return extracted_texts
 
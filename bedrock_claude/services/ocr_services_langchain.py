@@ -1,11 +1,15 @@
 import os
-from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+from .pdf_text_cache import PYPDF_PARSER, get_pdf_text_cache, parse_pypdf_pages
 
 # Função para extrair texto de um arquivo PDF usando LangChain
 def extract_text_langchain(pdf_file_path: str):
     """
     Extrai o texto de um arquivo PDF usando o PyPDFLoader da LangChain.
 
+    O texto de cada página fica no cache em disco (`PDF_TEXT_CACHE_PATH`), indexado pelo hash
+    do conteúdo: um arquivo inalterado não é lido de novo.
+
     Args:
         pdf_file_path (str): Caminho para o arquivo PDF a ser processado.
 
@@ -13,9 +17,10 @@ def extract_text_langchain(pdf_file_path: str):
         Dict[str, Any]: Um dicionário contendo o nome do arquivo e o texto extraído.
     """
     try:
-        # Carrega o PDF usando o PyPDFLoader
-        loader = PyPDFLoader(pdf_file_path)
-        documents = loader.load()
+        # Carrega o PDF usando o PyPDFLoader, consultando antes o cache de texto extraído
+        cache = get_pdf_text_cache()
+        pages = cache.load(pdf_file_path, PYPDF_PARSER, parse_pypdf_pages) if cache else parse_pypdf_pages(pdf_file_path)
+        documents = [Document(page_content=page["text"], metadata={"source": pdf_file_path, **page["metadata"]}) for page in pages]
 
         return {
             "filename": os.path.basename(pdf_file_path),  # Nome do arquivo PDF
@@ -24,4 +29,4 @@ def extract_text_langchain(pdf_file_path: str):
 
     except Exception as e:
         # Captura e trata exceções que possam ocorrer durante o processamento do PDF
-        raise print(status_code=500, detail=f"Erro ao processar o arquivo {pdf_file_path}: {str(e)}")
\ No newline at end of file
+        raise RuntimeError(f"Erro ao processar o arquivo {pdf_file_path}: {str(e)}")
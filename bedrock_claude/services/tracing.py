@@ -0,0 +1,11 @@
+"""
+Rastreamento leve das etapas do resumo de documentos (carga dos PDFs, divisão em janelas,
+montagem do prompt, primeiro token e conclusão do modelo no Bedrock).
+
+A implementação (spans, exportadores, `get_tracer`, `traced`...) é compartilhada com o
+langchain_ollama_rag e fica em rag_common/tracing.py; aqui só se define o nome do tracer no OpenTelemetry.
+"""
+from rag_common.tracing import (EXPORTERS, InMemoryExporter, NoopExporter, OpenTelemetryExporter, Span,
+                                StdoutJsonExporter, Tracer, get_tracer, set_tracer, set_tracer_name, traced)
+
+set_tracer_name("bedrock_claude")
@@ -0,0 +1,151 @@
+import os
+import json
+import threading
+import numpy as np
+
+from bedrock_models.embedding_model import generate_embedding
+
+# Diretório do índice: embarcado no pacote da Lambda ou copiado para /tmp
+LOCAL_INDEX_DIR = os.environ.get("LOCAL_INDEX_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "local_index"))
+
+EMBEDDINGS_FILE = "embeddings.npy"  # Matriz float32 (n_chunks x dimensão), linhas com norma 1
+CHUNKS_FILE = "chunks.json"  # Texto e localização de cada chunk, na mesma ordem das linhas
+
+# --------------------------------------------------------------------
+# Índice vetorial em memória, com busca exata por similaridade de cosseno
+# --------------------------------------------------------------------
+class LocalVectorIndex:
+    def __init__(self, embeddings, chunks):
+        """
+        Índice vetorial local. Como as linhas são normalizadas na construção, a similaridade de
+        cosseno é um único produto matriz-vetor.
+
+        :param embeddings: Matriz float32 (n_chunks x dimensão), possivelmente memory-mapped.
+        :param chunks: Lista de dicionários com 'text', 'location' e 'metadata' de cada chunk.
+        """
+        self.embeddings = embeddings
+        self.chunks = chunks
+
+    @classmethod
+    def load(cls, index_dir=LOCAL_INDEX_DIR):
+        """
+        Carrega o índice do disco. A matriz é aberta com memory-map, então só as páginas
+        tocadas pela busca são lidas.
+
+        :param index_dir: Diretório com os arquivos do índice.
+        :return: Instância de LocalVectorIndex.
+        """
+        embeddings = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode='r')
+        with open(os.path.join(index_dir, CHUNKS_FILE), 'r', encoding='utf-8') as chunks_file:
+            chunks = json.load(chunks_file)
+
+        if len(chunks) != embeddings.shape[0]:
+            raise ValueError(f"Índice inconsistente: {embeddings.shape[0]} vetores e {len(chunks)} chunks")
+
+        return cls(embeddings, chunks)
+
+    @staticmethod
+    def save(index_dir, embeddings, chunks):
+        """
+        Grava o índice no disco, normalizando as linhas da matriz.
+
+        :param index_dir: Diretório de destino.
+        :param embeddings: Vetores dos chunks (n_chunks x dimensão).
+        :param chunks: Lista de dicionários com 'text', 'location' e 'metadata' de cada chunk.
+        """
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, EMBEDDINGS_FILE), matrix)
+        with open(os.path.join(index_dir, CHUNKS_FILE), 'w', encoding='utf-8') as chunks_file:
+            json.dump(chunks, chunks_file, ensure_ascii=False)
+
+    def search(self, query_embedding, number_results=5):
+        """
+        Busca os chunks mais similares ao vetor da consulta.
+
+        :param query_embedding: Embedding da consulta.
+        :param number_results: Número de resultados.
+        :return: Lista de (posição, similaridade), da mais similar para a menos.
+        """
+        query = np.array(query_embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+
+        scores = self.embeddings @ query
+        k = min(number_results, scores.shape[0])
+        if k == 0:
+            return []
+
+        # argpartition seleciona os k maiores em O(n); só eles são ordenados
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(int(position), float(scores[position])) for position in top]
+
+# Índice e cliente do Bedrock Runtime criados uma única vez por container
+_local_index = None
+_local_index_lock = threading.Lock()
+_runtime_client = None
+
+# --------------------------------------------------------------------
+# Função que carrega o índice de forma preguiçosa
+# --------------------------------------------------------------------
+def get_local_index():
+    """
+    Retorna o índice local, carregando-o na primeira chamada do container.
+
+    :return: Instância de LocalVectorIndex.
+    """
+    global _local_index
+    if _local_index is None:
+        with _local_index_lock:
+            if _local_index is None:
+                _local_index = LocalVectorIndex.load()
+    return _local_index
+
+# --------------------------------------------------------------------
+# Função que cria o cliente do Bedrock Runtime de forma preguiçosa
+# --------------------------------------------------------------------
+def get_runtime_client():
+    """
+    Retorna o cliente do Bedrock Runtime usado no embedding das consultas, criando-o na primeira chamada.
+
+    :return: Cliente do Boto3 para 'bedrock-runtime'.
+    """
+    global _runtime_client
+    if _runtime_client is None:
+        with _local_index_lock:
+            if _runtime_client is None:
+                import boto3
+                _runtime_client = boto3.client('bedrock-runtime')
+    return _runtime_client
+
+# --------------------------------------------------------------------
+# Função que busca documentos relevantes no índice local
+# --------------------------------------------------------------------
+def retrieve_chunks(bedrock_agent_client, user_query, number_results=5, knowledge_base_id=None, bedrock_client=None):
+    """
+    Alternativa local a `bedrock_agents.retrieve_chunks.retrieve_chunks`, com a mesma assinatura e
+    o mesmo formato de retorno, sem ida e volta à base de conhecimento: pode substituí-la em
+    `fan_out_retrieve(..., retrieve=retrieve_chunks)`.
+
+    :param bedrock_agent_client: Ignorado (mantido pela compatibilidade de assinatura).
+    :param user_query: Pergunta do usuário.
+    :param number_results: Número de resultados a recuperar.
+    :param knowledge_base_id: Ignorado: o índice é único (`LOCAL_INDEX_DIR`).
+    :param bedrock_client: Cliente do Bedrock Runtime usado no embedding da consulta (padrão: `get_runtime_client()`).
+    :return: Lista de resultados com 'content', 'location', 'metadata' e 'score'.
+    """
+    index = get_local_index()
+    query_embedding = generate_embedding(bedrock_client or get_runtime_client(), user_query)
+
+    return [
+        {
+            'content': {'text': index.chunks[position]['text']},
+            'location': index.chunks[position].get('location'),
+            'metadata': index.chunks[position].get('metadata', {}),
+            'score': score,
+        }
+        for position, score in index.search(query_embedding, number_results)
+    ]
@@ -0,0 +1,120 @@
+import re
+import math
+import unicodedata
+from collections import Counter
+
+# Aproximação usada para estimar tokens a partir do número de caracteres. O pacote da Lambda inclui
+# apenas este diretório, por isso a estimativa e o BM25 abaixo não importam rag_common/ nem o BM25Index
+# do langchain_ollama_rag: mantenha as fórmulas iguais às de lá
+CHARS_PER_TOKEN = 4
+
+# --------------------------------------------------------------------
+# Funções auxiliares de texto
+# --------------------------------------------------------------------
+def estimate_tokens(text):
+    """
+    Estima o número de tokens de um texto a partir do número de caracteres.
+
+    :param text: Texto a medir.
+    :return: Número aproximado de tokens.
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def tokenize(text):
+    """
+    Divide o texto em termos: minúsculas, sem acentos, apenas letras e números.
+
+    :param text: Texto original.
+    :return: Lista de termos.
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    return re.findall(r"[a-z0-9]+", "".join(char for char in text if not unicodedata.combining(char)))
+
+def jaccard_similarity(text_a, text_b, size=5):
+    """
+    Similaridade de Jaccard entre os conjuntos de sequências de `size` termos dos dois textos.
+
+    :return: Valor entre 0 e 1.
+    """
+    def shingles(text):
+        tokens = tokenize(text)
+        return {tuple(tokens[start:start + size]) for start in range(max(len(tokens) - size + 1, 1))}
+
+    shingles_a, shingles_b = shingles(text_a), shingles(text_b)
+    return len(shingles_a & shingles_b) / (len(shingles_a | shingles_b) or 1)
+
+# --------------------------------------------------------------------
+# Pontuador local padrão (BM25 sobre os candidatos)
+# --------------------------------------------------------------------
+def lexical_scorer(user_query, texts, k1=1.5, b=0.75):
+    """
+    Pontua os candidatos com BM25 calculado apenas sobre eles. Qualquer função com a mesma
+    assinatura (pergunta, textos) -> pontuações pode substituí-lo.
+
+    :param user_query: Pergunta do usuário.
+    :param texts: Textos dos candidatos.
+    :return: Pontuação de cada candidato.
+    """
+    documents = [Counter(tokenize(text)) for text in texts]
+    lengths = [sum(document.values()) for document in documents]
+    average_length = (sum(lengths) / len(lengths)) if lengths else 1
+    scores = [0.0] * len(texts)
+
+    for term in set(tokenize(user_query)):
+        document_frequency = sum(1 for document in documents if document[term])
+        if not document_frequency:
+            continue
+
+        idf = math.log(1 + (len(texts) - document_frequency + 0.5) / (document_frequency + 0.5))
+        for position, document in enumerate(documents):
+            frequency = document[term]
+            if frequency:
+                length_norm = 1 - b + b * lengths[position] / (average_length or 1)
+                scores[position] += idf * frequency * (k1 + 1) / (frequency + k1 * length_norm)
+
+    return scores
+
+# --------------------------------------------------------------------
+# Função que deduplica, reordena e empacota os chunks no orçamento de tokens
+# --------------------------------------------------------------------
+def rerank_and_pack(user_query, retrieval_results, token_budget=1500, baseline_k=5, dedupe_threshold=0.8, scorer=lexical_scorer):
+    """
+    Etapa pós-busca: descarta chunks quase duplicados, reordena os demais com um pontuador local
+    e mantém os melhores até esgotar o orçamento de tokens do contexto.
+
+    :param user_query: Pergunta do usuário.
+    :param retrieval_results: Resultados da busca (formato de `retrieve_chunks`), buscados com folga.
+    :param token_budget: Máximo de tokens dos contextos selecionados.
+    :param baseline_k: Número de resultados que seriam usados sem esta etapa (cálculo da economia).
+    :param dedupe_threshold: Similaridade de Jaccard a partir da qual um chunk é descartado.
+    :param scorer: Função (pergunta, textos) -> pontuações.
+    :return: Resultados selecionados e estatísticas de tokens.
+    """
+    texts = [result['content']['text'] for result in retrieval_results]
+    baseline_tokens = sum(estimate_tokens(text) for text in texts[:baseline_k])
+
+    # Mantém apenas o primeiro de cada grupo de chunks quase idênticos
+    candidates = []
+    for result, text in zip(retrieval_results, texts):
+        if all(jaccard_similarity(text, kept['content']['text']) < dedupe_threshold for kept in candidates):
+            candidates.append(result)
+
+    scores = scorer(user_query, [result['content']['text'] for result in candidates]) if candidates else []
+    ranked = sorted(zip(candidates, scores), key=lambda item: item[1], reverse=True)
+
+    selected, used_tokens = [], 0
+    for result, score in ranked:
+        tokens = estimate_tokens(result['content']['text'])
+        if used_tokens + tokens <= token_budget:
+            selected.append({**result, 'rerankScore': score})
+            used_tokens += tokens
+
+    stats = {
+        'candidates': len(retrieval_results),
+        'after_dedupe': len(candidates),
+        'selected': len(selected),
+        'baseline_tokens': baseline_tokens,
+        'packed_tokens': used_tokens,
+        'saved_tokens': baseline_tokens - used_tokens,
+    }
+    return selected, stats
@@ -0,0 +1,157 @@
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from bedrock_agents.retrieve_chunks import retrieve_chunks
+
+# Constante da Reciprocal Rank Fusion (valor usual na literatura)
+RRF_K = 60
+
+# Conexões do pool HTTP de um cliente do Boto3 quando `max_pool_connections` não é configurado
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+
+# Pool de threads reutilizado entre invocações do mesmo container, recriado maior quando o fan-out cresce
+_retrieval_executor = None
+_retrieval_executor_workers = 0
+_retrieval_executor_lock = threading.Lock()
+
+# --------------------------------------------------------------------
+# Função que devolve o pool de threads das buscas
+# --------------------------------------------------------------------
+def get_retrieval_executor(max_workers):
+    """
+    Retorna o pool de threads compartilhado, com pelo menos `max_workers` threads.
+
+    :param max_workers: Número de buscas que precisam rodar ao mesmo tempo.
+    :return: Pool de threads.
+    """
+    global _retrieval_executor, _retrieval_executor_workers
+
+    with _retrieval_executor_lock:
+        if _retrieval_executor is None or _retrieval_executor_workers < max_workers:
+            if _retrieval_executor is not None:
+                # As buscas em andamento no pool antigo terminam normalmente
+                _retrieval_executor.shutdown(wait=False)
+            _retrieval_executor = ThreadPoolExecutor(max_workers=max_workers)
+            _retrieval_executor_workers = max_workers
+
+    return _retrieval_executor
+
+# --------------------------------------------------------------------
+# Função que monta a configuração do cliente usado nas buscas
+# --------------------------------------------------------------------
+def retrieval_client_config(timeout_seconds):
+    """
+    Configuração do Boto3 para o cliente do Bedrock Agent Runtime usado em `fan_out_retrieve`.
+
+    `Future.cancel()` não interrompe uma chamada do Boto3 já iniciada: é o timeout de conexão e de
+    leitura do próprio cliente que encerra uma busca lenta e libera sua thread. Sem nova tentativa,
+    porque uma busca repetida depois do prazo seria descartada de qualquer forma.
+
+    :param timeout_seconds: Tempo máximo de espera por cada busca.
+    :return: botocore.config.Config, para ser combinado (`Config.merge`) com a configuração do cliente.
+    """
+    from botocore.config import Config
+
+    return Config(connect_timeout=timeout_seconds, read_timeout=timeout_seconds,
+                  retries={'max_attempts': 1, 'mode': 'adaptive'})
+
+# --------------------------------------------------------------------
+# Função que calcula a chave de deduplicação de um resultado
+# --------------------------------------------------------------------
+def content_hash(retrieval_result):
+    """
+    Calcula o hash do texto de um resultado, ignorando diferenças de espaços em branco.
+
+    :param retrieval_result: Resultado devolvido por `retrieve_chunks`.
+    :return: Hash hexadecimal do conteúdo.
+    """
+    text = " ".join(retrieval_result['content']['text'].split())
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+# --------------------------------------------------------------------
+# Função que combina várias listas de resultados com Reciprocal Rank Fusion
+# --------------------------------------------------------------------
+def reciprocal_rank_fusion(result_lists, number_results, rrf_k=RRF_K):
+    """
+    Combina listas ordenadas de resultados: cada resultado soma 1 / (rrf_k + posição) em cada
+    lista onde aparece. Resultados com o mesmo conteúdo são tratados como um só.
+
+    :param result_lists: Listas de resultados, cada uma ordenada da mais relevante para a menos.
+    :param number_results: Número de resultados a devolver.
+    :param rrf_k: Constante de suavização da fusão.
+    :return: Resultados combinados, ordenados pela pontuação de fusão (campo 'fusionScore').
+    """
+    fused = {}
+
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            key = content_hash(result)
+            if key not in fused:
+                fused[key] = {**result, 'fusionScore': 0.0}
+            fused[key]['fusionScore'] += 1.0 / (rrf_k + rank)
+
+    return sorted(fused.values(), key=lambda result: result['fusionScore'], reverse=True)[:number_results]
+
+# --------------------------------------------------------------------
+# Função que consulta várias bases e reformulações da pergunta em paralelo
+# --------------------------------------------------------------------
+def fan_out_retrieve(bedrock_agent_client, queries, knowledge_base_ids, number_results=5, timeout_seconds=3.0,
+                     retrieve=retrieve_chunks):
+    """
+    Executa `retrieve_chunks` para cada combinação de pergunta e base de conhecimento ao mesmo
+    tempo e combina os resultados. A latência total fica limitada pela busca mais lenta (ou pelo
+    timeout), e não pela soma das buscas. Buscas que falham ou excedem o timeout são ignoradas.
+
+    O número de buscas simultâneas é limitado pelo pool de conexões do cliente
+    (`max_pool_connections`): as excedentes esperam na fila e, se não começarem antes do prazo,
+    são canceladas. Para que uma busca lenta não continue ocupando uma thread e uma conexão depois
+    do prazo, o cliente deve usar `retrieval_client_config(timeout_seconds)`.
+
+    :param bedrock_agent_client: Cliente do Bedrock Agent Runtime.
+    :param queries: Pergunta do usuário e suas reformulações.
+    :param knowledge_base_ids: IDs das bases de conhecimento consultadas.
+    :param number_results: Número de resultados por busca e após a fusão.
+    :param timeout_seconds: Tempo máximo de espera por cada busca.
+    :param retrieve: Função de busca com a assinatura de `retrieve_chunks` (ex.: a do índice local,
+        `bedrock_agents.local_vector_index.retrieve_chunks`).
+    :return: Resultados combinados e deduplicados, no formato de `retrieve_chunks`.
+    """
+    start_time = time.perf_counter()
+    searches = [(query, knowledge_base_id) for query in queries for knowledge_base_id in knowledge_base_ids]
+
+    # Uma thread por busca, até o limite de conexões do cliente (mais threads só esperariam por uma conexão)
+    client_config = getattr(getattr(bedrock_agent_client, 'meta', None), 'config', None)
+    max_connections = getattr(client_config, 'max_pool_connections', None) or DEFAULT_MAX_POOL_CONNECTIONS
+    max_workers = max(min(len(searches), max_connections), 1)
+    if len(searches) > max_workers:
+        print(f"Fan-out de {len(searches)} buscas maior que o pool de {max_workers} conexões: as excedentes aguardam na fila")
+
+    executor = get_retrieval_executor(max_workers)
+    futures = {
+        executor.submit(retrieve, bedrock_agent_client, query, number_results, knowledge_base_id): (query, knowledge_base_id)
+        for query, knowledge_base_id in searches
+    }
+
+    # Com todas as buscas começando juntas, um único prazo equivale ao timeout de cada uma; as que
+    # ficaram na fila só dispõem do tempo que sobrar
+    done, not_done = wait(futures, timeout=timeout_seconds)
+
+    result_lists = []
+    for future in done:
+        try:
+            result_lists.append(future.result())
+        except Exception as e:
+            print(f"Busca descartada {futures[future]}: {e}")
+
+    for future in not_done:
+        # Só impede o início das buscas ainda na fila: as já iniciadas terminam pelo timeout do cliente
+        future.cancel()
+        print(f"Busca descartada {futures[future]}: timeout de {timeout_seconds} s")
+
+    merged_results = reciprocal_rank_fusion(result_lists, number_results)
+    print(f"Buscas concluídas: {len(result_lists)}/{len(futures)} | resultados combinados: {len(merged_results)} | "
+          f"{(time.perf_counter() - start_time) * 1000:.0f} ms")
+
+    return merged_results
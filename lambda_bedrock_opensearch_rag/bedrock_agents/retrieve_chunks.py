@@ -3,12 +3,13 @@ KNOWLEDGE_BASE_ID = ""  # ID da base de conhecimento (precisa ser preenchido)
 # --------------------------------------------------------------------
 # Função que busca documentos relevantes na base de conhecimento
 # --------------------------------------------------------------------
-def retrieve_chunks(bedrock_agent_client, user_query, number_results=5):
+def retrieve_chunks(bedrock_agent_client, user_query, number_results=5, knowledge_base_id=None):
     """
     Realiza uma consulta para obter os documentos mais relevantes da base de conhecimento.
 
     :param user_query: Pergunta do usuário.
     :param number_results: Número de resultados a recuperar.
+    :param knowledge_base_id: ID da base de conhecimento (padrão: KNOWLEDGE_BASE_ID).
     :return: Resposta com os resultados da busca.
     """
     # O cliente do Bedrock é usado para fazer uma busca semântica na base de conhecimento
@@ -16,7 +17,7 @@ def retrieve_chunks(bedrock_agent_client, user_query, number_results=5):
         retrievalQuery={
             "text": user_query  # Usa o texto do usuário como a consulta de busca
         },
-        knowledgeBaseId=KNOWLEDGE_BASE_ID,  # O ID da base de conhecimento deve ser especificado
+        knowledgeBaseId=knowledge_base_id or KNOWLEDGE_BASE_ID,  # O ID da base de conhecimento deve ser especificado
         retrievalConfiguration={
             "vectorSearchConfiguration": {
                 "numberOfResults": number_results,  # Define o número de resultados a serem retornados
@@ -0,0 +1,132 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+# Caminho do cache em disco (ex.: /tmp/embeddings.sqlite3). Vazio = somente em memória
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", "")
+
+# --------------------------------------------------------------------
+# Função que normaliza o texto antes de calcular a chave do cache
+# --------------------------------------------------------------------
+def normalize_text(text):
+    """
+    Normaliza o texto: forma Unicode NFC, espaços colapsados e sem espaços nas pontas.
+
+    :param text: Texto original.
+    :return: Texto normalizado.
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+# --------------------------------------------------------------------
+# Cache de embeddings: LRU em memória + SQLite opcional em disco
+# --------------------------------------------------------------------
+class EmbeddingCache:
+    def __init__(self, path=None, max_memory_items=10000):
+        """
+        Cache de embeddings indexado por (ID do modelo, papel do texto, hash do texto normalizado).
+        O papel ("query" ou "document") separa os vetores de perguntas e de chunks, para que um
+        texto embeddado em um papel não seja devolvido no outro.
+        Em um container Lambda aquecido o LRU em memória evita chamadas repetidas ao Titan;
+        o SQLite em /tmp (ou em um arquivo local, nos testes) persiste entre reinícios.
+
+        :param path: Caminho do arquivo SQLite. Se vazio, o cache fica apenas em memória.
+        :param max_memory_items: Número máximo de vetores mantidos em memória.
+        """
+        self.max_memory_items = max_memory_items
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+
+        if path:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, model_id TEXT, vector BLOB)")
+            self._connection.commit()
+
+    @staticmethod
+    def make_key(model_id, text, role="query"):
+        """
+        Calcula a chave do cache para o trio (modelo, papel do texto, texto normalizado).
+        """
+        return hashlib.sha256(f"{model_id}\x00{role}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, model_id, text, role="query"):
+        """
+        Busca o embedding de um texto.
+
+        :param model_id: ID do modelo de embedding.
+        :param text: Texto consultado.
+        :param role: Papel do texto ("query" ou "document").
+        :return: Vetor de embedding, ou None se não estiver em cache.
+        """
+        key = self.make_key(model_id, text, role)
+
+        with self._lock:
+            vector = self._memory.get(key)
+
+            if vector is None and self._connection is not None:
+                row = self._connection.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row:
+                    vector = array("f", row[0]).tolist()
+
+            if vector is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._remember(key, vector)
+            return vector
+
+    def put(self, model_id, text, vector, role="query"):
+        """
+        Armazena o embedding de um texto.
+
+        :param model_id: ID do modelo de embedding.
+        :param text: Texto embeddado.
+        :param vector: Vetor de embedding.
+        :param role: Papel do texto ("query" ou "document").
+        :return: O vetor como ficou no cache (arredondado para float32), o mesmo devolvido por `get`.
+        """
+        key = self.make_key(model_id, text, role)
+        packed = array("f", vector)
+        stored_vector = packed.tolist()
+
+        with self._lock:
+            self._remember(key, stored_vector)
+
+            if self._connection is not None:
+                self._connection.execute("INSERT OR REPLACE INTO embeddings (key, model_id, vector) VALUES (?, ?, ?)",
+                                         (key, model_id, packed.tobytes()))
+                self._connection.commit()
+
+        return stored_vector
+
+    def _remember(self, key, vector):
+        # Insere no LRU em memória, descartando o item menos usado quando cheio
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        """
+        Retorna os contadores do cache.
+
+        :return: Dicionário com acertos, falhas, taxa de acerto e itens em memória.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_items": len(self._memory),
+        }
+
+# Cache padrão do container, reutilizado entre invocações
+embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH)
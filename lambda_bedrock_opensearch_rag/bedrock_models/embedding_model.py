@@ -1,18 +1,28 @@
 import json
 
+from bedrock_models.embedding_cache import embedding_cache
+
 # IDs dos modelos usados no processamento
 TITAN_EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v2:0"  # Modelo de embeddings
 
 # --------------------------------------------------------------------
 # Função para gerar embeddings usando o Amazon Titan V2
 # --------------------------------------------------------------------
-def generate_embedding(bedrock_client, user_query):
+def generate_embedding(bedrock_client, user_query, cache=embedding_cache, role="query"):
     """
     Gera o embedding de um texto usando o modelo Titan Embedding.
+    O cache é consultado antes de chamar o modelo.
 
     :param text: Texto a ser embeddado.
+    :param cache: Cache de embeddings (None desativa o cache).
+    :param role: Papel do texto na chave do cache: "query" (perguntas) ou "document" (chunks).
     :return: Vetor de embedding.
     """
+    if cache is not None:
+        cached_embedding = cache.get(TITAN_EMBEDDING_MODEL_ID, user_query, role)
+        if cached_embedding is not None:
+            return cached_embedding
+
     response = bedrock_client.invoke_model(
         modelId=TITAN_EMBEDDING_MODEL_ID,
         accept='application/json',
@@ -20,4 +30,9 @@ def generate_embedding(bedrock_client, user_query):
         body=json.dumps({"inputText": user_query}),
     )
     response_body = json.loads(response['body'].read())
-    return response_body['embedding']
\ No newline at end of file
+
+    if cache is not None:
+        # Devolve o vetor arredondado pelo cache, igual ao que um acerto devolveria
+        return cache.put(TITAN_EMBEDDING_MODEL_ID, user_query, response_body['embedding'], role)
+
+    return response_body['embedding']
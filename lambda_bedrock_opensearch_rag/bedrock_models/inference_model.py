@@ -58,4 +58,31 @@ def invoke_model(bedrock_client, prompt):
     response_body = json.loads(response.get('body').read())
     response_text = response_body.get('content')[0]['text']
 
-    return response_text  # Retorna o texto gerado
\ No newline at end of file
+    return response_text  # Retorna o texto gerado
+
+# --------------------------------------------------------------------
+# Função que invoca o modelo em modo streaming e gera o texto aos poucos
+# --------------------------------------------------------------------
+def invoke_model_stream(bedrock_client, prompt):
+    """
+    Invoca o modelo Bedrock com resposta em streaming.
+
+    :param prompt: O prompt gerado que será enviado ao modelo.
+    :return: Gerador com os trechos de texto, na ordem em que chegam do modelo.
+    """
+    # Invoca o modelo Bedrock com o corpo da requisição gerado
+    response = bedrock_client.invoke_model_with_response_stream(
+        modelId=CLAUDE_MODEL_ID,
+        contentType='application/json',
+        accept='application/json',
+        body=generate_request_body(prompt)  # Gera o corpo da requisição
+    )
+
+    # Lê os eventos do stream e devolve apenas os trechos de texto
+    for event in response.get('body'):
+        if 'chunk' not in event:
+            raise RuntimeError(f"Erro no stream do Bedrock: {event}")
+
+        chunk = json.loads(event['chunk']['bytes'])
+        if chunk['type'] == 'content_block_delta' and chunk['delta']['type'] == 'text_delta':
+            yield chunk['delta']['text']
@@ -0,0 +1,266 @@
+import os
+import time
+import functools
+import threading
+
+# --------------------------------------------------------------------
+# Handler consolidado (substitui as versões lambda_function_v*.py)
+#
+# Nada pesado é importado ou criado no import do módulo: o Boto3, os clientes do Bedrock, o
+# cache de respostas e os módulos do pipeline são carregados na primeira vez que são usados e
+# reutilizados entre invocações do mesmo container. Com `warm_up()` (na fase de init com
+# provisioned concurrency, ou por um evento {"warmup": true}) esse custo sai da primeira consulta.
+# Use local/profile_imports.py para medir o custo de import de cada módulo.
+# --------------------------------------------------------------------
+
+# Bases de conhecimento consultadas em paralelo (separadas por vírgula)
+KNOWLEDGE_BASE_IDS = os.environ.get("KNOWLEDGE_BASE_IDS", "").split(",")
+
+# Origem dos chunks: "knowledge_base" (Bedrock Knowledge Bases) ou "local" (índice embarcado,
+# bedrock_agents/local_vector_index.py, gerado por local/build_local_index.py)
+RETRIEVAL_BACKEND = os.environ.get("RETRIEVAL_BACKEND", "knowledge_base")
+
+# Busca, re-ranking e orçamento de tokens dos contextos no prompt
+RETRIEVAL_TIMEOUT_SECONDS = float(os.environ.get("RETRIEVAL_TIMEOUT_SECONDS", "3"))
+RETRIEVAL_FETCH_K = int(os.environ.get("RETRIEVAL_FETCH_K", "20"))
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "1500"))
+
+# Configuração dos clientes do Boto3: o pool precisa comportar as buscas paralelas do fan-out
+BOTO_MAX_POOL_CONNECTIONS = int(os.environ.get("BOTO_MAX_POOL_CONNECTIONS", "16"))
+BOTO_MAX_ATTEMPTS = int(os.environ.get("BOTO_MAX_ATTEMPTS", "4"))
+BOTO_CONNECT_TIMEOUT = float(os.environ.get("BOTO_CONNECT_TIMEOUT", "2"))
+BOTO_READ_TIMEOUT = float(os.environ.get("BOTO_READ_TIMEOUT", "60"))
+
+# Aquece o container na fase de init: por padrão apenas com provisioned concurrency, em que o
+# init acontece antes da primeira requisição e não soma à sua latência
+WARM_UP_ON_INIT = os.environ.get(
+    "WARM_UP_ON_INIT",
+    "true" if os.environ.get("AWS_LAMBDA_INITIALIZATION_TYPE") == "provisioned-concurrency" else "false",
+).lower() == "true"
+
+# Recursos criados sob demanda e reutilizados entre invocações do mesmo container
+_clients = {}
+_answer_cache = None
+_init_lock = threading.Lock()
+
+# --------------------------------------------------------------------
+# Funções de inicialização preguiçosa
+# --------------------------------------------------------------------
+def get_client(service_name):
+    """
+    Retorna o cliente do Boto3 para o serviço, criando-o apenas na primeira chamada.
+
+    Os clientes usam pool de conexões dimensionado para o fan-out, keep-alive TCP (a conexão TLS
+    é reaproveitada entre invocações do mesmo container) e retries adaptativos, que reduzem a
+    taxa de envio quando o Bedrock devolve throttling.
+
+    :param service_name: Nome do serviço (ex.: 'bedrock-runtime', 'bedrock-agent-runtime').
+    :return: Cliente do Boto3 (thread-safe, compartilhado pelas threads do fan-out).
+    """
+    client = _clients.get(service_name)
+    if client is not None:
+        return client
+
+    with _init_lock:
+        if service_name not in _clients:
+            import boto3
+            from botocore.config import Config
+
+            config = Config(
+                max_pool_connections=BOTO_MAX_POOL_CONNECTIONS,
+                tcp_keepalive=True,
+                connect_timeout=BOTO_CONNECT_TIMEOUT,
+                read_timeout=BOTO_READ_TIMEOUT,
+                retries={'max_attempts': BOTO_MAX_ATTEMPTS, 'mode': 'adaptive'},
+            )
+
+            # As buscas do fan-out são encerradas pelo próprio cliente ao fim do prazo, liberando a thread
+            if service_name == 'bedrock-agent-runtime':
+                from bedrock_agents.retrieval_orchestrator import retrieval_client_config
+                config = config.merge(retrieval_client_config(RETRIEVAL_TIMEOUT_SECONDS))
+
+            _clients[service_name] = boto3.client(service_name, config=config)
+
+    return _clients[service_name]
+
+def get_answer_cache():
+    """
+    Retorna o cache de respostas, criando-o apenas na primeira chamada.
+
+    :return: Cache semântico de respostas (configurado pelas variáveis ANSWER_CACHE_*).
+    """
+    global _answer_cache
+    if _answer_cache is None:
+        with _init_lock:
+            if _answer_cache is None:
+                from response_cache.semantic_cache import build_answer_cache
+                _answer_cache = build_answer_cache()
+    return _answer_cache
+
+def warm_up():
+    """
+    Carrega os módulos do pipeline e cria os clientes e o cache, para que a próxima consulta
+    não pague esse custo. Chamado no init (WARM_UP_ON_INIT) ou por eventos {"warmup": true}.
+
+    :return: Tempo (em milissegundos) de cada etapa do aquecimento.
+    """
+    timings = {}
+
+    def step(name, function):
+        start_time = time.perf_counter()
+        function()
+        timings[name] = (time.perf_counter() - start_time) * 1000
+
+    step('imports', _import_pipeline)
+    step('bedrock_runtime_client', lambda: get_client('bedrock-runtime'))
+    if RETRIEVAL_BACKEND == 'local':
+        from bedrock_agents.local_vector_index import get_local_index
+        step('local_index', get_local_index)
+    else:
+        step('bedrock_agent_client', lambda: get_client('bedrock-agent-runtime'))
+    step('answer_cache', get_answer_cache)
+
+    print(f"Warm-up concluído: {', '.join(f'{name} {ms:.1f} ms' for name, ms in timings.items())}")
+    return timings
+
+def _import_pipeline():
+    # Importa os módulos usados pela consulta completa (os imports seguintes ficam em cache)
+    import bedrock_models.embedding_model
+    import bedrock_models.inference_model
+    import bedrock_agents.retrieval_orchestrator
+    import bedrock_agents.rerank_chunks
+    import prompts.prompts_template
+
+# --------------------------------------------------------------------
+# Etapas da consulta
+# --------------------------------------------------------------------
+def prepare_prompt(user_query, query_variants=()):
+    """
+    Busca os documentos relevantes para a pergunta (e suas reformulações) em todas as bases,
+    seleciona os melhores dentro do orçamento de tokens e monta o prompt.
+
+    :param user_query: Pergunta do usuário.
+    :param query_variants: Reformulações opcionais da pergunta, buscadas em paralelo.
+    :return: Contextos selecionados e prompt montado.
+    """
+    from bedrock_agents.retrieval_orchestrator import fan_out_retrieve
+    from bedrock_agents.rerank_chunks import rerank_and_pack
+    from bedrock_agents.retrieve_chunks import extract_contexts_from_chunks
+    from prompts.prompts_template import create_prompt_template
+
+    queries = [user_query] + list(query_variants)
+    if RETRIEVAL_BACKEND == 'local':
+        # Índice único: uma busca por pergunta, com o embedding gerado pelo cliente do Bedrock Runtime
+        from bedrock_agents.local_vector_index import retrieve_chunks as retrieve_local
+        retrieval_results = fan_out_retrieve(None, queries, [None], number_results=RETRIEVAL_FETCH_K,
+                                             timeout_seconds=RETRIEVAL_TIMEOUT_SECONDS,
+                                             retrieve=functools.partial(retrieve_local, bedrock_client=get_client('bedrock-runtime')))
+    else:
+        retrieval_results = fan_out_retrieve(get_client('bedrock-agent-runtime'), queries, KNOWLEDGE_BASE_IDS,
+                                             number_results=RETRIEVAL_FETCH_K, timeout_seconds=RETRIEVAL_TIMEOUT_SECONDS)
+
+    # Remove quase-duplicatas, reordena e mantém os melhores chunks dentro do orçamento de tokens
+    retrieval_results, pack_stats = rerank_and_pack(user_query, retrieval_results, token_budget=CONTEXT_TOKEN_BUDGET)
+    contexts = extract_contexts_from_chunks(retrieval_results)
+    print(f"Contextos: {pack_stats['selected']}/{pack_stats['candidates']} chunks, {pack_stats['packed_tokens']} tokens")
+
+    return contexts, create_prompt_template(user_query, contexts)
+
+def lookup_answer(user_query):
+    """
+    Gera o embedding da pergunta e consulta o cache de respostas.
+
+    :param user_query: Pergunta do usuário.
+    :return: Embedding da pergunta e resposta em cache (ou None).
+    """
+    from bedrock_models.embedding_model import generate_embedding
+
+    answer_cache = get_answer_cache()
+    query_embedding = generate_embedding(get_client('bedrock-runtime'), user_query)
+    cached_answer = answer_cache.lookup(query_embedding)
+    answer_cache.log_invocation(cached_answer)
+    return query_embedding, cached_answer
+
+# --------------------------------------------------------------------
+# Função Lambda principal (invocação sem streaming)
+# --------------------------------------------------------------------
+def lambda_handler(event, context):
+    """
+    Função Lambda principal que recebe o evento e processa o prompt do usuário.
+
+    :param event: Dados do evento recebido (contendo o prompt e, opcionalmente, 'query_variants').
+                  Um evento {"warmup": true} apenas aquece o container.
+    :param context: Contexto de execução da Lambda.
+    :return: Resposta gerada pelo modelo.
+    """
+    if event.get('warmup'):
+        return {'statusCode': 200, 'body': warm_up()}
+
+    from bedrock_models.inference_model import invoke_model
+
+    user_query = event['prompt']
+    print("Prompt do Usuário:", user_query)
+
+    # Consulta o cache de respostas pelo embedding da pergunta
+    query_embedding, cached_answer = lookup_answer(user_query)
+    if cached_answer:
+        return {'statusCode': 200, 'body': cached_answer['answer']}
+
+    start_time = time.perf_counter()
+
+    # Busca os contextos, monta o prompt e gera a resposta final
+    contexts, prompt = prepare_prompt(user_query, event.get('query_variants', []))
+    generated_text = invoke_model(get_client('bedrock-runtime'), prompt)
+
+    # Armazena a resposta no cache para as próximas perguntas equivalentes
+    get_answer_cache().store(query_embedding, generated_text, contexts, time.perf_counter() - start_time)
+
+    # Retorna a resposta gerada com o código de status 200
+    return {'statusCode': 200, 'body': generated_text}
+
+# --------------------------------------------------------------------
+# Handler em streaming: escreve cada trecho da resposta assim que chega
+# --------------------------------------------------------------------
+def stream_handler(event, context, response_writer):
+    """
+    Processa o prompt do usuário e escreve a resposta aos poucos no writer, compatível com o
+    modo de response streaming da Lambda (qualquer objeto com `write(bytes)` e `close()`).
+
+    :param event: Dados do evento recebido (contendo o prompt e, opcionalmente, 'query_variants').
+    :param context: Contexto de execução da Lambda.
+    :param response_writer: Destino dos trechos da resposta.
+    :return: Texto completo gerado.
+    """
+    from bedrock_models.inference_model import invoke_model_stream
+
+    user_query = event['prompt']
+    print("Prompt do Usuário:", user_query)
+
+    try:
+        # Consulta o cache de respostas pelo embedding da pergunta
+        query_embedding, cached_answer = lookup_answer(user_query)
+        if cached_answer:
+            response_writer.write(cached_answer['answer'].encode('utf-8'))
+            return cached_answer['answer']
+
+        start_time = time.perf_counter()
+        contexts, prompt = prepare_prompt(user_query, event.get('query_variants', []))
+
+        # Escreve cada trecho gerado assim que ele chega do modelo
+        output_parts = []
+        for text_delta in invoke_model_stream(get_client('bedrock-runtime'), prompt):
+            response_writer.write(text_delta.encode('utf-8'))
+            output_parts.append(text_delta)
+
+        generated_text = "".join(output_parts)
+
+        # Armazena a resposta no cache para as próximas perguntas equivalentes
+        get_answer_cache().store(query_embedding, generated_text, contexts, time.perf_counter() - start_time)
+        return generated_text
+
+    finally:
+        response_writer.close()
+
+# Aquecimento na fase de init (provisioned concurrency ou WARM_UP_ON_INIT=true)
+if WARM_UP_ON_INIT:
+    warm_up()
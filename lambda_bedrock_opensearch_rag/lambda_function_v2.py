@@ -1,7 +1,10 @@
 import json
+import time
 import boto3
 
 from prompts.prompts_template import get_prompt
+from bedrock_models.embedding_model import generate_embedding
+from response_cache.semantic_cache import build_answer_cache
 
 # Inicializa o cliente do Bedrock Agent para consultar e gerar respostas
 bedrock_agent_client = boto3.client('bedrock-agent-runtime')
@@ -12,6 +15,9 @@ CLAUDE_MODEL_ID = "anthropic.claude-3-5-sonnet-20240620-v1:0"  # Modelo de gera
 TITAN_EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v2:0"  # Modelo de embeddings (não utilizado aqui)
 KNOWLEDGE_BASE_ID = ""  # ID da base de conhecimento a ser definida
 
+# Cache de respostas reutilizado entre invocações do mesmo container
+answer_cache = build_answer_cache()
+
 # --------------------------------------------------------------------
 # Função para gerar uma resposta utilizando RAG (retrieval and generation)
 # --------------------------------------------------------------------
@@ -84,15 +90,28 @@ def lambda_handler(event, context):
     user_query = event['prompt']  # Extrai o prompt do evento
     print("Prompt do Usuário:", user_query)
 
+    # Consulta o cache de respostas pelo embedding da pergunta
+    query_embedding = generate_embedding(bedrock_client, user_query)
+    cached_answer = answer_cache.lookup(query_embedding)
+    answer_cache.log_invocation(cached_answer)
+
+    if cached_answer:
+        return {'statusCode': 200, 'body': cached_answer['answer']}
+
+    start_time = time.perf_counter()
+
     # Gera a resposta com base no prompt do usuário
     response = generate_response_with_RAG(user_query, num_results=5)
 
     # Extrai os contextos das citações
     contexts = extract_citations_and_contexts(response)
-    print(f"Contextos extraídos: {contexts}")
+    print(f"Contextos extraídos: {len(contexts)} ({sum(len(text) for text in contexts)} caracteres)")
     
     # Extrai o texto gerado da resposta
     generated_text = response["output"]["text"]
 
+    # Armazena a resposta no cache para as próximas perguntas equivalentes
+    answer_cache.store(query_embedding, generated_text, contexts, time.perf_counter() - start_time)
+
     # Retorna a resposta gerada com o código de status 200
     return {'statusCode': 200, 'body': generated_text}
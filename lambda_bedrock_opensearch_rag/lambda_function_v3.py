@@ -1,8 +1,11 @@
 import json
+import time
 import boto3
 
 from prompts.prompts_template import create_prompt_template
 from bedrock_models.inference_model import invoke_model
+from bedrock_models.embedding_model import generate_embedding
+from response_cache.semantic_cache import build_answer_cache
 from bedrock_agents.retrieve_chunks import retrieve_chunks, extract_contexts_from_chunks
 
 # Inicializa o cliente do Bedrock Agent para consultar e gerar respostas
@@ -14,6 +17,9 @@ CLAUDE_MODEL_ID = "anthropic.claude-3-5-sonnet-20240620-v1:0"  # ID do modelo Cl
 TITAN_EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v2:0"  # Modelo de embeddings (não usado neste caso)
 KNOWLEDGE_BASE_ID = ""  # ID da base de conhecimento (precisa ser preenchido)
 
+# Cache de respostas reutilizado entre invocações do mesmo container
+answer_cache = build_answer_cache()
+
 # --------------------------------------------------------------------
 # Função Lambda principal que processa o evento recebido
 # --------------------------------------------------------------------
@@ -29,6 +35,16 @@ def lambda_handler(event, context):
     user_query = event['prompt']  # Extrai o prompt do evento
     print("Prompt do Usuário:", user_query)
 
+    # Consulta o cache de respostas pelo embedding da pergunta
+    query_embedding = generate_embedding(bedrock_client, user_query)
+    cached_answer = answer_cache.lookup(query_embedding)
+    answer_cache.log_invocation(cached_answer)
+
+    if cached_answer:
+        return {'statusCode': 200, 'body': cached_answer['answer']}
+
+    start_time = time.perf_counter()
+
     # Busca documentos relevantes
     search_response = retrieve_chunks(bedrock_agent_client, user_query)  # Chama a função para buscar documentos relevantes
 
@@ -36,13 +52,16 @@ def lambda_handler(event, context):
     contexts = extract_contexts_from_chunks(search_response)  # Extrai os textos dos documentos recuperados
     
     # Exibe os resultados da busca no log para depuração
-    print("Contexto extraído:", contexts)
+    print(f"Contextos extraídos: {len(contexts)} ({sum(len(text) for text in contexts)} caracteres)")
 
     # Gera o prompt com os contextos extraídos e a pergunta do usuário
-    prompt = create_prompt_template(user_query, context)
+    prompt = create_prompt_template(user_query, contexts)
 
     # Invoca o modelo para gerar o texto com base no prompt
     generated_text = invoke_model(bedrock_client, prompt)
 
+    # Armazena a resposta no cache para as próximas perguntas equivalentes
+    answer_cache.store(query_embedding, generated_text, contexts, time.perf_counter() - start_time)
+
     # Retorna a resposta gerada com o código de status 200
     return {'statusCode': 200, 'body': generated_text}
\ No newline at end of file
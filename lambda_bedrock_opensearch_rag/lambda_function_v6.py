@@ -1,20 +1,36 @@
+import os
 import json
+import time
 import boto3
 
 from prompts.prompts_template import create_prompt_template
 from bedrock_models.inference_model import invoke_model
 from bedrock_models.embedding_model import generate_embedding
-from bedrock_agents.retrieve_chunks import retrieve_chunks, extract_contexts_from_chunks
-
-# Inicializa o cliente do Bedrock Agent e Bedrock Runtime
-bedrock_agent_client = boto3.client('bedrock-agent-runtime')
-bedrock_client = boto3.client('bedrock-runtime')
+from bedrock_agents.retrieve_chunks import extract_contexts_from_chunks
+from bedrock_agents.retrieval_orchestrator import fan_out_retrieve, retrieval_client_config
+from bedrock_agents.rerank_chunks import rerank_and_pack
+from response_cache.semantic_cache import build_answer_cache
 
 # IDs dos modelos usados no processamento
 CLAUDE_MODEL_ID = "anthropic.claude-3-5-sonnet-20240620-v1:0"  # Modelo de geração de texto
 TITAN_EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v2:0"  # Modelo de embeddings (não utilizado aqui)
 KNOWLEDGE_BASE_ID = ""  # ID da base de conhecimento a ser definida
 
+# Bases de conhecimento consultadas em paralelo (separadas por vírgula) e timeout de cada busca
+KNOWLEDGE_BASE_IDS = os.environ.get("KNOWLEDGE_BASE_IDS", KNOWLEDGE_BASE_ID).split(",")
+RETRIEVAL_TIMEOUT_SECONDS = float(os.environ.get("RETRIEVAL_TIMEOUT_SECONDS", "3"))
+
+# Inicializa o cliente do Bedrock Agent (com o timeout das buscas) e Bedrock Runtime
+bedrock_agent_client = boto3.client('bedrock-agent-runtime', config=retrieval_client_config(RETRIEVAL_TIMEOUT_SECONDS))
+bedrock_client = boto3.client('bedrock-runtime')
+
+# Candidatos buscados antes do re-ranking e orçamento de tokens dos contextos no prompt
+RETRIEVAL_FETCH_K = int(os.environ.get("RETRIEVAL_FETCH_K", "20"))
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "1500"))
+
+# Cache de respostas reutilizado entre invocações do mesmo container
+answer_cache = build_answer_cache()
+
 # --------------------------------------------------------------------
 # Função Lambda principal que processa o evento recebido
 # --------------------------------------------------------------------
@@ -33,13 +49,28 @@ def lambda_handler(event, context):
     # Gera o embedding da consulta do usuário
     query_embedding = generate_embedding(bedrock_client, user_query)
 
-    # Busca documentos relevantes
-    retrieval_results = retrieve_chunks(query_embedding)
-    print("Documentos Relevantes:", retrieval_results)
+    # Consulta o cache de respostas pelo embedding da pergunta
+    cached_answer = answer_cache.lookup(query_embedding)
+    answer_cache.log_invocation(cached_answer)
+
+    if cached_answer:
+        return {'statusCode': 200, 'body': cached_answer['answer']}
+
+    start_time = time.perf_counter()
+
+    # Busca documentos relevantes para a pergunta e suas reformulações, em todas as bases, ao mesmo tempo
+    queries = [user_query] + event.get('query_variants', [])
+    retrieval_results = fan_out_retrieve(bedrock_agent_client, queries, KNOWLEDGE_BASE_IDS, number_results=RETRIEVAL_FETCH_K,
+                                         timeout_seconds=RETRIEVAL_TIMEOUT_SECONDS)
+
+    # Remove quase-duplicatas, reordena e mantém os melhores chunks dentro do orçamento de tokens
+    retrieval_results, pack_stats = rerank_and_pack(user_query, retrieval_results, token_budget=CONTEXT_TOKEN_BUDGET)
+    print(f"Contextos: {pack_stats['selected']}/{pack_stats['candidates']} chunks, {pack_stats['packed_tokens']} tokens "
+          f"({pack_stats['saved_tokens']} tokens economizados em relação ao top-5)")
 
     # Concatena os documentos relevantes em um único contexto
     contexts = extract_contexts_from_chunks(retrieval_results)
-    print("Contextos extraídos:", contexts)
+    print(f"Contextos extraídos: {len(contexts)} ({sum(len(text) for text in contexts)} caracteres)")
 
     # Constrói o prompt com base nos contextos
     prompt = create_prompt_template(user_query, contexts)
@@ -47,5 +78,8 @@ def lambda_handler(event, context):
     # Gera a resposta final
     generated_text = invoke_model(bedrock_client, prompt)
 
+    # Armazena a resposta no cache para as próximas perguntas equivalentes
+    answer_cache.store(query_embedding, generated_text, contexts, time.perf_counter() - start_time)
+
     # Retorna a resposta gerada com o código de status 200
     return {'statusCode': 200, 'body': generated_text}
\ No newline at end of file
@@ -0,0 +1,104 @@
+import io
+import time
+import boto3
+
+from prompts.prompts_template import create_prompt_template
+from bedrock_models.inference_model import invoke_model_stream
+from bedrock_models.embedding_model import generate_embedding
+from bedrock_agents.retrieve_chunks import retrieve_chunks, extract_contexts_from_chunks
+from response_cache.semantic_cache import build_answer_cache
+
+# Inicializa o cliente do Bedrock Agent e Bedrock Runtime
+bedrock_agent_client = boto3.client('bedrock-agent-runtime')
+bedrock_client = boto3.client('bedrock-runtime')
+
+# Cache de respostas reutilizado entre invocações do mesmo container
+answer_cache = build_answer_cache()
+
+# --------------------------------------------------------------------
+# Writer que acumula a resposta em memória (invocação sem streaming)
+# --------------------------------------------------------------------
+class BufferedResponseWriter:
+    def __init__(self):
+        """
+        Implementa a mesma interface dos writers de streaming (`write` e `close`), mas apenas
+        acumula os bytes para devolvê-los de uma vez no corpo da resposta.
+        """
+        self._buffer = io.BytesIO()
+        self.closed = False
+
+    def write(self, data):
+        self._buffer.write(data)
+
+    def close(self):
+        self.closed = True
+
+    def getvalue(self):
+        return self._buffer.getvalue().decode('utf-8')
+
+# --------------------------------------------------------------------
+# Handler em streaming: escreve cada trecho da resposta assim que chega
+# --------------------------------------------------------------------
+def stream_handler(event, context, response_writer):
+    """
+    Processa o prompt do usuário e escreve a resposta aos poucos no writer, compatível com o
+    modo de response streaming da Lambda (qualquer objeto com `write(bytes)` e `close()`).
+
+    :param event: Dados do evento recebido (contendo o prompt).
+    :param context: Contexto de execução da Lambda.
+    :param response_writer: Destino dos trechos da resposta.
+    :return: Texto completo gerado.
+    """
+    user_query = event['prompt']
+    print("Prompt do Usuário:", user_query)
+
+    try:
+        # Consulta o cache de respostas pelo embedding da pergunta
+        query_embedding = generate_embedding(bedrock_client, user_query)
+        cached_answer = answer_cache.lookup(query_embedding)
+        answer_cache.log_invocation(cached_answer)
+
+        if cached_answer:
+            response_writer.write(cached_answer['answer'].encode('utf-8'))
+            return cached_answer['answer']
+
+        start_time = time.perf_counter()
+
+        # Busca documentos relevantes e monta o prompt
+        retrieval_results = retrieve_chunks(bedrock_agent_client, user_query)
+        contexts = extract_contexts_from_chunks(retrieval_results)
+        print(f"Contextos extraídos: {len(contexts)}")
+        prompt = create_prompt_template(user_query, contexts)
+
+        # Escreve cada trecho gerado assim que ele chega do modelo
+        output_parts = []
+        for text_delta in invoke_model_stream(bedrock_client, prompt):
+            response_writer.write(text_delta.encode('utf-8'))
+            output_parts.append(text_delta)
+
+        generated_text = "".join(output_parts)
+
+        # Armazena a resposta no cache para as próximas perguntas equivalentes
+        answer_cache.store(query_embedding, generated_text, contexts, time.perf_counter() - start_time)
+        return generated_text
+
+    finally:
+        response_writer.close()
+
+# --------------------------------------------------------------------
+# Função Lambda principal (invocação sem streaming)
+# --------------------------------------------------------------------
+def lambda_handler(event, context):
+    """
+    Função Lambda principal que recebe o evento e processa o prompt do usuário. Usa o mesmo
+    fluxo do handler em streaming, acumulando a resposta para devolvê-la de uma vez.
+
+    :param event: Dados do evento recebido (contendo o prompt).
+    :param context: Contexto de execução da Lambda.
+    :return: Resposta gerada pelo modelo.
+    """
+    response_writer = BufferedResponseWriter()
+    stream_handler(event, context, response_writer)
+
+    # Retorna a resposta gerada com o código de status 200
+    return {'statusCode': 200, 'body': response_writer.getvalue()}
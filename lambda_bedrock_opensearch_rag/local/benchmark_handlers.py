@@ -0,0 +1,211 @@
+"""
+Benchmark offline dos handlers da Lambda com clientes do Bedrock simulados (sem rede e sem
+credenciais). Mede a latência de cada etapa (embedding, busca, re-ranking, montagem do prompt e
+geração), a latência total por handler e o pico de memória (RSS), e salva/compara baselines em JSON.
+
+Uso (a partir de lambda_bedrock_opensearch_rag/):
+    python -m local.benchmark_handlers --queries 50 --save-baseline baseline.json
+    python -m local.benchmark_handlers --queries 50 --compare baseline.json --tolerance 0.1
+"""
+import io
+import os
+import sys
+import json
+import time
+import inspect
+import argparse
+import contextlib
+
+# O Boto3 exige uma região para criar os clientes no import dos handlers
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+# Estatísticas e comparação de baselines compartilhadas com o langchain_ollama_rag (rag_common/, na raiz do repositório)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from rag_common.bench_stats import compare_reports, peak_rss_mb, summarize
+import lambda_function_v3
+import lambda_function_v6
+import lambda_function_v7
+from local.stub_bedrock import StubBedrockRuntimeClient, StubBedrockAgentClient
+from response_cache.semantic_cache import SemanticAnswerCache, InMemoryCacheBackend
+
+# Funções de cada handler cronometradas como etapas (atributo do módulo -> nome da etapa)
+HANDLER_STAGES = {
+    'v3': (lambda_function_v3, 'lambda_handler', {
+        'generate_embedding': 'embed', 'retrieve_chunks': 'retrieve',
+        'create_prompt_template': 'prompt_build', 'invoke_model': 'generate',
+    }),
+    'v6': (lambda_function_v6, 'lambda_handler', {
+        'generate_embedding': 'embed', 'fan_out_retrieve': 'retrieve', 'rerank_and_pack': 'rerank',
+        'create_prompt_template': 'prompt_build', 'invoke_model': 'generate',
+    }),
+    'v7': (lambda_function_v7, 'stream_handler', {
+        'generate_embedding': 'embed', 'retrieve_chunks': 'retrieve',
+        'create_prompt_template': 'prompt_build', 'invoke_model_stream': 'generate',
+    }),
+}
+
+# Métricas em que um valor maior é melhor (as demais são latências e memória)
+HIGHER_IS_BETTER = ('throughput',)
+
+# --------------------------------------------------------------------
+# Funções auxiliares de medição
+# --------------------------------------------------------------------
+def timed(function, stage, timings):
+    """
+    Envolve uma função registrando a duração de cada chamada em `timings[stage]`. Para
+    geradores (streaming), registra também o tempo até o primeiro item em `<stage>_first_token`.
+
+    :param function: Função original.
+    :param stage: Nome da etapa.
+    :param timings: Dicionário etapa -> lista de durações.
+    :return: Função cronometrada.
+    """
+    def wrapper(*args, **kwargs):
+        start_time = time.perf_counter()
+        result = function(*args, **kwargs)
+
+        if not inspect.isgenerator(result):
+            timings.setdefault(stage, []).append(time.perf_counter() - start_time)
+            return result
+
+        def stream():
+            first = True
+            for item in result:
+                if first:
+                    timings.setdefault(f"{stage}_first_token", []).append(time.perf_counter() - start_time)
+                    first = False
+                yield item
+            timings.setdefault(stage, []).append(time.perf_counter() - start_time)
+
+        return stream()
+
+    return wrapper
+
+class NullResponseWriter:
+    # Writer de streaming que apenas descarta os dados
+    def write(self, data):
+        pass
+
+    def close(self):
+        pass
+
+# --------------------------------------------------------------------
+# Função que executa um handler e coleta as latências de cada etapa
+# --------------------------------------------------------------------
+def benchmark_handler(name, queries, runtime_client, agent_client):
+    """
+    Executa um handler para cada pergunta, com as funções das etapas cronometradas.
+
+    :param name: Chave do handler em HANDLER_STAGES.
+    :param queries: Perguntas enviadas ao handler.
+    :param runtime_client: Cliente `bedrock-runtime` simulado.
+    :param agent_client: Cliente `bedrock-agent-runtime` simulado.
+    :return: Resumo das latências por etapa e vazão do handler.
+    """
+    module, handler_name, stages = HANDLER_STAGES[name]
+    timings = {}
+    originals = {attribute: getattr(module, attribute) for attribute in stages}
+    original_clients = (module.bedrock_client, module.bedrock_agent_client, module.answer_cache)
+
+    try:
+        for attribute, stage in stages.items():
+            setattr(module, attribute, timed(originals[attribute], stage, timings))
+
+        # Clientes simulados e cache de respostas vazio, para medir sempre o caminho completo
+        module.bedrock_client = runtime_client
+        module.bedrock_agent_client = agent_client
+        module.answer_cache = SemanticAnswerCache(InMemoryCacheBackend())
+
+        handler = getattr(module, handler_name)
+        start_time = time.perf_counter()
+
+        for query in queries:
+            query_start = time.perf_counter()
+
+            # Os handlers registram prompts e contextos no log; descarta para não distorcer as medições
+            with contextlib.redirect_stdout(io.StringIO()):
+                if handler_name == 'stream_handler':
+                    handler({'prompt': query}, None, NullResponseWriter())
+                else:
+                    handler({'prompt': query}, None)
+
+            timings.setdefault('total', []).append(time.perf_counter() - query_start)
+
+        elapsed = time.perf_counter() - start_time
+    finally:
+        for attribute, function in originals.items():
+            setattr(module, attribute, function)
+        module.bedrock_client, module.bedrock_agent_client, module.answer_cache = original_clients
+
+    return {
+        'throughput_qps': len(queries) / elapsed if elapsed else 0.0,
+        'stages': {stage: summarize(samples) for stage, samples in timings.items()},
+    }
+
+# --------------------------------------------------------------------
+# Função que executa o benchmark completo
+# --------------------------------------------------------------------
+def run(args):
+    """
+    Executa o benchmark de todos os handlers selecionados e monta o relatório.
+
+    :param args: Argumentos da linha de comando.
+    :return: Relatório com a configuração e os resultados.
+    """
+    runtime_client = StubBedrockRuntimeClient(" ".join(["palavra"] * args.answer_tokens), args.first_token_delay,
+                                              args.token_delay, args.embedding_delay)
+    agent_client = StubBedrockAgentClient(
+        [f"Trecho {index} da base de conhecimento sobre as regras do jogo, cartas, rodadas e pontuação." * 4 for index in range(args.documents)],
+        args.retrieve_delay,
+    )
+
+    results = {}
+    for name in args.handlers:
+        # Perguntas distintas por handler, para não acertar o cache de embeddings do processo
+        queries = [f"Pergunta de benchmark número {index} ({name}) sobre as regras do jogo?" for index in range(args.queries)]
+        results[name] = benchmark_handler(name, queries, runtime_client, agent_client)
+
+        total = results[name]['stages']['total']
+        print(f"{name}: {results[name]['throughput_qps']:.2f} consultas/s | total p50 {total['p50_ms']:.1f} ms | p95 {total['p95_ms']:.1f} ms")
+        for stage, summary in results[name]['stages'].items():
+            if stage != 'total':
+                print(f"    {stage:<22} p50 {summary['p50_ms']:8.2f} ms | p95 {summary['p95_ms']:8.2f} ms | p99 {summary['p99_ms']:8.2f} ms")
+
+    results['peak_rss_mb'] = peak_rss_mb()
+    print(f"Pico de memória (RSS): {results['peak_rss_mb']:.1f} MB")
+
+    config = {key: value for key, value in vars(args).items() if key not in ('save_baseline', 'compare', 'tolerance')}
+    return {'config': config, 'results': results}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--handlers', nargs='+', choices=sorted(HANDLER_STAGES), default=sorted(HANDLER_STAGES))
+    parser.add_argument('--queries', type=int, default=30)
+    parser.add_argument('--documents', type=int, default=20, help="Chunks disponíveis na base de conhecimento simulada")
+    parser.add_argument('--answer-tokens', type=int, default=100)
+    parser.add_argument('--embedding-delay', type=float, default=0.02)
+    parser.add_argument('--retrieve-delay', type=float, default=0.05)
+    parser.add_argument('--first-token-delay', type=float, default=0.1)
+    parser.add_argument('--token-delay', type=float, default=0.001)
+    parser.add_argument('--save-baseline', help="Salva o relatório em JSON neste caminho")
+    parser.add_argument('--compare', help="Compara com uma baseline salva; sai com código 1 se houver regressão")
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    args = parser.parse_args()
+
+    report = run(args)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline salva em {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+        if baseline['config'] != report['config']:
+            print("Aviso: a configuração da baseline difere da execução atual; as métricas podem não ser comparáveis.")
+
+        if compare_reports(baseline, report, args.tolerance, HIGHER_IS_BETTER, width=40):
+            sys.exit(1)
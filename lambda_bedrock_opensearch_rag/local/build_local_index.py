@@ -0,0 +1,52 @@
+"""
+Constrói offline o índice vetorial local (bedrock_agents/local_vector_index.py) a partir de
+um arquivo JSONL de chunks, gerando os embeddings com o Amazon Titan V2.
+
+Cada linha do JSONL deve conter "text" e, opcionalmente, "location" e "metadata".
+
+Uso (a partir de lambda_bedrock_opensearch_rag/):
+    python -m local.build_local_index chunks.jsonl --output local_index
+"""
+import json
+import argparse
+import boto3
+
+from bedrock_models.embedding_model import generate_embedding
+from bedrock_agents.local_vector_index import LocalVectorIndex, LOCAL_INDEX_DIR
+
+# --------------------------------------------------------------------
+# Função que lê os chunks e grava o índice
+# --------------------------------------------------------------------
+def build_index(chunks_path, output_dir, region_name):
+    """
+    Gera os embeddings de todos os chunks e grava a matriz e os metadados do índice.
+
+    :param chunks_path: Caminho do arquivo JSONL de chunks.
+    :param output_dir: Diretório de saída do índice.
+    :param region_name: Região do Bedrock.
+    """
+    bedrock_client = boto3.client('bedrock-runtime', region_name=region_name)
+
+    with open(chunks_path, 'r', encoding='utf-8') as chunks_file:
+        chunks = [json.loads(line) for line in chunks_file if line.strip()]
+
+    embeddings = []
+    for position, chunk in enumerate(chunks, start=1):
+        embeddings.append(generate_embedding(bedrock_client, chunk['text'], role='document'))
+        if position % 100 == 0:
+            print(f"{position}/{len(chunks)} chunks embeddados")
+
+    LocalVectorIndex.save(output_dir, embeddings, [
+        {'text': chunk['text'], 'location': chunk.get('location'), 'metadata': chunk.get('metadata', {})}
+        for chunk in chunks
+    ])
+    print(f"Índice gravado em {output_dir}: {len(chunks)} chunks")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('chunks_path')
+    parser.add_argument('--output', default=LOCAL_INDEX_DIR)
+    parser.add_argument('--region', default='us-east-1')
+    args = parser.parse_args()
+
+    build_index(args.chunks_path, args.output, args.region)
@@ -0,0 +1,132 @@
+"""
+Perfil do custo de import dos handlers (parte do cold start da Lambda), usando `python -X importtime`.
+
+Cada módulo é importado em um processo novo, várias vezes, e o relatório mostra o tempo total
+do import (mediana), os pacotes de primeiro nível mais caros e, com --warm-up, o tempo de
+`warm_up()` do handler consolidado (criação dos clientes e do cache), que é o custo deslocado
+do import para a primeira consulta ou para a fase de init.
+
+Uso (a partir de lambda_bedrock_opensearch_rag/):
+    python -m local.profile_imports
+    python -m local.profile_imports --modules lambda_function lambda_function_v6 --runs 5 --top 10 --warm-up
+    python -m local.profile_imports --output imports.json
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Linha do -X importtime: "import time:  self [us] |  cumulative | <indentação>pacote"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# --------------------------------------------------------------------
+# Funções de medição
+# --------------------------------------------------------------------
+def run_importtime(code):
+    """
+    Executa um trecho de código em um processo novo com -X importtime.
+
+    :param code: Código Python a executar (ex.: "import lambda_function").
+    :return: Lista de (self_us, cumulative_us, profundidade, pacote) e a saída padrão do processo.
+    """
+    env = {**os.environ, 'AWS_DEFAULT_REGION': os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'), 'PYTHONDONTWRITEBYTECODE': '1'}
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=PROJECT_ROOT, env=env,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Falha ao executar {code!r}:\n{completed.stderr[-2000:]}")
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, package = match.groups()
+            entries.append((int(self_us), int(cumulative_us), len(indent) // 2, package))
+    return entries, completed.stdout
+
+def profile_module(module_name, runs, top):
+    """
+    Mede o import de um módulo em `runs` processos novos.
+
+    :param module_name: Módulo a importar.
+    :param runs: Número de repetições (o relatório usa a mediana).
+    :param top: Número de pacotes listados.
+    :return: Tempo total do import e pacotes mais caros, em milissegundos.
+    """
+    totals, by_package = [], {}
+
+    for _ in range(runs):
+        entries, _stdout = run_importtime(f"import {module_name}")
+        totals.append(sum(cumulative for _self, cumulative, depth, _package in entries if depth == 0) / 1000)
+
+        # Pacotes importados diretamente pelo módulo (nível 1) e os demais de primeiro nível
+        for _self, cumulative, depth, package in entries:
+            if depth <= 1 and package != module_name:
+                by_package.setdefault(package, []).append(cumulative / 1000)
+
+    heaviest = sorted(((package, statistics.median(samples)) for package, samples in by_package.items()),
+                      key=lambda item: item[1], reverse=True)[:top]
+    return {'total_ms': statistics.median(totals), 'top_packages_ms': dict(heaviest)}
+
+def profile_warm_up(runs):
+    """
+    Mede `lambda_function.warm_up()` (imports do pipeline, clientes e cache) em processos novos.
+
+    :param runs: Número de repetições.
+    :return: Mediana do tempo de cada etapa do aquecimento, em milissegundos.
+    """
+    samples = {}
+    code = "import json, lambda_function; print(json.dumps(lambda_function.warm_up()))"
+
+    for _ in range(runs):
+        _entries, stdout = run_importtime(code)
+        for name, milliseconds in json.loads(stdout.strip().splitlines()[-1]).items():
+            samples.setdefault(name, []).append(milliseconds)
+
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+# --------------------------------------------------------------------
+# Função principal
+# --------------------------------------------------------------------
+def main(args):
+    """
+    Mede os módulos informados e imprime o relatório.
+
+    :param args: Argumentos da linha de comando.
+    :return: Relatório com o custo de import de cada módulo.
+    """
+    report = {}
+
+    for module_name in args.modules:
+        report[module_name] = profile_module(module_name, args.runs, args.top)
+        print(f"{module_name}: import {report[module_name]['total_ms']:.1f} ms (mediana de {args.runs})")
+        for package, milliseconds in report[module_name]['top_packages_ms'].items():
+            print(f"    {package:<45} {milliseconds:8.1f} ms")
+
+    if args.warm_up:
+        report['lambda_function.warm_up'] = profile_warm_up(args.runs)
+        print("lambda_function.warm_up():")
+        for name, milliseconds in report['lambda_function.warm_up'].items():
+            print(f"    {name:<45} {milliseconds:8.1f} ms")
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=['lambda_function', 'lambda_function_v6', 'lambda_function_v7'])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=8)
+    parser.add_argument('--warm-up', action='store_true', help="Mede também lambda_function.warm_up()")
+    parser.add_argument('--output', help="Salva o relatório em JSON neste caminho")
+    args = parser.parse_args()
+
+    report = main(args)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"Relatório salvo em {args.output}")
@@ -0,0 +1,72 @@
+"""
+Harness local para medir o tempo até o primeiro byte (TTFB) do handler em streaming,
+usando clientes do Bedrock simulados (sem rede e sem credenciais).
+
+Uso (a partir de lambda_bedrock_opensearch_rag/):
+    python -m local.stream_harness --first-token-delay 0.5 --token-delay 0.02
+"""
+import os
+import time
+import argparse
+
+# O Boto3 exige uma região para criar os clientes no import dos handlers
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+import lambda_function_v7
+from local.stub_bedrock import StubBedrockRuntimeClient, StubBedrockAgentClient
+
+# --------------------------------------------------------------------
+# Writer que registra o instante de cada escrita
+# --------------------------------------------------------------------
+class TimingResponseWriter:
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.write_times = []
+        self.chunks = []
+
+    def write(self, data):
+        self.write_times.append(time.perf_counter() - self.start_time)
+        self.chunks.append(data)
+
+    def close(self):
+        self.total_time = time.perf_counter() - self.start_time
+
+# --------------------------------------------------------------------
+# Função que executa o handler em streaming e o handler com buffer
+# --------------------------------------------------------------------
+def run(prompt, answer, first_token_delay, token_delay, runs):
+    """
+    Executa os dois modos do handler e imprime TTFB e tempo total de cada um.
+
+    :param prompt: Pergunta enviada ao handler.
+    :param answer: Texto devolvido pelo modelo simulado.
+    :param first_token_delay: Atraso simulado até o primeiro token.
+    :param token_delay: Atraso simulado entre tokens.
+    :param runs: Número de execuções de cada modo.
+    """
+    lambda_function_v7.bedrock_client = StubBedrockRuntimeClient(answer, first_token_delay, token_delay)
+    lambda_function_v7.bedrock_agent_client = StubBedrockAgentClient()
+
+    for run_index in range(runs):
+        # Perguntas diferentes a cada execução, para não acertar o cache de respostas
+        event = {'prompt': f"{prompt} ({run_index})"}
+
+        writer = TimingResponseWriter()
+        lambda_function_v7.stream_handler(event, None, writer)
+        print(f"streaming | TTFB {writer.write_times[0] * 1000:8.1f} ms | total {writer.total_time * 1000:8.1f} ms | {len(writer.chunks)} escritas")
+
+        start_time = time.perf_counter()
+        lambda_function_v7.lambda_handler({'prompt': f"{event['prompt']} [buffer]"}, None)
+        buffered_time = time.perf_counter() - start_time
+        print(f"buffer    | TTFB {buffered_time * 1000:8.1f} ms | total {buffered_time * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--prompt', default="Como funciona a regra do +4 no UNO?")
+    parser.add_argument('--answer', default=" ".join(["palavra"] * 200))
+    parser.add_argument('--first-token-delay', type=float, default=0.5)
+    parser.add_argument('--token-delay', type=float, default=0.02)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.prompt, args.answer, args.first_token_delay, args.token_delay, args.runs)
@@ -0,0 +1,119 @@
+import io
+import json
+import time
+import hashlib
+
+# --------------------------------------------------------------------
+# Função que gera um embedding determinístico a partir do texto
+# --------------------------------------------------------------------
+def fake_embedding(text, dimensions=1024):
+    """
+    Gera um vetor determinístico a partir do hash do texto (mesmo texto, mesmo vetor).
+
+    :param text: Texto a ser "embeddado".
+    :param dimensions: Dimensão do vetor.
+    :return: Lista de floats entre -1 e 1.
+    """
+    seed = hashlib.sha256(text.encode('utf-8')).digest()
+    values = []
+    while len(values) < dimensions:
+        seed = hashlib.sha256(seed).digest()
+        values.extend((byte - 127.5) / 127.5 for byte in seed)
+    return values[:dimensions]
+
+# --------------------------------------------------------------------
+# Cliente bedrock-runtime simulado
+# --------------------------------------------------------------------
+class StubBedrockRuntimeClient:
+    def __init__(self, answer="Resposta simulada do modelo.", first_token_delay=0.3, token_delay=0.02, embedding_delay=0.05):
+        """
+        Simula o cliente `bedrock-runtime` do Boto3 sem acesso à rede: embeddings do Titan
+        determinísticos e respostas do Claude (com ou sem streaming) com atrasos configuráveis.
+
+        :param answer: Texto devolvido pelo modelo de geração.
+        :param first_token_delay: Atraso (em segundos) até o primeiro trecho de texto.
+        :param token_delay: Atraso (em segundos) entre trechos consecutivos.
+        :param embedding_delay: Atraso (em segundos) de cada chamada de embedding.
+        """
+        self.answer = answer
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.embedding_delay = embedding_delay
+        self.calls = {'embedding': 0, 'invoke_model': 0, 'invoke_model_with_response_stream': 0}
+
+    def _deltas(self):
+        # Divide a resposta em trechos do tamanho aproximado de um token
+        words = self.answer.split(' ')
+        return [word + (' ' if index < len(words) - 1 else '') for index, word in enumerate(words)]
+
+    def invoke_model(self, modelId, body, **kwargs):
+        request = json.loads(body)
+
+        if 'inputText' in request:
+            self.calls['embedding'] += 1
+            time.sleep(self.embedding_delay)
+            payload = {'embedding': fake_embedding(request['inputText']), 'inputTextTokenCount': len(request['inputText'].split())}
+        else:
+            self.calls['invoke_model'] += 1
+            time.sleep(self.first_token_delay + self.token_delay * len(self._deltas()))
+            payload = {'content': [{'type': 'text', 'text': self.answer}]}
+
+        return {'body': io.BytesIO(json.dumps(payload).encode('utf-8'))}
+
+    def invoke_model_with_response_stream(self, modelId, body, **kwargs):
+        self.calls['invoke_model_with_response_stream'] += 1
+        return {'body': self._event_stream()}
+
+    def _event_stream(self):
+        # Reproduz a sequência de eventos da API de mensagens da Anthropic no Bedrock
+        def event(payload):
+            return {'chunk': {'bytes': json.dumps(payload).encode('utf-8')}}
+
+        deltas = self._deltas()
+        yield event({'type': 'message_start', 'message': {'usage': {'input_tokens': 0}}})
+        yield event({'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}})
+
+        time.sleep(self.first_token_delay)
+        for index, delta in enumerate(deltas):
+            if index:
+                time.sleep(self.token_delay)
+            yield event({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': delta}})
+
+        yield event({'type': 'content_block_stop', 'index': 0})
+        yield event({'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'}, 'usage': {'output_tokens': len(deltas)}})
+        yield event({'type': 'message_stop', 'amazon-bedrock-invocationMetrics': {'outputTokenCount': len(deltas)}})
+
+# --------------------------------------------------------------------
+# Cliente bedrock-agent-runtime simulado
+# --------------------------------------------------------------------
+class StubBedrockAgentClient:
+    def __init__(self, documents=None, retrieve_delay=0.1):
+        """
+        Simula o cliente `bedrock-agent-runtime` do Boto3, devolvendo sempre os mesmos documentos.
+
+        :param documents: Textos devolvidos pela busca na base de conhecimento.
+        :param retrieve_delay: Atraso (em segundos) de cada busca.
+        """
+        self.documents = documents or [f"Trecho simulado número {index} da base de conhecimento." for index in range(10)]
+        self.retrieve_delay = retrieve_delay
+        self.calls = {'retrieve': 0, 'retrieve_and_generate': 0}
+
+    def retrieve(self, retrievalQuery, knowledgeBaseId, retrievalConfiguration, **kwargs):
+        self.calls['retrieve'] += 1
+        time.sleep(self.retrieve_delay)
+        number_results = retrievalConfiguration['vectorSearchConfiguration']['numberOfResults']
+
+        return {'retrievalResults': [
+            {
+                'content': {'text': text},
+                'location': {'type': 'S3', 's3Location': {'uri': f"s3://stub/{knowledgeBaseId or 'kb'}/{index}.txt"}},
+                'score': 1.0 - index / len(self.documents),
+            }
+            for index, text in enumerate(self.documents[:number_results])
+        ]}
+
+    def retrieve_and_generate(self, input, retrieveAndGenerateConfiguration, **kwargs):
+        self.calls['retrieve_and_generate'] += 1
+        time.sleep(self.retrieve_delay)
+        references = [{'content': {'text': text}} for text in self.documents[:5]]
+        return {'output': {'text': "Resposta simulada do modelo."}, 'citations': [{'retrievedReferences': references}]}
@@ -0,0 +1,301 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from array import array
+
+import numpy as np
+
+# --------------------------------------------------------------------
+# Backend em memória (container Lambda aquecido)
+# --------------------------------------------------------------------
+class InMemoryCacheBackend:
+    def __init__(self):
+        """
+        Guarda as entradas do cache em um dicionário do processo. As entradas vivem
+        enquanto o container Lambda estiver aquecido.
+        """
+        self._entries = {}
+
+    def entries(self):
+        return list(self._entries.values())
+
+    def get(self, entry_id):
+        return self._entries.get(entry_id)
+
+    def add(self, entry):
+        self._entries[entry['id']] = entry
+
+    def remove(self, entry_id):
+        self._entries.pop(entry_id, None)
+
+    def touch(self, entry_id, timestamp):
+        if entry_id in self._entries:
+            self._entries[entry_id]['last_used_at'] = timestamp
+
+    def __len__(self):
+        return len(self._entries)
+
+# --------------------------------------------------------------------
+# Backend em arquivo SQLite (testes locais ou /tmp)
+# --------------------------------------------------------------------
+class SQLiteCacheBackend:
+    def __init__(self, path):
+        """
+        Guarda as entradas do cache em um arquivo SQLite.
+
+        :param path: Caminho do arquivo SQLite.
+        """
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS answers (id TEXT PRIMARY KEY, embedding BLOB, answer TEXT, contexts TEXT, "
+            "created_at REAL, last_used_at REAL, latency REAL)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def _entry(row):
+        return {
+            'id': row[0],
+            'embedding': array('f', row[1]).tolist(),
+            'answer': row[2],
+            'contexts': json.loads(row[3]),
+            'created_at': row[4],
+            'last_used_at': row[5],
+            'latency': row[6],
+        }
+
+    def entries(self):
+        rows = self._connection.execute(
+            "SELECT id, embedding, answer, contexts, created_at, last_used_at, latency FROM answers"
+        ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def get(self, entry_id):
+        row = self._connection.execute(
+            "SELECT id, embedding, answer, contexts, created_at, last_used_at, latency FROM answers WHERE id = ?", (entry_id,)
+        ).fetchone()
+        return self._entry(row) if row else None
+
+    def add(self, entry):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (entry['id'], array('f', entry['embedding']).tobytes(), entry['answer'], json.dumps(entry['contexts']),
+             entry['created_at'], entry['last_used_at'], entry['latency'])
+        )
+        self._connection.commit()
+
+    def remove(self, entry_id):
+        self._connection.execute("DELETE FROM answers WHERE id = ?", (entry_id,))
+        self._connection.commit()
+
+    def touch(self, entry_id, timestamp):
+        self._connection.execute("UPDATE answers SET last_used_at = ? WHERE id = ?", (timestamp, entry_id))
+        self._connection.commit()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+# --------------------------------------------------------------------
+# Função que normaliza um vetor para norma unitária
+# --------------------------------------------------------------------
+def normalize_vector(vector):
+    """
+    Normaliza o vetor para norma 1, de modo que a similaridade de cosseno entre dois
+    vetores normalizados seja apenas o produto escalar.
+
+    :param vector: Vetor original.
+    :return: Vetor normalizado (o próprio vetor, se for nulo).
+    """
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+# --------------------------------------------------------------------
+# Cache semântico de respostas, indexado pelo embedding da pergunta
+# --------------------------------------------------------------------
+class SemanticAnswerCache:
+    def __init__(self, backend, similarity_threshold=0.95, ttl_seconds=3600, max_entries=1000):
+        """
+        Cache de respostas do RAG. Uma pergunta cujo embedding tenha similaridade de cosseno
+        maior ou igual ao limiar com uma pergunta já respondida reutiliza a resposta e os
+        contextos, sem chamar a busca nem o modelo.
+
+        Os embeddings normalizados ficam em uma matriz NumPy em memória, lida do backend na
+        primeira consulta e atualizada a cada inclusão e descarte: cada consulta é um único
+        produto matriz-vetor, e só a entrada encontrada é lida do backend.
+
+        :param backend: Backend de armazenamento (InMemoryCacheBackend ou SQLiteCacheBackend).
+        :param similarity_threshold: Similaridade mínima para considerar duas perguntas equivalentes.
+        :param ttl_seconds: Tempo de vida de cada resposta, em segundos.
+        :param max_entries: Número máximo de respostas; a menos usada recentemente é descartada.
+        """
+        self.backend = backend
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+        # Índice em memória: IDs, embeddings normalizados (uma linha por entrada) e horários
+        self._ids = None
+        self._matrix = None
+        self._created_at = None
+        self._last_used_at = None
+
+    def _load_index(self):
+        # Lê os embeddings do backend uma única vez; depois, o índice acompanha store e os descartes
+        if self._ids is not None:
+            return
+
+        entries = self.backend.entries()
+        self._ids = [entry['id'] for entry in entries]
+        self._matrix = np.array([entry['embedding'] for entry in entries], dtype=np.float32) if entries else None
+        self._created_at = np.array([entry['created_at'] for entry in entries], dtype=np.float64)
+        self._last_used_at = np.array([entry['last_used_at'] for entry in entries], dtype=np.float64)
+
+    def _remove_positions(self, positions):
+        # Remove as entradas das posições informadas do backend e do índice
+        for position in positions:
+            self.backend.remove(self._ids[position])
+
+        removed = set(int(position) for position in positions)
+        self._ids = [entry_id for position, entry_id in enumerate(self._ids) if position not in removed]
+        self._matrix = np.delete(self._matrix, list(removed), axis=0) if self._ids else None
+        self._created_at = np.delete(self._created_at, list(removed))
+        self._last_used_at = np.delete(self._last_used_at, list(removed))
+
+    def lookup(self, query_embedding):
+        """
+        Procura uma resposta em cache para a pergunta.
+
+        :param query_embedding: Embedding da pergunta do usuário.
+        :return: Dicionário com 'answer', 'contexts', 'similarity' e 'latency', ou None.
+        """
+        now = time.time()
+        query_vector = normalize_vector(query_embedding)
+
+        with self._lock:
+            self._load_index()
+
+            # Descarta as respostas expiradas
+            expired = np.flatnonzero(now - self._created_at > self.ttl_seconds)
+            if expired.size:
+                self._remove_positions(expired)
+
+            best_entry, best_similarity = None, -1.0
+            if self._ids:
+                similarities = self._matrix @ query_vector
+                best_position = int(np.argmax(similarities))
+                best_similarity = float(similarities[best_position])
+
+                if best_similarity >= self.similarity_threshold:
+                    best_entry = self.backend.get(self._ids[best_position])
+                    if best_entry is None:
+                        # Removida do backend por outro processo (ex.: arquivo SQLite compartilhado)
+                        self._remove_positions([best_position])
+
+            if best_entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.saved_seconds += best_entry['latency']
+            self.backend.touch(best_entry['id'], now)
+            self._last_used_at[best_position] = now
+
+            return {
+                'answer': best_entry['answer'],
+                'contexts': best_entry['contexts'],
+                'similarity': best_similarity,
+                'latency': best_entry['latency'],
+            }
+
+    def store(self, query_embedding, answer, contexts, latency):
+        """
+        Armazena a resposta gerada para a pergunta.
+
+        :param query_embedding: Embedding da pergunta do usuário.
+        :param answer: Resposta gerada pelo modelo.
+        :param contexts: Contextos usados para gerar a resposta.
+        :param latency: Tempo (em segundos) gasto para gerar a resposta, usado no cálculo da latência economizada.
+        """
+        now = time.time()
+        entry_id = uuid.uuid4().hex
+        query_vector = normalize_vector(query_embedding)
+
+        with self._lock:
+            self._load_index()
+            self.backend.add({
+                'id': entry_id,
+                'embedding': query_vector.tolist(),
+                'answer': answer,
+                'contexts': list(contexts),
+                'created_at': now,
+                'last_used_at': now,
+                'latency': latency,
+            })
+
+            self._ids.append(entry_id)
+            self._matrix = query_vector[np.newaxis, :] if self._matrix is None else np.vstack([self._matrix, query_vector])
+            self._created_at = np.append(self._created_at, now)
+            self._last_used_at = np.append(self._last_used_at, now)
+
+            # Descarta as respostas menos usadas recentemente quando o cache passa do limite
+            excess = len(self._ids) - self.max_entries
+            if excess > 0:
+                self._remove_positions(np.argsort(self._last_used_at, kind='stable')[:excess])
+
+    def stats(self):
+        """
+        Retorna os contadores do cache.
+
+        :return: Dicionário com acertos, falhas, taxa de acerto e latência economizada.
+        """
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'saved_seconds': self.saved_seconds,
+        }
+
+    def log_invocation(self, hit):
+        """
+        Registra no log o resultado da consulta ao cache nesta invocação.
+
+        :param hit: Resultado de `lookup` (None em caso de falha).
+        """
+        stats = self.stats()
+        if hit:
+            print(f"Cache de respostas: HIT (similaridade {hit['similarity']:.3f}, {hit['latency'] * 1000:.0f} ms economizados) | "
+                  f"taxa de acerto {stats['hit_rate']:.1%} | total economizado {stats['saved_seconds']:.1f} s")
+        else:
+            print(f"Cache de respostas: MISS | taxa de acerto {stats['hit_rate']:.1%} | total economizado {stats['saved_seconds']:.1f} s")
+
+# --------------------------------------------------------------------
+# Função que cria o cache a partir das variáveis de ambiente
+# --------------------------------------------------------------------
+def build_answer_cache():
+    """
+    Cria o cache de respostas configurado pelas variáveis de ambiente:
+    ANSWER_CACHE_BACKEND (memory | sqlite), ANSWER_CACHE_PATH, ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_TTL e ANSWER_CACHE_MAX_ENTRIES.
+
+    :return: Instância de SemanticAnswerCache.
+    """
+    if os.environ.get("ANSWER_CACHE_BACKEND", "memory") == "sqlite":
+        backend = SQLiteCacheBackend(os.environ.get("ANSWER_CACHE_PATH", "/tmp/answer_cache.sqlite3"))
+    else:
+        backend = InMemoryCacheBackend()
+
+    return SemanticAnswerCache(
+        backend,
+        similarity_threshold=float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.95")),
+        ttl_seconds=float(os.environ.get("ANSWER_CACHE_TTL", "3600")),
+        max_entries=int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "1000")),
+    )
@@ -0,0 +1,159 @@
+"""
+Benchmark de recall@k x latência dos índices aproximados sobre um corpus sintético.
+
+Compara o HNSW (o mesmo hnswlib usado pelo Chroma, com os parâmetros M, construction_ef e
+search_ef de `HNSW_CONFIG`) e o IVF-PQ do FAISS (opcional) contra a busca exata em NumPy.
+O corpus tem vetores normalizados agrupados em clusters, como embeddings reais de texto.
+
+Uso (a partir de langchain_ollama_rag/):
+    python benchmarks/ann_benchmark.py --n 1000000 --dim 768 --queries 1000 --k 5
+    python benchmarks/ann_benchmark.py --n 100000 --m 16 32 --ef-search 10 50 100 --output ann.json
+"""
+import json
+import time
+import argparse
+import numpy as np
+
+try:
+    import hnswlib  # Instalado junto com o Chroma (pacote chroma-hnswlib)
+except ImportError:
+    hnswlib = None
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+def synthetic_corpus(n, dim, n_clusters, seed):
+    """
+    Gera `n` vetores normalizados em torno de `n_clusters` centros aleatórios.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim), dtype=np.float32)
+    vectors = np.empty((n, dim), dtype=np.float32)
+
+    # Gera em blocos para não duplicar a memória do corpus inteiro
+    for start in range(0, n, 100_000):
+        stop = min(start + 100_000, n)
+        labels = rng.integers(0, n_clusters, stop - start)
+        block = centers[labels] + 0.5 * rng.standard_normal((stop - start, dim), dtype=np.float32)
+        vectors[start:stop] = block / np.linalg.norm(block, axis=1, keepdims=True)
+
+    return vectors
+
+def exact_top_k(vectors, queries, k, block_size=256):
+    """
+    Calcula os k vizinhos exatos (maior produto escalar = menor distância L2 entre vetores normalizados).
+    """
+    neighbours = np.empty((len(queries), k), dtype=np.int64)
+
+    for start in range(0, len(queries), block_size):
+        scores = queries[start:start + block_size] @ vectors.T
+        top = np.argpartition(scores, -k, axis=1)[:, -k:]
+        neighbours[start:start + block_size] = top
+
+    return neighbours
+
+def recall_at_k(found, expected):
+    """
+    Fração dos vizinhos exatos encontrados pelo índice aproximado, em média por consulta.
+    """
+    return float(np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, expected)]))
+
+def time_queries(search, queries):
+    """
+    Executa as consultas uma a uma (como no RAG) e retorna os resultados e as latências em ms.
+    """
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, latencies
+
+def summarize(name, params, build_seconds, results, latencies, expected):
+    row = {
+        "index": name,
+        **params,
+        "build_seconds": round(build_seconds, 2),
+        "recall_at_k": round(recall_at_k(results, expected), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+    }
+    print(" | ".join(f"{key}={value}" for key, value in row.items()))
+    return row
+
+def benchmark_hnsw(vectors, queries, expected, k, m_values, ef_construction, ef_search_values):
+    rows = []
+    for m in m_values:
+        start = time.perf_counter()
+        index = hnswlib.Index(space="l2", dim=vectors.shape[1])
+        index.init_index(max_elements=len(vectors), M=m, ef_construction=ef_construction)
+        index.add_items(vectors, np.arange(len(vectors)))
+        build_seconds = time.perf_counter() - start
+
+        for ef_search in ef_search_values:
+            index.set_ef(max(ef_search, k))
+            results, latencies = time_queries(lambda query: index.knn_query(query, k=k)[0][0], queries)
+            rows.append(summarize("hnsw", {"M": m, "construction_ef": ef_construction, "search_ef": ef_search},
+                                  build_seconds, results, latencies, expected))
+    return rows
+
+def benchmark_ivfpq(vectors, queries, expected, k, nlist, pq_m, nprobe_values):
+    start = time.perf_counter()
+    quantizer = faiss.IndexFlatL2(vectors.shape[1])
+    index = faiss.IndexIVFPQ(quantizer, vectors.shape[1], nlist, pq_m, 8)
+    index.train(vectors[np.random.default_rng(0).choice(len(vectors), min(len(vectors), 256 * nlist), replace=False)])
+    index.add(vectors)
+    build_seconds = time.perf_counter() - start
+
+    rows = []
+    for nprobe in nprobe_values:
+        index.nprobe = nprobe
+        results, latencies = time_queries(lambda query: index.search(query[None, :], k)[1][0], queries)
+        rows.append(summarize("ivfpq", {"nlist": nlist, "pq_m": pq_m, "nprobe": nprobe},
+                              build_seconds, results, latencies, expected))
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=1_000_000, help="Número de chunks sintéticos")
+    parser.add_argument("--dim", type=int, default=768, help="Dimensão dos embeddings (nomic-embed-text: 768)")
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--m", type=int, nargs="+", default=[16, 32], help="Valores de hnsw:M")
+    parser.add_argument("--ef-construction", type=int, default=100)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 20, 50, 100, 200])
+    parser.add_argument("--nlist", type=int, default=4096)
+    parser.add_argument("--pq-m", type=int, default=48, help="Subvetores do PQ (deve dividir --dim)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Arquivo JSON com o relatório")
+    args = parser.parse_args()
+
+    print(f"Gerando corpus sintético: {args.n} x {args.dim}")
+    vectors = synthetic_corpus(args.n, args.dim, args.clusters, args.seed)
+
+    # Consultas próximas a chunks do corpus, como perguntas sobre o conteúdo indexado
+    rng = np.random.default_rng(args.seed + 1)
+    queries = vectors[rng.choice(args.n, args.queries, replace=False)] + 0.05 * rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+    print("Calculando vizinhos exatos")
+    expected = exact_top_k(vectors, queries, args.k)
+
+    report = []
+    if hnswlib is not None:
+        report += benchmark_hnsw(vectors, queries, expected, args.k, args.m, args.ef_construction, args.ef_search)
+    else:
+        print("hnswlib não instalado: HNSW ignorado")
+
+    if faiss is not None:
+        report += benchmark_ivfpq(vectors, queries, expected, args.k, args.nlist, args.pq_m, args.nprobe)
+    else:
+        print("faiss não instalado: IVF-PQ ignorado")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as report_file:
+            json.dump({"config": vars(args), "results": report}, report_file, indent=2)
@@ -0,0 +1,189 @@
+"""
+Teste de carga do caminho de consulta assíncrono (services/async_ollama_service.py), sem Ollama real.
+
+Sobe o servidor Ollama simulado com um número limitado de gerações simultâneas (como o
+OLLAMA_NUM_PARALLEL do Ollama real), ingere um corpus sintético e dispara consultas em malha
+fechada com níveis crescentes de concorrência. Uma fração das consultas repete perguntas
+"populares", o que exercita o compartilhamento de gerações em andamento. Para cada nível são
+reportados a vazão (consultas/s), os percentis de latência e o número de consultas
+compartilhadas; ao final, a maior vazão cujo p95 fica dentro do alvo, comparada com o caminho
+síncrono (uma consulta por vez).
+
+Uso (a partir de langchain_ollama_rag/):
+    python benchmarks/async_load_test.py --p95-ms 1500 --concurrency 1 2 4 8 16 32
+    python benchmarks/async_load_test.py --server-parallel 4 --max-generations 4 --output load.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+import contextlib
+
+# Permite importar os módulos do projeto e o código compartilhado (rag_common/) ao executar o script diretamente
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.rag_benchmark import summarize
+from benchmarks.synthetic_corpus import generate_corpus, generate_questions
+
+def question_stream(count, questions, hot_questions, duplicate_ratio, seed=11):
+    """
+    Sequência de perguntas da carga: com probabilidade `duplicate_ratio`, uma das perguntas
+    populares; caso contrário, uma pergunta qualquer do conjunto.
+    """
+    rng = random.Random(seed)
+    return [rng.choice(hot_questions) if rng.random() < duplicate_ratio else rng.choice(questions) for _ in range(count)]
+
+async def run_async_level(controller, stream, concurrency):
+    """
+    Executa a carga com `concurrency` clientes simultâneos, cada um enviando a próxima pergunta
+    assim que recebe a resposta anterior.
+
+    Returns:
+        tuple[List[float], float]: Latência de cada consulta e tempo total, em segundos.
+    """
+    latencies = []
+    pending = iter(stream)
+
+    async def client():
+        for question in pending:
+            start_time = time.perf_counter()
+            await controller.aexecute_ollama_model(question)
+            latencies.append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start_time
+
+def run_sync(controller, stream):
+    """
+    Executa a carga no caminho síncrono, uma consulta por vez (uma thread de trabalho).
+    """
+    latencies = []
+    start_time = time.perf_counter()
+    for question in stream:
+        query_start = time.perf_counter()
+        controller.execute_ollama_model(question)
+        latencies.append(time.perf_counter() - query_start)
+    return latencies, time.perf_counter() - start_time
+
+def level_report(latencies, elapsed):
+    return {"queries_per_second": len(latencies) / elapsed if elapsed else 0.0, **summarize(latencies)}
+
+def run(args):
+    """
+    Ingere o corpus e executa a carga em cada nível de concorrência.
+
+    Returns:
+        dict: Configuração e resultados por nível.
+    """
+    server = FakeOllamaServer(first_token_delay=args.first_token_delay, token_delay=args.token_delay,
+                              answer=" ".join(["palavra"] * args.answer_tokens), parallel=args.server_parallel).start()
+    workdir = tempfile.mkdtemp(prefix="async_load_test_")
+    previous_directory = os.getcwd()
+
+    # O endereço do Ollama é lido na importação do módulo de embeddings
+    os.environ["OLLAMA_BASE_URL"] = server.base_url
+    os.environ["PDF_TEXT_CACHE_PATH"] = os.path.join(workdir, "pdf_text_cache.sqlite3")
+    from controller.controller_ollama import Controller
+    from services.async_ollama_service import AsyncOllamaService
+
+    questions = generate_questions(args.questions, args.documents)
+    stream = question_stream(args.requests, questions, questions[:args.hot_questions], args.duplicate_ratio)
+    results = {"levels": {}}
+
+    try:
+        os.chdir(workdir)
+        generate_corpus(os.path.join(workdir, "pdfs"), args.documents, args.pages)
+        controller = Controller()
+
+        # Os logs do controlador e do serviço distorceriam as medições
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            controller.process_documents(os.path.join(workdir, "pdfs"))
+
+            # Aquecimento: abre o Chroma e o BM25 e preenche o cache de embeddings das perguntas
+            for question in questions:
+                controller.ollama_service.get_embedding_function().embed_query(question)
+
+            if not args.skip_sync:
+                results["sync"] = level_report(*run_sync(controller, stream))
+
+            for concurrency in args.concurrency:
+                # Serviço novo a cada nível: estatísticas zeradas e semáforo do event loop atual
+                controller.async_ollama_service = AsyncOllamaService(controller.ollama_service, args.max_generations)
+                latencies, elapsed = asyncio.run(run_async_level(controller, stream, concurrency))
+                stats = controller.async_ollama_service.stats
+                results["levels"][concurrency] = {**level_report(latencies, elapsed), "generations": stats["generations"],
+                                                  "coalesced": stats["coalesced"], "peak_waiting": stats["peak_waiting"]}
+
+        controller.close()
+    finally:
+        os.chdir(previous_directory)
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # Maior vazão entre os níveis cujo p95 fica dentro do alvo
+    within_target = {level: report for level, report in results["levels"].items() if report["p95_ms"] <= args.p95_ms}
+    best_level = max(within_target, key=lambda level: within_target[level]["queries_per_second"]) if within_target else None
+    results["best_concurrency"] = best_level
+    results["queries_per_second_at_p95"] = within_target[best_level]["queries_per_second"] if best_level else 0.0
+
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    return {"config": config, "results": results}
+
+def print_report(report):
+    """
+    Imprime a tabela de resultados por nível de concorrência.
+    """
+    config, results = report["config"], report["results"]
+
+    if "sync" in results:
+        sync = results["sync"]
+        print(f"Síncrono (1 consulta por vez): {sync['queries_per_second']:.2f} consultas/s | "
+              f"p50 {sync['p50_ms']:.0f} ms | p95 {sync['p95_ms']:.0f} ms")
+
+    print(f"{'concorrência':>12} | {'consultas/s':>11} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'gerações':>8} | {'compartilhadas':>14} | {'fila máx.':>9}")
+    for level, level_result in results["levels"].items():
+        marker = "" if level_result["p95_ms"] <= config["p95_ms"] else "  (acima do alvo)"
+        print(f"{level:>12} | {level_result['queries_per_second']:>11.2f} | {level_result['p50_ms']:>8.0f} | {level_result['p95_ms']:>8.0f} | "
+              f"{level_result['p99_ms']:>8.0f} | {level_result['generations']:>8} | {level_result['coalesced']:>14} | "
+              f"{level_result['peak_waiting']:>9}{marker}")
+
+    if results["best_concurrency"] is None:
+        print(f"Nenhum nível atingiu p95 <= {config['p95_ms']:.0f} ms")
+    else:
+        print(f"Vazão com p95 <= {config['p95_ms']:.0f} ms: {results['queries_per_second_at_p95']:.2f} consultas/s "
+              f"(concorrência {results['best_concurrency']})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=3, help="Páginas por PDF")
+    parser.add_argument("--questions", type=int, default=100, help="Perguntas distintas da carga")
+    parser.add_argument("--hot-questions", type=int, default=5, help="Perguntas populares, repetidas com frequência")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.3, help="Fração das consultas que repete uma pergunta popular")
+    parser.add_argument("--requests", type=int, default=120, help="Consultas por nível de concorrência")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--p95-ms", type=float, default=1500.0, help="Alvo de latência p95")
+    parser.add_argument("--max-generations", type=int, default=2, help="Gerações simultâneas permitidas pelo serviço assíncrono")
+    parser.add_argument("--server-parallel", type=int, default=2, help="Gerações simultâneas atendidas pelo Ollama simulado")
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    parser.add_argument("--first-token-delay", type=float, default=0.1)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--skip-sync", action="store_true", help="Não mede o caminho síncrono")
+    parser.add_argument("--output", help="Salva o relatório em JSON neste caminho")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Relatório salvo em {args.output}")
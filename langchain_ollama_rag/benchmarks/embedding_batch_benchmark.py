@@ -0,0 +1,124 @@
+"""
+Benchmark da vazão de embeddings de perguntas concorrentes, com e sem micro-batching
+(embedding/micro_batcher.py), contra o servidor Ollama simulado.
+
+Cada cliente (thread) gera embeddings de perguntas distintas em sequência. O servidor simulado
+atende poucas requisições ao mesmo tempo (`--server-parallel`) e cobra um custo fixo por
+requisição mais um custo por texto, como um servidor Ollama local compartilhado. São reportados a
+vazão (embeddings/s), a latência por pergunta, o número de requisições ao servidor e, com
+micro-batching, o preenchimento médio dos lotes e o atraso de fila adicionado.
+
+Uso (a partir de langchain_ollama_rag/):
+    python benchmarks/embedding_batch_benchmark.py --clients 1 8 32 --batch-size 16 --wait-ms 2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# Permite importar os módulos do projeto e o código compartilhado (rag_common/) ao executar o script diretamente
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.rag_benchmark import summarize
+from embedding.embedding_models import OllamaBatchEmbeddings
+from embedding.micro_batcher import EmbeddingMicroBatcher
+
+def run_clients(embeddings, clients, requests_per_client):
+    """
+    Executa `clients` threads, cada uma gerando `requests_per_client` embeddings de perguntas distintas.
+
+    Returns:
+        tuple[List[float], float]: Latência de cada pergunta e tempo total, em segundos.
+    """
+    def client(client_index):
+        latencies = []
+        for request_index in range(requests_per_client):
+            start_time = time.perf_counter()
+            embeddings.embed_query(f"Pergunta {client_index}-{request_index}: como funciona a regra do jogo?")
+            latencies.append(time.perf_counter() - start_time)
+        return latencies
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        latencies = [latency for client_latencies in executor.map(client, range(clients)) for latency in client_latencies]
+    return latencies, time.perf_counter() - start_time
+
+def run(args):
+    """
+    Mede cada número de clientes com e sem micro-batching.
+
+    Returns:
+        dict: Configuração e resultados por modo e número de clientes.
+    """
+    server = FakeOllamaServer(embedding_delay=args.request_delay, embedding_item_delay=args.item_delay,
+                              parallel=args.server_parallel).start()
+    results = {}
+
+    try:
+        for mode in ("individual", "micro_batching"):
+            results[mode] = {}
+            for clients in args.clients:
+                batcher = None
+                if mode == "micro_batching":
+                    batcher = EmbeddingMicroBatcher(OllamaBatchEmbeddings(base_url=server.base_url).embed_texts,
+                                                    max_batch_size=args.batch_size, max_wait_ms=args.wait_ms,
+                                                    max_in_flight=args.server_parallel)
+                embeddings = OllamaBatchEmbeddings(base_url=server.base_url, batcher=batcher)
+
+                requests_before = server.requests["embed"]
+                latencies, elapsed = run_clients(embeddings, clients, args.requests_per_client)
+
+                report = {"embeddings_per_second": len(latencies) / elapsed, **summarize(latencies),
+                          "server_requests": server.requests["embed"] - requests_before}
+                if batcher is not None:
+                    metrics = batcher.metrics()
+                    report.update(mean_batch_size=metrics["mean_batch_size"], mean_fill=metrics["mean_fill"],
+                                  queue_delay_mean_ms=metrics["queue_delay_mean_ms"], queue_delay_p95_ms=metrics["queue_delay_p95_ms"])
+                    batcher.close()
+                results[mode][clients] = report
+    finally:
+        server.stop()
+
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    return {"config": config, "results": results}
+
+def print_report(report):
+    """
+    Imprime a comparação entre os dois modos para cada número de clientes.
+    """
+    results = report["results"]
+    print(f"{'clientes':>8} | {'modo':<15} | {'emb/s':>8} | {'p50 ms':>7} | {'p95 ms':>7} | {'requisições':>11} | {'lote médio':>10} | {'fila p95 ms':>11}")
+
+    for clients in report["config"]["clients"]:
+        for mode in ("individual", "micro_batching"):
+            result = results[mode][clients]
+            batch = f"{result['mean_batch_size']:>10.1f} | {result['queue_delay_p95_ms']:>11.2f}" if "mean_batch_size" in result else f"{'-':>10} | {'-':>11}"
+            print(f"{clients:>8} | {mode:<15} | {result['embeddings_per_second']:>8.1f} | {result['p50_ms']:>7.1f} | "
+                  f"{result['p95_ms']:>7.1f} | {result['server_requests']:>11} | {batch}")
+
+        speedup = results["micro_batching"][clients]["embeddings_per_second"] / results["individual"][clients]["embeddings_per_second"]
+        print(f"{'':>8} | vazão com micro-batching: {speedup:.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests-per-client", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--wait-ms", type=float, default=2.0)
+    parser.add_argument("--server-parallel", type=int, default=2)
+    parser.add_argument("--request-delay", type=float, default=0.01, help="Custo fixo de cada requisição ao servidor (s)")
+    parser.add_argument("--item-delay", type=float, default=0.001, help="Custo de cada texto da requisição (s)")
+    parser.add_argument("--output", help="Salva o relatório em JSON neste caminho")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Relatório salvo em {args.output}")
@@ -0,0 +1,201 @@
+"""
+Servidor HTTP que imita a API do Ollama para benchmarks offline (sem modelos e sem GPU).
+
+Responde a `/api/embeddings` (um texto), `/api/embed` (lote de textos) e `/api/generate` (com ou
+sem streaming) de forma determinística e com atrasos configuráveis. Os embeddings são um
+"bag of words" com hashing de termos, de modo que textos com palavras em comum ficam próximos
+e a busca por similaridade continua fazendo sentido.
+
+Uso isolado (a partir de langchain_ollama_rag/):
+    python benchmarks/fake_ollama.py --port 11435
+    OLLAMA_BASE_URL=http://127.0.0.1:11435 python main.py
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import math
+import argparse
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Permite importar os módulos do projeto ao executar o script diretamente
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bm25_index import tokenize
+
+def fake_embedding(text, dimensions=768):
+    """
+    Gera um embedding determinístico e normalizado pelo hashing dos termos do texto.
+
+    Args:
+        text (str): Texto a "embeddar".
+        dimensions (int): Dimensão do vetor.
+
+    Returns:
+        List[float]: Vetor de norma 1 (ou nulo para texto sem termos).
+    """
+    vector = [0.0] * dimensions
+    for term in tokenize(text):
+        term_hash = zlib.crc32(term.encode("utf-8"))
+        vector[term_hash % dimensions] += 1.0 if term_hash & 0x80000000 else -1.0
+
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else vector
+
+class BacklogHTTPServer(ThreadingHTTPServer):
+    # Fila de conexões maior que a padrão (5), para suportar muitos clientes simultâneos
+    request_queue_size = 128
+    daemon_threads = True
+
+class FakeOllamaServer:
+    def __init__(self, host="127.0.0.1", port=0, dimensions=768, answer="Resposta simulada do modelo.",
+                 embedding_delay=0.0, first_token_delay=0.05, token_delay=0.002, parallel=None, embedding_item_delay=0.0):
+        """
+        Servidor Ollama simulado, executado em uma thread em segundo plano.
+
+        Args:
+            host (str): Endereço de escuta.
+            port (int): Porta de escuta (0 escolhe uma porta livre).
+            dimensions (int): Dimensão dos embeddings.
+            answer (str): Texto devolvido por `/api/generate`.
+            embedding_delay (float): Atraso (em segundos) de cada requisição de embedding.
+            embedding_item_delay (float): Atraso adicional (em segundos) por texto de cada requisição de embedding.
+            first_token_delay (float): Atraso (em segundos) até o primeiro trecho gerado.
+            token_delay (float): Atraso (em segundos) entre trechos gerados.
+            parallel (int): Requisições atendidas ao mesmo tempo por modelo (geração e embeddings); as
+                demais esperam na fila, como no Ollama com OLLAMA_NUM_PARALLEL (padrão: sem limite).
+        """
+        self.dimensions = dimensions
+        self.answer = answer
+        self.embedding_delay = embedding_delay
+        self.embedding_item_delay = embedding_item_delay
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.requests = {"embeddings": 0, "embed": 0, "generate": 0}
+        self.generation_slots = threading.BoundedSemaphore(parallel) if parallel else None
+        self.embedding_slots = threading.BoundedSemaphore(parallel) if parallel else None
+        self._lock = threading.Lock()
+        self._server = BacklogHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, endpoint):
+        with self._lock:
+            self.requests[endpoint] += 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # Cabeçalhos e corpo saem em escritas separadas
+
+            def log_message(self, format, *args):
+                # Silencia o log de acesso, que distorceria as medições
+                pass
+
+            def _send_json(self, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                path = self.path.rstrip("/")
+
+                if path == "/api/embeddings":
+                    server._count("embeddings")
+                    with server.embedding_slots or contextlib.nullcontext():
+                        time.sleep(server.embedding_delay + server.embedding_item_delay)
+                    self._send_json({"embedding": fake_embedding(request.get("prompt", ""), server.dimensions)})
+                elif path == "/api/embed":
+                    server._count("embed")
+                    inputs = request.get("input", [])
+                    inputs = [inputs] if isinstance(inputs, str) else inputs
+                    with server.embedding_slots or contextlib.nullcontext():
+                        time.sleep(server.embedding_delay + server.embedding_item_delay * len(inputs))
+                    self._send_json({"model": request.get("model"),
+                                     "embeddings": [fake_embedding(text, server.dimensions) for text in inputs]})
+                elif path == "/api/generate":
+                    server._count("generate")
+                    with server.generation_slots or contextlib.nullcontext():
+                        self._generate(request)
+                else:
+                    self.send_error(404)
+
+            def _generate(self, request):
+                words = server.answer.split(" ")
+                deltas = [word + (" " if index < len(words) - 1 else "") for index, word in enumerate(words)]
+                final = {"model": request.get("model"), "response": "", "done": True, "done_reason": "stop",
+                         "prompt_eval_count": len(request.get("prompt", "")) // 4, "eval_count": len(deltas)}
+
+                if not request.get("stream", True):
+                    time.sleep(server.first_token_delay + server.token_delay * len(deltas))
+                    self._send_json({**final, "response": server.answer})
+                    return
+
+                # Streaming em NDJSON com codificação chunked, como o Ollama real
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def write_line(payload):
+                    line = (json.dumps(payload) + "\n").encode("utf-8")
+                    self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+                    self.wfile.flush()
+
+                time.sleep(server.first_token_delay)
+                for index, delta in enumerate(deltas):
+                    if index:
+                        time.sleep(server.token_delay)
+                    write_line({"model": request.get("model"), "response": delta, "done": False})
+
+                write_line(final)
+                self.wfile.write(b"0\r\n\r\n")
+
+        return Handler
+
+    def start(self):
+        """
+        Inicia o servidor em uma thread em segundo plano.
+
+        Returns:
+            FakeOllamaServer: O próprio servidor, para encadeamento.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Encerra o servidor e libera a porta.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--embedding-delay", type=float, default=0.0)
+    parser.add_argument("--first-token-delay", type=float, default=0.05)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--embedding-item-delay", type=float, default=0.0)
+    parser.add_argument("--parallel", type=int, help="Requisições atendidas ao mesmo tempo por modelo (padrão: sem limite)")
+    args = parser.parse_args()
+
+    fake_server = FakeOllamaServer(port=args.port, embedding_delay=args.embedding_delay,
+                                   first_token_delay=args.first_token_delay, token_delay=args.token_delay,
+                                   parallel=args.parallel, embedding_item_delay=args.embedding_item_delay)
+    print(f"Ollama simulado em {fake_server.base_url}")
+    fake_server.start()._thread.join()
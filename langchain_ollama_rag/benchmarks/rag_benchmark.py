@@ -0,0 +1,225 @@
+"""
+Benchmark offline de ponta a ponta do pipeline RAG (ingestão e consultas), sem Ollama real.
+
+Sobe um servidor Ollama simulado (benchmarks/fake_ollama.py), gera um corpus sintético de PDFs
+(benchmarks/synthetic_corpus.py) em um diretório de trabalho temporário e executa
+`Controller.process_documents` e `Controller.execute_ollama_model`. Reporta a vazão da ingestão
+(páginas, chunks e MB por segundo), os percentis de latência de cada etapa (spans de
+services/tracing.py: carga dos PDFs, divisão, embeddings, escrita no Chroma; busca, re-ranking,
+montagem do prompt, primeiro token e geração) e o pico de memória (RSS). O relatório pode ser
+salvo como baseline em JSON e comparado com execuções futuras.
+
+Uso (a partir de langchain_ollama_rag/):
+    python benchmarks/rag_benchmark.py --documents 20 --queries 50 --save-baseline baseline.json
+    python benchmarks/rag_benchmark.py --documents 20 --queries 50 --compare baseline.json --tolerance 0.1
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+# Permite importar os módulos do projeto e o código compartilhado (rag_common/) ao executar o script diretamente
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_common.bench_stats import compare_reports, peak_rss_mb, summarize
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.synthetic_corpus import generate_corpus, generate_questions
+
+# Métricas em que um valor maior é melhor (as demais são latências e memória)
+HIGHER_IS_BETTER = ("per_second",)
+
+# Spans de services.tracing reportados em cada fase
+INGESTION_STAGES = ("pdf.load", "split", "embed", "vector.write")
+QUERY_STAGES = ("query", "retrieve", "rerank", "prompt.build", "llm.first_token", "llm.completion")
+
+def span_durations(exporter, names):
+    """
+    Agrupa as durações (em segundos) dos spans finalizados pelo nome da etapa.
+    """
+    durations = {}
+    for span in exporter.spans:
+        if span.name in names:
+            durations.setdefault(span.name, []).append(span.duration)
+    return durations
+
+class BenchmarkRunner:
+    def __init__(self, args):
+        """
+        Executa o benchmark em um diretório de trabalho isolado (Chroma, manifesto e cache de
+        embeddings usam caminhos relativos ao diretório atual; o cache de texto dos PDFs também
+        é criado nele).
+
+        Args:
+            args (argparse.Namespace): Argumentos da linha de comando.
+        """
+        self.args = args
+        self.workdir = args.workdir or tempfile.mkdtemp(prefix="rag_benchmark_")
+
+    def run_ingestion(self, controller, corpus, exporter):
+        pdf_directory = os.path.join(self.workdir, "pdfs")
+
+        start_time = time.perf_counter()
+        controller.process_documents(pdf_directory)
+        elapsed = time.perf_counter() - start_time
+
+        # Segunda execução sem alterações: mede o custo da verificação incremental pelo manifesto
+        start_time = time.perf_counter()
+        controller.process_documents(pdf_directory)
+        unchanged_elapsed = time.perf_counter() - start_time
+
+        # Os embeddings rodam em paralelo: a soma por etapa pode passar do tempo total
+        timings = span_durations(exporter, INGESTION_STAGES)
+
+        # Reconstrução do banco com os caches preenchidos: o texto dos PDFs vem do cache de texto
+        # extraído e os vetores do cache de embeddings, sem parsing nem chamadas ao modelo
+        controller.delete_database()
+        exporter.clear()
+        start_time = time.perf_counter()
+        controller.process_documents(pdf_directory)
+        rebuild_elapsed = time.perf_counter() - start_time
+        rebuild_load = sum(span_durations(exporter, ("pdf.load",)).get("pdf.load", []))
+
+        chunks = controller.ingestion_stats["chunks"]
+        return {
+            "files": len(corpus["files"]),
+            "pages": corpus["pages"],
+            "chunks": chunks,
+            "total_s": elapsed,
+            "pages_per_second": corpus["pages"] / elapsed,
+            "chunks_per_second": chunks / elapsed,
+            "split_chunks_per_second": chunks / sum(timings["split"]) if timings.get("split") else 0.0,
+            "megabytes_per_second": corpus["bytes"] / (1024 * 1024) / elapsed,
+            "unchanged_rerun_s": unchanged_elapsed,
+            "cached_rebuild_s": rebuild_elapsed,
+            "cached_rebuild_pdf_load_s": rebuild_load,
+            "stages_s": {stage: sum(samples) for stage, samples in timings.items()},
+        }
+
+    def run_queries(self, controller, exporter):
+        questions = generate_questions(self.args.warmup + self.args.queries, self.args.documents)
+
+        # Aquecimento: abre o Chroma e os clientes antes das medições
+        for question in questions[:self.args.warmup]:
+            controller.execute_ollama_model(question)
+        exporter.clear()
+
+        start_time = time.perf_counter()
+        for question in questions[self.args.warmup:]:
+            controller.execute_ollama_model(question)
+        elapsed = time.perf_counter() - start_time
+
+        timings = span_durations(exporter, QUERY_STAGES)
+
+        return {
+            "queries_per_second": self.args.queries / elapsed if elapsed else 0.0,
+            "stages": {stage: summarize(samples) for stage, samples in timings.items()},
+        }
+
+    def run(self):
+        """
+        Executa a ingestão e as consultas e monta o relatório.
+
+        Returns:
+            dict: Configuração e resultados do benchmark.
+        """
+        args = self.args
+        server = FakeOllamaServer(embedding_delay=args.embedding_delay, first_token_delay=args.first_token_delay,
+                                  token_delay=args.token_delay, answer=" ".join(["palavra"] * args.answer_tokens)).start()
+        previous_directory = os.getcwd()
+
+        # O endereço do Ollama é lido na importação do módulo de embeddings
+        os.environ["OLLAMA_BASE_URL"] = server.base_url
+        os.environ["PDF_TEXT_CACHE_PATH"] = os.path.join(self.workdir, "pdf_text_cache.sqlite3")
+        from controller.controller_ollama import Controller
+        from services.tracing import InMemoryExporter, Tracer, set_tracer
+
+        # As etapas são medidas pelos spans do próprio pipeline
+        exporter = InMemoryExporter()
+        set_tracer(Tracer(exporter))
+
+        try:
+            os.chdir(self.workdir)
+            corpus = generate_corpus(os.path.join(self.workdir, "pdfs"), args.documents, args.pages, args.lines_per_page)
+            controller = Controller()
+
+            # Os logs do controlador e do serviço distorceriam as medições
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                ingestion = self.run_ingestion(controller, corpus, exporter)
+                ingestion["peak_rss_mb"] = peak_rss_mb()
+                exporter.clear()
+                queries = self.run_queries(controller, exporter)
+
+            controller.close()
+        finally:
+            os.chdir(previous_directory)
+            server.stop()
+            if not args.workdir and not args.keep:
+                shutil.rmtree(self.workdir, ignore_errors=True)
+
+        config = {key: value for key, value in vars(args).items() if key not in ("save_baseline", "compare", "tolerance", "workdir", "keep")}
+        return {"config": config, "results": {"ingestion": ingestion, "queries": queries, "peak_rss_mb": peak_rss_mb()}}
+
+def print_report(report):
+    """
+    Imprime o resumo do relatório.
+    """
+    ingestion, queries = report["results"]["ingestion"], report["results"]["queries"]
+
+    print(f"Ingestão: {ingestion['files']} PDFs, {ingestion['pages']} páginas, {ingestion['chunks']} chunks em {ingestion['total_s']:.2f} s "
+          f"({ingestion['pages_per_second']:.1f} páginas/s | {ingestion['chunks_per_second']:.1f} chunks/s | "
+          f"{ingestion['megabytes_per_second']:.2f} MB/s)")
+    print(f"    divisão em chunks: {ingestion['split_chunks_per_second']:.0f} chunks/s")
+    print(f"    reexecução sem alterações: {ingestion['unchanged_rerun_s'] * 1000:.1f} ms")
+    print(f"    reconstrução do banco com caches: {ingestion['cached_rebuild_s']:.2f} s "
+          f"(carga dos PDFs: {ingestion['cached_rebuild_pdf_load_s'] * 1000:.1f} ms)")
+    for stage, seconds in ingestion["stages_s"].items():
+        print(f"    {stage:<22} {seconds:8.2f} s")
+
+    total = queries["stages"].get("query", summarize([]))
+    print(f"Consultas: {queries['queries_per_second']:.2f} consultas/s | total p50 {total['p50_ms']:.1f} ms | p95 {total['p95_ms']:.1f} ms")
+    for stage, summary in queries["stages"].items():
+        if stage != "query":
+            print(f"    {stage:<22} p50 {summary['p50_ms']:8.2f} ms | p95 {summary['p95_ms']:8.2f} ms | p99 {summary['p99_ms']:8.2f} ms")
+
+    print(f"Pico de memória (RSS): {report['results']['peak_rss_mb']:.1f} MB (após a ingestão: {ingestion['peak_rss_mb']:.1f} MB)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5, help="Páginas por PDF")
+    parser.add_argument("--lines-per-page", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--answer-tokens", type=int, default=100)
+    parser.add_argument("--embedding-delay", type=float, default=0.0)
+    parser.add_argument("--first-token-delay", type=float, default=0.05)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--workdir", help="Diretório de trabalho (padrão: temporário, removido ao final)")
+    parser.add_argument("--keep", action="store_true", help="Mantém o diretório de trabalho temporário")
+    parser.add_argument("--save-baseline", help="Salva o relatório em JSON neste caminho")
+    parser.add_argument("--compare", help="Compara com uma baseline salva; sai com código 1 se houver regressão")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    report = BenchmarkRunner(args).run()
+    print_report(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline salva em {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+        if baseline["config"] != report["config"]:
+            print("Aviso: a configuração da baseline difere da execução atual; as métricas podem não ser comparáveis.")
+
+        if compare_reports(baseline, report, args.tolerance, HIGHER_IS_BETTER):
+            sys.exit(1)
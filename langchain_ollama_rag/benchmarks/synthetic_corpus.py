@@ -0,0 +1,114 @@
+"""
+Gera um corpus sintético e determinístico de PDFs para os benchmarks offline.
+
+Os PDFs são escritos à mão (texto em Helvetica, sem dependências), com regras de jogos
+fictícios montadas a partir de um vocabulário fixo e de uma semente, de modo que duas
+execuções com os mesmos parâmetros produzem exatamente os mesmos arquivos.
+"""
+import os
+import random
+
+# Vocabulário das regras sintéticas (apenas ASCII, para dispensar a codificação de fontes)
+SUBJECTS = ["o jogador", "a equipe", "o oponente", "cada participante", "o vencedor da rodada", "o primeiro jogador"]
+VERBS = ["compra", "descarta", "revela", "troca", "acumula", "perde", "ganha", "embaralha"]
+OBJECTS = ["duas cartas", "uma carta coringa", "tres fichas", "o baralho inteiro", "os pontos da rodada", "a carta do topo"]
+CONDITIONS = ["quando a pilha acaba", "antes do fim do turno", "se tirar um numero par", "depois de pular a vez",
+              "quando alguem grita a palavra chave", "no inicio de cada partida"]
+
+def random_sentence(rng, game_name):
+    """
+    Monta uma frase de regra a partir do vocabulário.
+    """
+    return (f"No {game_name}, {rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} "
+            f"{rng.choice(CONDITIONS)}.")
+
+def escape_pdf_text(text):
+    """
+    Escapa os caracteres especiais de strings literais do PDF.
+    """
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path, pages):
+    """
+    Escreve um PDF mínimo e válido, com uma página por item de `pages`.
+
+    Args:
+        path (str): Caminho do arquivo a criar.
+        pages (List[List[str]]): Linhas de texto de cada página.
+    """
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>", 3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    page_ids = []
+
+    for index, lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * index, 5 + 2 * index
+        stream = "BT /F1 10 Tf 12 TL 50 800 Td " + " ".join(f"({escape_pdf_text(line)}) '" for line in lines) + " ET"
+        stream = stream.encode("latin-1")
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        page_ids.append(page_id)
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode("ascii")
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(output)
+        output += b"%d 0 obj\n%s\nendobj\n" % (object_id, objects[object_id])
+
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for object_id in sorted(objects):
+        output += b"%010d 00000 n \n" % offsets[object_id]
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+
+    with open(path, "wb") as file:
+        file.write(output)
+
+def generate_corpus(directory, documents=20, pages_per_document=5, lines_per_page=50, seed=42):
+    """
+    Gera o corpus sintético no diretório informado.
+
+    Args:
+        directory (str): Diretório de saída (criado se não existir).
+        documents (int): Número de PDFs.
+        pages_per_document (int): Páginas de cada PDF.
+        lines_per_page (int): Linhas (frases de regra) de cada página.
+        seed (int): Semente do gerador de texto.
+
+    Returns:
+        dict: Arquivos gerados, total de páginas e total de bytes.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    paths, total_bytes = [], 0
+
+    for document_index in range(documents):
+        game_name = f"Jogo {document_index:03d}"
+        pages = [[random_sentence(rng, game_name) for _ in range(lines_per_page)] for _ in range(pages_per_document)]
+
+        path = os.path.join(directory, f"regras_jogo_{document_index:03d}.pdf")
+        write_pdf(path, pages)
+        paths.append(path)
+        total_bytes += os.path.getsize(path)
+
+    return {"files": paths, "pages": documents * pages_per_document, "bytes": total_bytes}
+
+def generate_questions(count, documents, seed=7):
+    """
+    Gera perguntas determinísticas sobre os jogos do corpus.
+
+    Args:
+        count (int): Número de perguntas.
+        documents (int): Número de jogos no corpus.
+        seed (int): Semente do gerador.
+
+    Returns:
+        List[str]: Perguntas.
+    """
+    rng = random.Random(seed)
+    return [
+        f"No Jogo {rng.randrange(documents):03d}, quando {rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}?"
+        for _ in range(count)
+    ]
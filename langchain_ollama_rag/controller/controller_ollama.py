@@ -1,6 +1,12 @@
-from services.chromadb_service import add_to_chroma, clear_database
-from services.ocr_services import load_documents_from_directory
+import os
+from langchain_core.documents import Document
+from embedding.embedding_models import EMBEDDING_SETTINGS
+from services.chromadb_service import MANIFEST_PATH, ChromaWriter, calculate_chunk_ids, clear_database, get_chunk_ids_by_source
+from services.manifest_service import IngestionManifest
+from services.ocr_services import find_pdf_files, iter_documents_from_files
 from services.ollama_services import OllamaService
+from services.async_ollama_service import AsyncOllamaService
+from services.tracing import get_tracer, traced
 
 class Controller:
     def __init__(self):
@@ -10,6 +16,8 @@ class Controller:
         e executar o modelo de chat.
         """
         self.ollama_service = OllamaService()  # Inicialize o serviço Ollama se necessário
+        self.async_ollama_service = AsyncOllamaService(self.ollama_service)  # Consultas assíncronas, com os mesmos handles
+        self.ingestion_stats = {"files": 0, "pages": 0, "chunks": 0}  # Totais da última ingestão
 
     def delete_database(self):
         """
@@ -19,30 +27,134 @@ class Controller:
         Args:
             pdf_directory (str): Caminho para o diretório que contém os arquivos PDF.
         """
+        # Libera a coleção aberta antes de remover o diretório do Chroma
+        self.ollama_service.close()
+
         # Limpa documentos do diretório PDF
         clear_database()
 
         print("✅ Documentos removidos com sucesso")
 
-    def process_documents(self, pdf_directory):
+    @traced("ingest")
+    def process_documents(self, pdf_directory, pipeline=None, documents=None, max_pages_in_memory=200):
         """
         Carrega documentos de um diretório PDF, divide em chunks e os adiciona ao 
         banco de dados Chroma.
 
+        A ingestão é incremental: PDFs inalterados desde a última execução (segundo o
+        manifesto de ingestão) não são lidos, apenas chunks novos ou alterados são
+        embeddados e os chunks órfãos de versões anteriores são removidos.
+
+        As páginas são lidas sob demanda e seguem para a divisão, os embeddings e o Chroma em
+        grupos de arquivos com até `max_pages_in_memory` páginas, de modo que o pico de memória
+        não cresce com o número de PDFs do diretório.
+
         Args:
             pdf_directory (str): Caminho para o diretório que contém os arquivos PDF.
+            pipeline (EmbeddingPipeline): Etapa de embeddings em lotes (tamanho do lote, concorrência e tentativas).
+            documents (List[Document]): Páginas já carregadas pelo chamador; os arquivos presentes
+                aqui (metadado `source`) não são lidos de novo.
+            max_pages_in_memory (int): Páginas acumuladas antes de cada divisão em chunks (um arquivo
+                maior que isso é processado sozinho).
         """
-        # Carregar documentos do diretório PDF
-        self.documents = load_documents_from_directory(pdf_directory)
+        # Compara os PDFs do diretório com o manifesto, sem fazer o parsing
+        manifest = IngestionManifest.load(MANIFEST_PATH, settings={"chunking": self.ollama_service.chunker.settings(),
+                                                                   "embedding": EMBEDDING_SETTINGS})
+
+        # Chunks e vetores gerados com outro chunker ou outra API de embeddings não podem ser misturados aos novos
+        if manifest.settings_changed:
+            print("⚠️ Parâmetros de divisão ou de embedding alterados: recriando o banco de dados.")
+            self.ollama_service.close()
+            clear_database()
+        changed_files, removed_files = manifest.diff(find_pdf_files(pdf_directory), pdf_directory)
+
+        if not changed_files and not removed_files:
+            manifest.save()
+            print("✅ Nenhum PDF novo ou alterado desde a última ingestão.")
+            return
+
+        print(f"👉 PDFs novos ou alterados: {len(changed_files)} | PDFs removidos: {len(removed_files)}")
+
+        tracer = get_tracer()
+        writer = ChromaWriter(pipeline)
+        unknown_ids = get_chunk_ids_by_source([file_path for file_path in changed_files if not manifest.has_file(file_path)])
+        self.ingestion_stats = {"files": 0, "pages": 0, "chunks": 0}
+
+        for file_group in self._iter_file_groups(changed_files, documents, max_pages_in_memory):
+            pages = [page for _file_path, file_pages in file_group for page in file_pages]
+
+            # Dividir os documentos em chunks menores
+            with tracer.span("split", pages=len(pages)) as span:
+                chunks = calculate_chunk_ids(self.ollama_service.split_documents(pages))
+                span.set(chunks=len(chunks), bytes=sum(len(chunk.page_content.encode("utf-8")) for chunk in chunks),
+                         tokens=self.ollama_service.chunker.stats["tokens"])
 
-        # Dividir os documentos em chunks menores
-        self.chunks = self.ollama_service.split_documents(self.documents)
+            # Agrupa os chunks por arquivo de origem
+            chunks_by_file = {file_path: [] for file_path, _file_pages in file_group}
+            for chunk in chunks:
+                chunks_by_file.setdefault(chunk.metadata.get("source"), []).append(chunk)
 
-        # Adicionar os chunks ao banco de dados Chroma
-        add_to_chroma(self.chunks)
+            # Remove os chunks órfãos das versões anteriores dos arquivos e grava os novos
+            for file_path, _file_pages in file_group:
+                previous_ids = unknown_ids[file_path] if file_path in unknown_ids else manifest.chunk_ids(file_path)
+                writer.remove(previous_ids - {chunk.metadata["id"] for chunk in chunks_by_file[file_path]})
+                manifest.update_file(file_path, chunks_by_file[file_path])
+            writer.add(chunks)
+
+            self.ingestion_stats["files"] += len(file_group)
+            self.ingestion_stats["pages"] += len(pages)
+            self.ingestion_stats["chunks"] += len(chunks)
+
+        # Remove os chunks dos arquivos que saíram do diretório
+        for file_path in removed_files:
+            writer.remove(manifest.remove_file(file_path))
+
+        # Grava os chunks restantes e o índice BM25
+        writer.close()
+
+        # Registra o novo estado somente depois que o Chroma foi atualizado
+        manifest.save()
+
+        # Reabre a coleção para que as próximas consultas enxerguem os novos chunks
+        self.ollama_service.reload()
 
         print("✅ Documentos processados e adicionados ao Chroma com sucesso.")
 
+    def _iter_file_groups(self, file_paths, documents, max_pages):
+        """
+        Gera grupos de `(arquivo, páginas)` com até `max_pages` páginas no total, lendo cada PDF
+        somente quando o grupo anterior já foi gravado.
+        """
+        # Páginas já carregadas pelo chamador, indexadas pelo caminho normalizado do arquivo
+        preloaded = {}
+        for page in documents or []:
+            preloaded.setdefault(os.path.normpath(page.metadata.get("source", "")), []).append(page)
+
+        tracer = get_tracer()
+        group, group_pages = [], 0
+
+        for file_path in file_paths:
+            file_pages = preloaded.pop(os.path.normpath(file_path), None)
+
+            if file_pages is None:
+                with tracer.span("pdf.load", files=1) as span:
+                    file_pages = list(iter_documents_from_files([file_path]))
+                    span.set(pages=len(file_pages), bytes=sum(len(page.page_content.encode("utf-8")) for page in file_pages))
+            else:
+                # Usa o mesmo caminho do manifesto no `source`, para que os IDs dos chunks não mudem
+                file_pages = [Document(page_content=page.page_content, metadata={**page.metadata, "source": file_path})
+                              for page in file_pages]
+
+            if group and group_pages + len(file_pages) > max_pages:
+                yield group
+                group, group_pages = [], 0
+
+            group.append((file_path, file_pages))
+            group_pages += len(file_pages)
+
+        if group:
+            yield group
+
     def execute_ollama_model(self, question_text):
         """
         Executa o modelo de chat Ollama com a pergunta fornecida e retorna a resposta gerada.
@@ -56,3 +168,22 @@ class Controller:
         # Chama o método para invocar o modelo
         response = self.ollama_service.invoke_model(question_text)  
         return response
+
+    async def aexecute_ollama_model(self, question_text):
+        """
+        Versão assíncrona de `execute_ollama_model`, para servidores que atendem várias perguntas
+        no mesmo event loop. Perguntas idênticas em andamento compartilham a mesma geração.
+
+        Args:
+            question_text (str): Texto da pergunta a ser feita ao modelo.
+
+        Returns:
+            str: Resposta gerada pelo modelo Ollama com base na pergunta e no contexto dos documentos.
+        """
+        return await self.async_ollama_service.invoke_model(question_text)
+
+    def close(self):
+        """
+        Libera os recursos abertos pelo serviço Ollama (coleção Chroma em cache).
+        """
+        self.ollama_service.close()
@@ -0,0 +1,210 @@
+import os, re, sqlite3, hashlib, threading, unicodedata
+from array import array
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+
+# Caminho padrão do cache em disco (fora do diretório do Chroma, para sobreviver ao `clear_database()`)
+EMBEDDING_CACHE_PATH = "./embedding_cache.sqlite3"
+
+def normalize_text(text):
+    """
+    Normaliza o texto antes do hash: forma Unicode NFC, espaços em branco colapsados e
+    sem espaços nas pontas.
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+class EmbeddingCache:
+    def __init__(self, path=None, max_memory_items=10000):
+        """
+        Cache de embeddings em dois níveis: LRU em memória e, opcionalmente, SQLite em disco.
+        A chave é o hash de (ID do modelo, papel do texto, texto normalizado) e os vetores são
+        guardados em float32. O papel (`"document"` ou `"query"`) separa os vetores de um mesmo
+        texto embeddado como chunk e como pergunta, que o cliente gera com prefixos diferentes.
+
+        Args:
+            path (str): Caminho do arquivo SQLite. Se None, o cache fica apenas em memória.
+            max_memory_items (int): Número máximo de vetores mantidos no LRU em memória.
+        """
+        self.max_memory_items = max_memory_items
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, model_id TEXT, vector BLOB)")
+            self._connection.commit()
+
+    @staticmethod
+    def make_key(model_id, text, role="document"):
+        """
+        Calcula a chave do cache para o trio (modelo, papel do texto, texto normalizado).
+        """
+        return hashlib.sha256(f"{model_id}\x00{role}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key, vector):
+        # Insere no LRU em memória, descartando o item menos usado quando cheio
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model_id, texts, role="document", remember=True):
+        """
+        Busca os embeddings de vários textos.
+
+        Args:
+            model_id (str): Identificador do modelo de embedding.
+            texts (List[str]): Textos a consultar.
+            role (str): Papel dos textos (`"document"` ou `"query"`).
+            remember (bool): Se False, os vetores lidos do disco não entram no LRU em memória.
+
+        Returns:
+            List[Optional[List[float]]]: Embedding de cada texto, ou None quando não está em cache.
+        """
+        keys = [self.make_key(model_id, text, role) for text in texts]
+        vectors = [None] * len(keys)
+
+        with self._lock:
+            missing = {}
+            for position, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    vectors[position] = self._memory[key]
+                else:
+                    missing.setdefault(key, []).append(position)
+
+            if missing and self._connection is not None:
+                key_list = list(missing)
+                for start in range(0, len(key_list), 500):
+                    batch = key_list[start:start + 500]
+                    rows = self._connection.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = array("f", blob).tolist()
+                        if remember:
+                            self._remember(key, vector)
+                        for position in missing[key]:
+                            vectors[position] = vector
+
+            found = sum(vector is not None for vector in vectors)
+            self.hits += found
+            self.misses += len(vectors) - found
+
+        return vectors
+
+    def put_many(self, model_id, texts, vectors, role="document", remember=True):
+        """
+        Armazena os embeddings de vários textos.
+
+        Args:
+            model_id (str): Identificador do modelo de embedding.
+            texts (List[str]): Textos embeddados.
+            vectors (List[List[float]]): Embedding de cada texto.
+            role (str): Papel dos textos (`"document"` ou `"query"`).
+            remember (bool): Se False e houver SQLite, os vetores vão apenas para o disco.
+
+        Returns:
+            List[List[float]]: Os vetores como ficaram no cache (arredondados para float32), para
+                que o chamador devolva o mesmo valor em uma falha e em um acerto.
+        """
+        remember = remember or self._connection is None
+        stored_vectors = []
+        rows = []
+
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self.make_key(model_id, text, role)
+                packed = array("f", vector)
+                stored_vectors.append(packed.tolist())
+                if remember:
+                    self._remember(key, stored_vectors[-1])
+                rows.append((key, model_id, packed.tobytes()))
+
+            if self._connection is not None and rows:
+                self._connection.executemany("INSERT OR REPLACE INTO embeddings (key, model_id, vector) VALUES (?, ?, ?)", rows)
+                self._connection.commit()
+
+        return stored_vectors
+
+    def stats(self):
+        """
+        Retorna os contadores de acertos e falhas do cache.
+
+        Returns:
+            dict: Acertos, falhas, taxa de acerto e itens em memória.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_items": len(self._memory),
+        }
+
+    def close(self):
+        """
+        Fecha a conexão com o arquivo SQLite, se houver.
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+class CachedEmbeddings(Embeddings):
+    def __init__(self, embeddings, model_id, cache):
+        """
+        Envolve um cliente de embeddings da LangChain, consultando o cache antes de chamar o modelo.
+        Apenas os textos ausentes do cache são enviados ao modelo, em uma única chamada.
+
+        Args:
+            embeddings (Embeddings): Cliente de embeddings original (ex.: OllamaEmbeddings).
+            model_id (str): Identificador do modelo, usado na chave do cache.
+            cache (EmbeddingCache): Cache de embeddings.
+        """
+        self.embeddings = embeddings
+        self.model_id = model_id
+        self.cache = cache
+
+    def embed_documents(self, texts):
+        # Vetores de chunks raramente são relidos no mesmo processo: ficam só no disco, e o LRU em
+        # memória fica para as perguntas (senão o consumo de memória da ingestão cresce com o corpus)
+        vectors = self.cache.get_many(self.model_id, texts, role="document", remember=False)
+        missing_positions = [position for position, vector in enumerate(vectors) if vector is None]
+
+        if missing_positions:
+            # Textos que normalizam para a mesma chave são embeddados uma única vez
+            positions_by_key = {}
+            for position in missing_positions:
+                positions_by_key.setdefault(self.cache.make_key(self.model_id, texts[position], "document"), []).append(position)
+
+            missing_texts = [texts[positions[0]] for positions in positions_by_key.values()]
+            new_vectors = self.cache.put_many(self.model_id, missing_texts, self.embeddings.embed_documents(missing_texts),
+                                              role="document", remember=False)
+
+            for positions, vector in zip(positions_by_key.values(), new_vectors):
+                for position in positions:
+                    vectors[position] = vector
+
+        return vectors
+
+    def embed_query(self, text):
+        vector = self.cache.get_many(self.model_id, [text], role="query")[0]
+
+        if vector is None:
+            vector = self.cache.put_many(self.model_id, [text], [self.embeddings.embed_query(text)], role="query")[0]
+
+        return vector
+
+    async def aembed_query(self, text):
+        # Versão assíncrona: o cache é consultado direto e apenas a chamada ao modelo é aguardada
+        vector = self.cache.get_many(self.model_id, [text], role="query")[0]
+
+        if vector is None:
+            vector = self.cache.put_many(self.model_id, [text], [await self.embeddings.aembed_query(text)], role="query")[0]
+
+        return vector
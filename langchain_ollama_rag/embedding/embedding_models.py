@@ -1,10 +1,114 @@
-from langchain_community.embeddings.ollama import OllamaEmbeddings
+import os
+import threading
+import requests
+from langchain_core.embeddings import Embeddings
+from embedding.embedding_cache import EMBEDDING_CACHE_PATH, EmbeddingCache, CachedEmbeddings
+from embedding.micro_batcher import EmbeddingMicroBatcher
 
 # !curl -fsSL https://ollama.com/install.sh | sh
 # !ollama run llama3.2 or !ollama pull mistral
 # !ollama serve
 
-def get_embedding_ollama():
-    # Inicializa os embeddings do modelo Ollama
-    model_embeddings = OllamaEmbeddings(model="nomic-embed-text")
-    return model_embeddings
\ No newline at end of file
+EMBEDDING_MODEL_ID = "nomic-embed-text"  # Modelo de embeddings do Ollama
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")  # Endereço do servidor Ollama
+
+# Micro-batching das consultas concorrentes: até EMBEDDING_BATCH_SIZE perguntas ou EMBEDDING_BATCH_WAIT_MS
+# de espera por chamada ao /api/embed (EMBEDDING_BATCH_SIZE=1 desativa)
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "16"))
+EMBEDDING_BATCH_WAIT_MS = float(os.environ.get("EMBEDDING_BATCH_WAIT_MS", "2"))
+
+# Os vetores do /api/embed são normalizados, ao contrário dos do antigo /api/embeddings: a API entra
+# na chave do cache e no manifesto de ingestão, para que vetores das duas origens não se misturem
+EMBEDDING_API = "/api/embed"
+EMBEDDING_SETTINGS = {"model": EMBEDDING_MODEL_ID, "api": EMBEDDING_API}
+
+class OllamaBatchEmbeddings(Embeddings):
+    def __init__(self, model=EMBEDDING_MODEL_ID, base_url=OLLAMA_BASE_URL, embed_instruction="passage: ",
+                 query_instruction="query: ", batcher=None, timeout=60):
+        """
+        Cliente de embeddings do Ollama que usa o endpoint em lote `/api/embed`: uma requisição por
+        lote de chunks na ingestão e, com `batcher`, uma requisição por grupo de perguntas concorrentes.
+
+        Args:
+            model (str): Modelo de embeddings.
+            base_url (str): Endereço do servidor Ollama.
+            embed_instruction (str): Prefixo dos textos de documentos (o mesmo do OllamaEmbeddings da LangChain).
+            query_instruction (str): Prefixo das perguntas.
+            batcher (EmbeddingMicroBatcher): Agrupador das perguntas concorrentes (None envia cada pergunta sozinha).
+            timeout (float): Tempo máximo de cada requisição, em segundos.
+        """
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.embed_instruction = embed_instruction
+        self.query_instruction = query_instruction
+        self.batcher = batcher
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _session(self):
+        # Uma sessão HTTP (conexões keep-alive) por thread
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def embed_texts(self, texts):
+        """
+        Gera os embeddings de vários textos (já com o prefixo) em uma única requisição.
+
+        Args:
+            texts (List[str]): Textos a embeddar.
+
+        Returns:
+            List[List[float]]: Embeddings, na mesma ordem dos textos.
+        """
+        try:
+            response = self._session().post(f"{self.base_url}{EMBEDDING_API}", json={"model": self.model, "input": texts},
+                                            timeout=self.timeout)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise ValueError(f"Erro ao gerar embeddings no Ollama: {e}") from e
+
+        return response.json()["embeddings"]
+
+    def embed_documents(self, texts):
+        return self.embed_texts([f"{self.embed_instruction}{text}" for text in texts]) if texts else []
+
+    def embed_query(self, text):
+        text = f"{self.query_instruction}{text}"
+        return self.batcher.embed(text) if self.batcher else self.embed_texts([text])[0]
+
+    async def aembed_query(self, text):
+        if self.batcher is None:
+            return await super().aembed_query(text)
+        return await self.batcher.aembed(f"{self.query_instruction}{text}")
+
+# Cache e agrupador compartilhados por todos os clientes de embedding do processo
+_embedding_cache = None
+_query_batcher = None
+_shared_lock = threading.Lock()
+
+def get_embedding_cache():
+    # Abre o cache de embeddings apenas uma vez por processo
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH)
+    return _embedding_cache
+
+def get_query_batcher():
+    # Um único agrupador por processo, para que as perguntas de todas as threads e consultas dividam os lotes
+    global _query_batcher
+    with _shared_lock:
+        if _query_batcher is None and EMBEDDING_BATCH_SIZE > 1:
+            _query_batcher = EmbeddingMicroBatcher(OllamaBatchEmbeddings().embed_texts, max_batch_size=EMBEDDING_BATCH_SIZE,
+                                                   max_wait_ms=EMBEDDING_BATCH_WAIT_MS)
+    return _query_batcher
+
+def get_embedding_ollama(use_cache=True):
+    # Inicializa os embeddings do modelo Ollama (perguntas agrupadas pelo micro-batcher)
+    model_embeddings = OllamaBatchEmbeddings(batcher=get_query_batcher())
+
+    # Consulta o cache de embeddings antes de chamar o modelo
+    if use_cache:
+        return CachedEmbeddings(model_embeddings, f"{EMBEDDING_MODEL_ID}{EMBEDDING_API}", get_embedding_cache())
+
+    return model_embeddings
@@ -0,0 +1,186 @@
+import time
+import queue
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+class EmbeddingMicroBatcher:
+    def __init__(self, embed_batch, max_batch_size=16, max_wait_ms=2.0, max_in_flight=2, history_size=10000):
+        """
+        Agrupa os pedidos de embedding de consultas concorrentes em chamadas em lote.
+
+        O primeiro pedido abre uma janela: os pedidos que chegarem em até `max_wait_ms` (ou até
+        completar `max_batch_size`) seguem na mesma chamada a `embed_batch`, e cada chamador
+        recebe o seu vetor. Com `max_in_flight` chamadas em andamento, o lote seguinte continua
+        crescendo até uma delas terminar. Textos repetidos na mesma janela são enviados uma única
+        vez. O atraso de fila adicionado e o preenchimento dos lotes ficam disponíveis em `metrics()`.
+
+        Args:
+            embed_batch (Callable[[List[str]], List[List[float]]]): Função que gera os embeddings de um lote.
+            max_batch_size (int): Máximo de textos por chamada.
+            max_wait_ms (float): Tempo máximo, em milissegundos, que o primeiro pedido da janela espera por outros.
+            max_in_flight (int): Máximo de chamadas em lote simultâneas.
+            history_size (int): Número de lotes e atrasos mantidos para as métricas.
+        """
+        self.embed_batch = embed_batch
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max_wait_ms / 1000
+        self.max_in_flight = max(max_in_flight, 1)
+
+        self._queue = queue.Queue()
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="embedding-batch")
+        self._collector = None
+        self._start_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=history_size)
+        self._queue_delays = deque(maxlen=history_size)
+        self._requests = 0
+        self._full_batches = 0
+
+    def submit(self, text):
+        """
+        Enfileira o texto para o próximo lote.
+
+        Args:
+            text (str): Texto a embeddar.
+
+        Returns:
+            Future: Resolvido com o vetor do texto (ou com a exceção da chamada em lote).
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def embed(self, text):
+        """
+        Gera o embedding do texto, bloqueando até o lote ser respondido.
+        """
+        return self.submit(text).result()
+
+    async def aembed(self, text):
+        """
+        Versão assíncrona de `embed`: o event loop não é bloqueado enquanto o lote é montado e enviado.
+        """
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _ensure_started(self):
+        if self._collector is None:
+            with self._start_lock:
+                if self._collector is None:
+                    self._collector = threading.Thread(target=self._collect, name="embedding-batcher", daemon=True)
+                    self._collector.start()
+
+    def _collect(self):
+        # Monta os lotes: espera o primeiro pedido e acumula os seguintes até encher ou vencer a janela
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            pending = [first]
+            deadline = first[2] + self.max_wait
+            while len(pending) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                pending.append(item)
+
+            # Limita as chamadas simultâneas; os pedidos que chegaram durante a espera completam o lote
+            self._slots.acquire()
+            while len(pending) < self.max_batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                pending.append(item)
+
+            self._executor.submit(self._dispatch, pending)
+
+    def _dispatch(self, pending):
+        try:
+            # Pedidos cancelados pelo chamador (ex.: `asyncio.wait_for` vencido) saem do lote; os
+            # demais passam a "em execução" e não podem mais ser cancelados
+            pending = [item for item in pending if item[1].set_running_or_notify_cancel()]
+            if not pending:
+                return
+
+            dispatch_time = time.perf_counter()
+            texts = list(dict.fromkeys(text for text, _future, _submitted in pending))
+
+            with self._metrics_lock:
+                self._requests += len(pending)
+                self._full_batches += len(pending) >= self.max_batch_size
+                self._batch_sizes.append(len(pending))
+                self._queue_delays.extend(dispatch_time - submitted for _text, _future, submitted in pending)
+
+            try:
+                vectors = dict(zip(texts, self.embed_batch(texts)))
+            except Exception as e:
+                self._fail(pending, e)
+                return
+
+            for text, future, _submitted in pending:
+                if text in vectors:
+                    future.set_result(vectors[text])
+                else:
+                    future.set_exception(ValueError(f"embed_batch devolveu {len(vectors)} vetores para {len(texts)} textos"))
+
+        except BaseException as e:
+            # Nenhum chamador pode ficar esperando por um pedido do lote
+            self._fail(pending, e)
+            raise
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _fail(pending, error):
+        # Resolve com `error` os pedidos do lote ainda não resolvidos
+        for _text, future, _submitted in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def metrics(self):
+        """
+        Métricas dos lotes enviados (nos últimos `history_size` lotes).
+
+        Returns:
+            dict: Pedidos, lotes, tamanho médio e preenchimento dos lotes, fração de lotes cheios e
+            atraso de fila adicionado (média e p95, em milissegundos).
+        """
+        with self._metrics_lock:
+            sizes, delays = list(self._batch_sizes), sorted(self._queue_delays)
+            requests, full_batches = self._requests, self._full_batches
+
+        mean_size = sum(sizes) / len(sizes) if sizes else 0.0
+        return {
+            "requests": requests,
+            "batches": len(sizes),
+            "mean_batch_size": mean_size,
+            "mean_fill": mean_size / self.max_batch_size,
+            "full_batch_ratio": full_batches / len(sizes) if sizes else 0.0,
+            "queue_delay_mean_ms": sum(delays) / len(delays) * 1000 if delays else 0.0,
+            "queue_delay_p95_ms": delays[int((len(delays) - 1) * 0.95)] * 1000 if delays else 0.0,
+        }
+
+    def close(self):
+        """
+        Encerra a thread que monta os lotes, depois de enviar os pedidos já enfileirados.
+        """
+        if self._collector is not None:
+            self._queue.put(None)
+            self._collector.join()
+            self._collector = None
+        self._executor.shutdown(wait=True)
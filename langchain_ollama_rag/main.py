@@ -1,5 +1,11 @@
+import os
+import sys
+
+# rag_common/ (código compartilhado com o bedrock_claude) fica na raiz do repositório; quem importar
+# os módulos do projeto a partir de outro script precisa da raiz no PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from controller.controller_ollama import Controller
-from services.ocr_services import load_documents_from_directory
 
 # Bloco principal executado ao rodar o script diretamente
 if __name__ == "__main__":
@@ -12,14 +18,10 @@ if __name__ == "__main__":
     # Define o caminho do diretório onde estão localizados os arquivos PDF para processamento.
     path = '../data/game_rules/' 
 
-    # Extrai os textos de todos os arquivos PDF encontrados no diretório e suas subpastas.
-    # A função `process_pdfs_in_directory` retorna uma lista de textos extraídos dos PDFs.
-    extract_texts = load_documents_from_directory(path)
-
     # Inicializa uma instância da classe `Controller`, que será responsável por processar os documentos e executar o modelo Bedrock.
     controller = Controller()
 
-    # Para cada texto extraído, chama o método `process_documents` do `Controller` para processar o conteúdo.
+    # Lê os PDFs do diretório (e suas subpastas) sob demanda, divide em chunks e grava no Chroma.
     controller.process_documents(path)
 
     # Executa o modelo Bedrocke o resultado é adicionado à variável `output_text`.
@@ -0,0 +1,140 @@
+import numpy as np
+from langchain.schema.document import Document
+
+# O FAISS é uma dependência opcional, usada apenas pelo índice IVF-PQ
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+class IVFPQIndex:
+    def __init__(self, nlist=1024, m=16, nbits=8, nprobe=16, min_train_size=None):
+        """
+        Índice aproximado IVF-PQ (FAISS) sobre os mesmos vetores da coleção Chroma. Os vetores
+        são agrupados em `nlist` listas invertidas e comprimidos por quantização de produto, o
+        que reduz a memória por vetor de 4 x dimensão bytes para `m` bytes (com nbits=8).
+
+        Coleções pequenas demais para treinar os 2^nbits centroides de cada subvetor usam uma
+        busca exata (`IndexFlatL2`), com as mesmas distâncias L2; uma coleção vazia é um índice vazio.
+
+        Args:
+            nlist (int): Número de listas invertidas (centroides do k-means grosso).
+            m (int): Número de subvetores da quantização de produto (deve dividir a dimensão).
+            nbits (int): Bits por código de subvetor.
+            nprobe (int): Número de listas visitadas em cada consulta (recall x latência).
+            min_train_size (int): Mínimo de vetores para usar o IVF-PQ (padrão: 39 x 2^nbits, o
+                mínimo de pontos de treino por centroide recomendado pelo FAISS).
+        """
+        if faiss is None:
+            raise ImportError("O índice IVF-PQ requer o pacote faiss (pip install faiss-cpu).")
+
+        self.nlist = nlist
+        self.m = m
+        self.nbits = nbits
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size if min_train_size is not None else 39 * 2 ** nbits
+        self.index = None
+        self.ids = []
+
+    def build(self, ids, embeddings):
+        """
+        Treina e preenche o índice.
+
+        Args:
+            ids (List[str]): IDs dos chunks, na ordem dos vetores.
+            embeddings (array-like): Vetores dos chunks (n x dimensão).
+
+        Returns:
+            IVFPQIndex: O próprio índice.
+        """
+        self.ids = list(ids)
+        if not self.ids:
+            self.index = None
+            return self
+
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+        # Poucos vetores para treinar o PQ: a busca exata é correta e, nesse tamanho, rápida
+        if len(vectors) < self.min_train_size:
+            self.index = faiss.IndexFlatL2(vectors.shape[1])
+            self.index.add(vectors)
+            return self
+
+        # O k-means precisa de pelo menos `nlist` pontos de treino
+        nlist = max(1, min(self.nlist, len(vectors) // 39 or 1))
+        quantizer = faiss.IndexFlatL2(vectors.shape[1])
+        self.index = faiss.IndexIVFPQ(quantizer, vectors.shape[1], nlist, self.m, self.nbits)
+        self.index.train(vectors)
+        self.index.add(vectors)
+        self.index.nprobe = self.nprobe
+        return self
+
+    @classmethod
+    def from_chroma(cls, db, **kwargs):
+        """
+        Constrói o índice a partir dos vetores já gravados na coleção Chroma (sem novas chamadas
+        ao modelo de embedding).
+
+        Args:
+            db (Chroma): Banco de dados vetorial.
+            **kwargs: Parâmetros de `IVFPQIndex`.
+
+        Returns:
+            IVFPQIndex: Índice construído.
+        """
+        return cls(**kwargs).build_from_chroma(db)
+
+    def build_from_chroma(self, db):
+        """
+        Treina e preenche o índice, com os parâmetros atuais, a partir dos vetores gravados na
+        coleção Chroma. Usado também para reconstruí-lo depois que a coleção muda.
+
+        Args:
+            db (Chroma): Banco de dados vetorial.
+
+        Returns:
+            IVFPQIndex: O próprio índice.
+        """
+        items = db.get(include=["embeddings"])
+        return self.build(items["ids"], items["embeddings"])
+
+    def search(self, query_embedding, k=5):
+        """
+        Busca aproximada pelos vizinhos mais próximos.
+
+        Args:
+            query_embedding (List[float]): Vetor da consulta.
+            k (int): Número de resultados.
+
+        Returns:
+            List[Tuple[str, float]]: IDs dos chunks e distâncias L2 aproximadas.
+        """
+        if self.index is None:
+            return []
+
+        query = np.asarray([query_embedding], dtype=np.float32)
+        distances, positions = self.index.search(query, k)
+        return [(self.ids[position], float(distance)) for position, distance in zip(positions[0], distances[0]) if position != -1]
+
+    def similarity_search_with_score(self, db, query_embedding, k=5):
+        """
+        Busca aproximada com o mesmo formato de retorno de `Chroma.similarity_search_with_score`.
+
+        Args:
+            db (Chroma): Banco de dados vetorial de onde os documentos são lidos.
+            query_embedding (List[float]): Vetor da consulta.
+            k (int): Número de resultados.
+
+        Returns:
+            List[Tuple[Document, float]]: Documentos encontrados e suas distâncias.
+        """
+        hits = self.search(query_embedding, k)
+        if not hits:
+            return []
+
+        items = db.get(ids=[chunk_id for chunk_id, _ in hits], include=["documents", "metadatas"])
+        documents = {
+            chunk_id: Document(page_content=text, metadata=metadata or {})
+            for chunk_id, text, metadata in zip(items["ids"], items["documents"], items["metadatas"])
+        }
+        return [(documents[chunk_id], distance) for chunk_id, distance in hits if chunk_id in documents]
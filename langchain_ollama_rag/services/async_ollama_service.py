@@ -0,0 +1,143 @@
+import time
+import asyncio
+import weakref
+from embedding.embedding_cache import normalize_text
+from services.ollama_services import OllamaService
+from services.rerank_service import estimate_tokens
+from services.tracing import get_tracer
+
+
+class AsyncOllamaService:
+    def __init__(self, service=None, max_concurrent_generations=2):
+        """
+        Variante assíncrona do caminho de consulta do `OllamaService`, para servir várias
+        perguntas ao mesmo tempo em um único event loop.
+
+        - O embedding da pergunta e a geração são chamadas assíncronas ao Ollama.
+        - A busca no Chroma (e o BM25/re-ranking) roda em threads com `asyncio.to_thread`.
+        - Perguntas idênticas (após normalização) em andamento compartilham uma única geração.
+        - Um semáforo limita as gerações simultâneas, para não sobrecarregar o servidor local:
+          o Ollama atende poucas gerações em paralelo (OLLAMA_NUM_PARALLEL) e enfileira as demais.
+
+        O serviço pode ser criado fora de um event loop e usado em vários (ex.: um `asyncio.run` por
+        chamada): o semáforo, o lock e as consultas em andamento são criados sob demanda para cada loop.
+
+        Args:
+            service (OllamaService): Serviço síncrono cujos handles (Chroma, BM25, LLM, template) são
+                compartilhados (padrão: um novo `OllamaService`).
+            max_concurrent_generations (int): Máximo de gerações enviadas ao Ollama ao mesmo tempo.
+        """
+        self.service = service or OllamaService()
+        self.max_concurrent_generations = max_concurrent_generations
+        self.stats = {"requests": 0, "generations": 0, "coalesced": 0, "waiting": 0, "peak_waiting": 0}
+
+        # Primitivas de sincronização e consultas em andamento de cada event loop (`_loop_state`)
+        self._loop_states = weakref.WeakKeyDictionary()
+        self._opened = False
+
+    def _loop_state(self):
+        """
+        Estado do event loop em execução: as primitivas do asyncio ficam presas ao loop em que
+        são usadas pela primeira vez, e as tarefas de um loop encerrado nunca terminam.
+
+        Returns:
+            dict: `generation_slots` (semáforo das gerações), `open_lock` e `in_flight` (consultas
+            em andamento, indexadas pela pergunta normalizada).
+        """
+        loop = asyncio.get_running_loop()
+        state = self._loop_states.get(loop)
+
+        if state is None:
+            # Descarta o estado (e as tarefas pendentes) dos loops já encerrados
+            for closed_loop in [other for other in self._loop_states if other.is_closed()]:
+                del self._loop_states[closed_loop]
+
+            state = self._loop_states[loop] = {
+                "generation_slots": asyncio.Semaphore(self.max_concurrent_generations),
+                "open_lock": asyncio.Lock(),
+                "in_flight": {},
+            }
+        return state
+
+    async def open(self):
+        """
+        Abre os handles do serviço síncrono uma única vez, fora do event loop, antes que várias
+        threads da busca tentem criá-los ao mesmo tempo.
+        """
+        async with self._loop_state()["open_lock"]:
+            if not self._opened:
+                await asyncio.to_thread(self._open_handles)
+                self._opened = True
+
+    def _open_handles(self):
+        self.service.get_database()
+        self.service.get_model()
+        self.service.get_prompt_template()
+        if self.service.use_hybrid:
+            self.service.get_bm25_index()
+
+    async def invoke_model(self, question_text):
+        """
+        Responde à pergunta. Se a mesma pergunta já estiver sendo respondida, aguarda o resultado
+        da consulta em andamento em vez de iniciar outra.
+
+        Args:
+            question_text (str): Texto da pergunta a ser feita ao modelo.
+
+        Returns:
+            str: Resposta gerada pelo modelo Ollama.
+        """
+        self.stats["requests"] += 1
+        key = normalize_text(question_text).lower()
+        in_flight = self._loop_state()["in_flight"]
+        task = in_flight.get(key)
+
+        if task is None:
+            self.stats["generations"] += 1
+            task = asyncio.ensure_future(self._answer(question_text))
+            in_flight[key] = task
+            task.add_done_callback(lambda done: in_flight.pop(key) if in_flight.get(key) is done else None)
+        else:
+            self.stats["coalesced"] += 1
+
+        # O cancelamento de quem espera não cancela a consulta compartilhada
+        return await asyncio.shield(task)
+
+    async def _answer(self, question_text):
+        tracer = get_tracer()
+        await self.open()
+        generation_slots = self._loop_state()["generation_slots"]
+
+        with tracer.span("query", mode="async"):
+            # Embedding assíncrono da pergunta e busca no Chroma em uma thread
+            query_embedding = await self.service.get_embedding_function().aembed_query(question_text)
+            results = await asyncio.to_thread(self.service.retrieve_context, question_text, query_embedding)
+
+            with tracer.span("prompt.build") as span:
+                prompt = self.service.build_prompt(question_text, results)
+                span.set(bytes=len(prompt.encode("utf-8")), tokens=estimate_tokens(prompt))
+
+            # Aguarda uma vaga de geração (controle de admissão) antes de chamar o modelo
+            self.stats["waiting"] += 1
+            self.stats["peak_waiting"] = max(self.stats["peak_waiting"], self.stats["waiting"])
+            try:
+                with tracer.span("llm.queue"):
+                    await generation_slots.acquire()
+            finally:
+                self.stats["waiting"] -= 1
+
+            try:
+                with tracer.span("llm.completion", model=self.service.model_id) as span:
+                    start_time = time.perf_counter()
+                    response_parts = []
+                    async for text_part in self.service.get_model().astream(prompt):
+                        if not response_parts:
+                            tracer.record("llm.first_token", time.perf_counter() - start_time, model=self.service.model_id)
+                        response_parts.append(text_part)
+
+                    response_text = "".join(response_parts)
+                    span.set(bytes=len(response_text.encode("utf-8")), tokens=estimate_tokens(response_text))
+            finally:
+                generation_slots.release()
+
+        return response_text
@@ -0,0 +1,176 @@
+import os, re, json, math, unicodedata
+from collections import Counter
+
+BM25_INDEX_VERSION = 1
+
+def tokenize(text):
+    """
+    Divide o texto em termos para o índice léxico: minúsculas, sem acentos, apenas letras e números.
+
+    Args:
+        text (str): Texto original.
+
+    Returns:
+        List[str]: Termos do texto.
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r"[a-z0-9]+", text)
+
+class BM25Index:
+    def __init__(self, index_path, k1=1.5, b=0.75):
+        """
+        Índice invertido BM25 (Okapi) dos chunks, mantido ao lado do Chroma com os mesmos IDs
+        de `calculate_chunk_ids` e atualizado de forma incremental pelo `ChromaWriter`.
+
+        Args:
+            index_path (str): Caminho do arquivo JSON do índice.
+            k1 (float): Saturação da frequência do termo.
+            b (float): Peso da normalização pelo tamanho do chunk.
+        """
+        self.index_path = index_path
+        self.k1 = k1
+        self.b = b
+        self.documents = {}  # ID do chunk -> {"length": n, "terms": {termo: frequência}}
+        self.postings = {}  # termo -> {ID do chunk: frequência}
+        self.total_length = 0
+
+    @classmethod
+    def load(cls, index_path, **kwargs):
+        """
+        Carrega o índice do disco; um arquivo ausente ou de outra versão resulta em um índice vazio.
+
+        Args:
+            index_path (str): Caminho do arquivo JSON do índice.
+
+        Returns:
+            BM25Index: Índice carregado.
+        """
+        index = cls(index_path, **kwargs)
+
+        try:
+            with open(index_path, "r", encoding="utf-8") as index_file:
+                data = json.load(index_file)
+
+            if data.get("version") == BM25_INDEX_VERSION:
+                for doc_id, document in data["documents"].items():
+                    index._insert(doc_id, document["length"], document["terms"])
+
+        except (OSError, ValueError):
+            pass
+
+        return index
+
+    def save(self):
+        """
+        Grava o índice de forma atômica (arquivo temporário + rename).
+        """
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        temporary_path = f"{self.index_path}.tmp"
+
+        with open(temporary_path, "w", encoding="utf-8") as index_file:
+            json.dump({"version": BM25_INDEX_VERSION, "documents": self.documents}, index_file)
+
+        os.replace(temporary_path, self.index_path)
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.documents
+
+    def _insert(self, doc_id, length, terms):
+        # Registra o chunk nas estruturas em memória
+        self.documents[doc_id] = {"length": length, "terms": terms}
+        self.total_length += length
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = frequency
+
+    def add(self, doc_id, text):
+        """
+        Adiciona (ou substitui) um chunk no índice.
+
+        Args:
+            doc_id (str): ID do chunk.
+            text (str): Conteúdo do chunk.
+        """
+        self.remove(doc_id)
+        tokens = tokenize(text)
+        self._insert(doc_id, len(tokens), dict(Counter(tokens)))
+
+    def remove(self, doc_id):
+        """
+        Remove um chunk do índice, se existir.
+
+        Args:
+            doc_id (str): ID do chunk.
+        """
+        document = self.documents.pop(doc_id, None)
+        if document is None:
+            return
+
+        self.total_length -= document["length"]
+        for term in document["terms"]:
+            postings = self.postings.get(term, {})
+            postings.pop(doc_id, None)
+            if not postings:
+                self.postings.pop(term, None)
+
+    def search(self, query, k=5):
+        """
+        Busca os chunks com maior pontuação BM25 para a consulta.
+
+        Args:
+            query (str): Texto da consulta.
+            k (int): Número de resultados.
+
+        Returns:
+            List[Tuple[str, float]]: IDs dos chunks e suas pontuações, da maior para a menor.
+        """
+        if not self.documents:
+            return []
+
+        return self._scores(query).most_common(k)
+
+    @classmethod
+    def score(cls, texts, query, k1=1.5, b=0.75):
+        """
+        Pontua textos avulsos com BM25, usando apenas eles como coleção (ex.: os candidatos de
+        uma busca, no re-ranking), sem gravar nada em disco.
+
+        Args:
+            texts (List[str]): Textos a pontuar.
+            query (str): Texto da consulta.
+            k1 (float): Saturação da frequência do termo.
+            b (float): Peso da normalização pelo tamanho do texto.
+
+        Returns:
+            List[float]: Pontuação de cada texto, na mesma ordem (0 para os que não têm termos da consulta).
+        """
+        if not texts:
+            return []
+
+        index = cls(None, k1=k1, b=b)
+        for position, text in enumerate(texts):
+            index.add(position, text)
+
+        scores = index._scores(query)
+        return [scores.get(position, 0.0) for position in range(len(texts))]
+
+    def _scores(self, query):
+        # Pontuação BM25 de cada chunk que contém algum termo da consulta
+        document_count = len(self.documents)
+        average_length = self.total_length / document_count
+        scores = Counter()
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                length_norm = 1 - self.b + self.b * self.documents[doc_id]["length"] / average_length
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+
+        return scores
@@ -1,63 +1,246 @@
-import os, shutil
+import os, shutil, hashlib
 from langchain_chroma import Chroma 
 from embedding.embedding_models import get_embedding_ollama
+from services.embedding_pipeline import EmbeddingPipeline
+from services.bm25_index import BM25Index
+from services.tracing import get_tracer
 
 CHROMA_PATH = "./chroma"
 
+# Manifesto de ingestão fica dentro do diretório do Chroma, para ser apagado junto com ele
+MANIFEST_PATH = os.path.join(CHROMA_PATH, "manifest.json")
+
+# Índice léxico BM25, mantido com os mesmos IDs de chunk do Chroma
+BM25_INDEX_PATH = os.path.join(CHROMA_PATH, "bm25_index.json")
+
+# Parâmetros do índice HNSW do Chroma. `hnsw:space`, `hnsw:M` e `hnsw:construction_ef` só têm
+# efeito na criação da coleção: para alterá-los, recrie o banco (clear_database + ingestão, que
+# reaproveita o cache de embeddings). Use benchmarks/ann_benchmark.py para escolher os valores.
+HNSW_CONFIG = {
+    "hnsw:space": "l2",  # Métrica de distância (l2, cosine ou ip)
+    "hnsw:M": 16,  # Vizinhos por nó do grafo: mais memória e recall
+    "hnsw:construction_ef": 100,  # Largura da busca na construção: ingestão mais lenta, grafo melhor
+    "hnsw:search_ef": 10,  # Largura da busca na consulta: mais recall, consultas mais lentas
+}
+
 def clear_database():
     if os.path.exists(CHROMA_PATH):
         shutil.rmtree(CHROMA_PATH)
 
+def get_chroma_db(embedding_function=None, hnsw_config=None):
+    """
+    Abre a coleção Chroma com os parâmetros HNSW configurados.
+
+    Args:
+        embedding_function (Embeddings): Função de embedding (padrão: `get_embedding_ollama()`).
+        hnsw_config (dict): Parâmetros HNSW que substituem os de `HNSW_CONFIG`.
+
+    Returns:
+        Chroma: Banco de dados vetorial.
+    """
+    return Chroma(
+        persist_directory=CHROMA_PATH,
+        embedding_function=embedding_function or get_embedding_ollama(),
+        collection_metadata={**HNSW_CONFIG, **(hnsw_config or {})},
+    )
+
+def calculate_chunk_hash(text):
+    """
+    Calcula o hash SHA-256 do conteúdo de um chunk.
+
+    Args:
+        text (str): Conteúdo do chunk.
+
+    Returns:
+        str: Hash hexadecimal do conteúdo.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
 def calculate_chunk_ids(chunks):
+    """
+    Calcula IDs endereçados por conteúdo no formato `source:page:hash`. Como o ID não depende
+    da posição do chunk na página, inserir ou remover um chunk não altera os IDs dos demais.
+    Chunks idênticos na mesma página recebem um sufixo `:n` a partir da segunda ocorrência.
 
-    last_page_id = None
-    current_chunk_index = 0
+    Args:
+        chunks (List[Document]): Lista de chunks.
+
+    Returns:
+        List[Document]: Os mesmos chunks, com `id` e `chunk_hash` nos metadados.
+    """
+    seen_ids = {}
 
     for chunk in chunks:
         source = chunk.metadata.get("source")
         page = chunk.metadata.get("page")
-        current_page_id = f"{source}:{page}"
-
-        # If the page ID is the same as the last one, increment the index.
-        if current_page_id == last_page_id:
-            current_chunk_index += 1
-        else:
-            current_chunk_index = 0
+        chunk_hash = calculate_chunk_hash(chunk.page_content)
 
         # Calculate the chunk ID.
-        chunk_id = f"{current_page_id}:{current_chunk_index}"
-        last_page_id = current_page_id
+        chunk_id = f"{source}:{page}:{chunk_hash[:16]}"
+
+        # If the same content already appeared on this page, add an occurrence suffix.
+        occurrence = seen_ids.get(chunk_id, 0)
+        seen_ids[chunk_id] = occurrence + 1
+        if occurrence:
+            chunk_id = f"{chunk_id}:{occurrence}"
 
         # Add it to the page meta-data.
         chunk.metadata["id"] = chunk_id
+        chunk.metadata["chunk_hash"] = chunk_hash
 
     return chunks
 
-def add_to_chroma(chunks):
+def sync_bm25_index(db, bm25_index, existing_ids=None, batch_size=1000):
+    """
+    Alinha o índice BM25 aos chunks da coleção Chroma: inclui os que faltam (ex.: gravados antes
+    da existência do índice, ou com o arquivo do índice apagado) lendo seus textos do Chroma em
+    lotes, e remove os que não estão mais na coleção.
+
+    Args:
+        db (Chroma): Banco de dados vetorial.
+        bm25_index (BM25Index): Índice léxico a ser alinhado.
+        existing_ids (set[str]): IDs da coleção, se já lidos pelo chamador.
+        batch_size (int): Número de chunks lidos do Chroma por chamada.
+
+    Returns:
+        int: Número de chunks incluídos ou removidos do índice.
+    """
+    if existing_ids is None:
+        existing_ids = set(db.get(include=[])["ids"])
+
+    stale_ids = [doc_id for doc_id in bm25_index.documents if doc_id not in existing_ids]
+    for doc_id in stale_ids:
+        bm25_index.remove(doc_id)
+
+    missing_ids = [doc_id for doc_id in existing_ids if doc_id not in bm25_index]
+    for start in range(0, len(missing_ids), batch_size):
+        items = db.get(ids=missing_ids[start:start + batch_size], include=["documents"])
+        for doc_id, text in zip(items["ids"], items["documents"]):
+            bm25_index.add(doc_id, text or "")
+
+    if missing_ids or stale_ids:
+        print(f"👉 Índice BM25 alinhado ao Chroma: {len(missing_ids)} chunks incluídos, {len(stale_ids)} removidos")
+    return len(missing_ids) + len(stale_ids)
+
+def get_chunk_ids_by_source(sources):
+    """
+    Retorna os IDs dos chunks do banco de dados que vieram de cada arquivo informado.
+    Usado para arquivos que ainda não constam do manifesto de ingestão.
+
+    Args:
+        sources (Iterable[str]): Caminhos dos arquivos PDF (metadado `source`).
+
+    Returns:
+        dict[str, set[str]]: IDs dos chunks de cada arquivo.
+    """
+    db = get_chroma_db()
+    return {source: set(db.get(where={"source": source}, include=[])["ids"]) for source in sources}
+
+class ChromaWriter:
+    def __init__(self, pipeline=None, buffer_size=512):
+        """
+        Grava chunks no Chroma e no índice BM25 aos poucos, à medida que os PDFs são lidos e
+        divididos. Os chunks novos ficam em um buffer de até `buffer_size` itens antes de seguirem
+        para o pipeline de embeddings, de modo que a memória não cresce com o tamanho do corpus.
+        O índice BM25 é lido uma vez, alinhado aos chunks já gravados no Chroma (`sync_bm25_index`)
+        e salvo em `close()`.
+
+        Args:
+            pipeline (EmbeddingPipeline): Etapa de embeddings em lotes (padrão: configuração padrão do pipeline).
+            buffer_size (int): Número de chunks novos acumulados antes de cada chamada ao pipeline.
+        """
+        embedding_function = get_embedding_ollama()
+        self.db = get_chroma_db(embedding_function)
+        self.pipeline = pipeline or EmbeddingPipeline(embedding_function)
+        self.buffer_size = buffer_size
+        self.stats = {"added": 0, "skipped": 0, "removed": 0}
+
+        # Obtém os documentos existentes no banco de dados.
+        self.existing_ids = set(self.db.get(include=[])["ids"])  # IDs são incluídos por padrão
+        print(f"Number of existing documents in DB: {len(self.existing_ids)}")
+
+        self.bm25_index = BM25Index.load(BM25_INDEX_PATH)
+        sync_bm25_index(self.db, self.bm25_index, self.existing_ids)
+        self._pending = []
+
+    def add(self, chunks):
+        """
+        Enfileira os chunks que ainda não existem no banco de dados e atualiza o índice BM25.
+
+        Args:
+            chunks (List[Document]): Chunks com o `id` já definido nos metadados (`calculate_chunk_ids`).
+        """
+        for chunk in chunks:
+            chunk_id = chunk.metadata["id"]
+
+            # Os chunks já gravados entraram no BM25 em `sync_bm25_index`: aqui entram os novos
+            if chunk_id not in self.bm25_index:
+                self.bm25_index.add(chunk_id, chunk.page_content)
+
+            if chunk_id in self.existing_ids:
+                self.stats["skipped"] += 1
+                continue
+
+            self.existing_ids.add(chunk_id)
+            self._pending.append(chunk)
+
+            if len(self._pending) >= self.buffer_size:
+                self.flush()
+
+    def remove(self, stale_ids):
+        """
+        Remove do banco de dados e do índice BM25 os chunks órfãos de versões anteriores dos arquivos.
+
+        Args:
+            stale_ids (Iterable[str]): IDs dos chunks a serem removidos.
+        """
+        stale_ids = list(stale_ids)
+        for chunk_id in stale_ids:
+            self.bm25_index.remove(chunk_id)
+
+        stale_db_ids = [chunk_id for chunk_id in stale_ids if chunk_id in self.existing_ids]
+        if stale_db_ids:
+            print(f"🗑️ Removing stale documents: {len(stale_db_ids)}")
+            with get_tracer().span("vector.write", operation="delete", chunks=len(stale_db_ids)):
+                self.db.delete(ids=stale_db_ids)
+            self.existing_ids.difference_update(stale_db_ids)
+            self.stats["removed"] += len(stale_db_ids)
+
+    def flush(self):
+        """
+        Gera os embeddings dos chunks do buffer e os grava no Chroma.
+        """
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, []
+        print(f"👉 Adding new documents: {len(pending)}")
+        self.stats["added"] += self.pipeline.run(self.db, pending)
+
+    def close(self):
+        """
+        Grava os chunks restantes no buffer e salva o índice BM25.
+        """
+        self.flush()
+        if not self.stats["added"]:
+            print("✅ No new documents to add")
+        self.bm25_index.save()
+
+def add_to_chroma(chunks, stale_ids=None, pipeline=None):
     """
     Adiciona os chunks de documentos ao banco de dados Chroma. Apenas chunks novos, 
     que ainda não existem no banco de dados, são adicionados.
 
     Args:
         chunks (List[Document]): Lista de chunks a serem adicionados ao banco de dados.
+        stale_ids (Iterable[str]): IDs órfãos (de versões anteriores dos arquivos) a serem removidos.
+        pipeline (EmbeddingPipeline): Etapa de embeddings em lotes (padrão: configuração padrão do pipeline).
     """
-    # Carrega a base de dados existente.
-    db = Chroma(persist_directory=CHROMA_PATH, embedding_function=get_embedding_ollama())
+    writer = ChromaWriter(pipeline)
 
     # Calculate Page IDs.
-    chunks_with_ids = calculate_chunk_ids(chunks)
-
-    # Obtém os documentos existentes no banco de dados.
-    existing_items = db.get(include=[])  # IDs são incluídos por padrão
-    existing_ids = set(existing_items["ids"])
-    print(f"Number of existing documents in DB: {len(existing_ids)}")
-
-    # Adiciona apenas os documentos que ainda não estão no banco de dados.
-    new_chunks = [chunk for chunk in chunks_with_ids if chunk.metadata["id"] not in existing_ids]
-
-    if len(new_chunks):
-        print(f"👉 Adding new documents: {len(new_chunks)}")
-        new_chunk_ids = [chunk.metadata["id"] for chunk in new_chunks]
-        db.add_documents(new_chunks, ids=new_chunk_ids)
-    else:
-        print("✅ No new documents to add")
\ No newline at end of file
+    writer.add(calculate_chunk_ids(chunks))
+
+    # Remove os chunks órfãos que ainda estão no banco de dados.
+    writer.remove(stale_ids or [])
+    writer.close()
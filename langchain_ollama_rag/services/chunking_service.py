@@ -0,0 +1,353 @@
+import os, re, math, time
+from collections import Counter
+from functools import lru_cache
+from langchain.schema.document import Document
+
+# Tokenizador usado para medir os chunks. Opções:
+#   "estimate"                 -> aproximação por palavras, sem dependências (padrão). NÃO são tokens
+#                                  do modelo: a contagem real do nomic-embed-text é diferente, então
+#                                  `chunk_tokens` é apenas um tamanho aproximado
+#   "hf:<modelo ou tokenizer.json>" -> tokenizador do Hugging Face (pacote `tokenizers`),
+#                                  ex.: "hf:nomic-ai/nomic-embed-text-v1.5" para medir em tokens do modelo de embeddings
+#   "tiktoken:<encoding>"      -> encoding do tiktoken, ex.: "tiktoken:cl100k_base"
+# O padrão não depende de rede nem de pacotes opcionais, para que a divisão (e os IDs dos chunks) seja a
+# mesma em qualquer máquina; trocar o tokenizador força a reingestão pelo manifesto.
+CHUNK_TOKENIZER = os.environ.get("CHUNK_TOKENIZER", "estimate")
+
+# Versão do algoritmo de divisão: alterá-la (ou os parâmetros do chunker) força a reingestão pelo manifesto
+CHUNKER_VERSION = 3
+
+# Títulos de seção: linhas numeradas ("3.2 Pontuação"), em caixa alta ("FIM DO JOGO") ou em Markdown ("## Preparação").
+# Linhas sem nenhuma letra (ex.: números de página como "123") não são títulos.
+HEADING_PATTERN = re.compile(r"^(?:#{1,6}\s+\S.*|\d+(?:\.\d+)*[.)]?\s+[A-ZÀ-Ý]\S*(?:\s+\S+){0,8}|(?=[^A-ZÀ-Ý]*[A-ZÀ-Ý])[A-ZÀ-Ý0-9][A-ZÀ-Ý0-9 ,:&'\-]{2,78})$")
+
+# Números dentro de uma linha, trocados por "#" ao comparar cabeçalhos e rodapés entre páginas ("Página 3" = "Página 7")
+DIGITS_PATTERN = re.compile(r"\d+")
+
+# Fim de frase seguido de espaço: ponto de corte preferido dentro de um parágrafo
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;])\s+")
+
+# Termos da aproximação: palavras e sinais de pontuação isolados
+ESTIMATE_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+class EstimateTokenizer:
+    # Aproxima um tokenizador de subpalavras: um token por sinal e um a cada 4 caracteres de cada palavra
+    name = "estimate"
+
+    def count_batch(self, texts):
+        return [sum(math.ceil(len(term) / 4) for term in ESTIMATE_PATTERN.findall(text)) for text in texts]
+
+class HuggingFaceTokenizer:
+    def __init__(self, name):
+        """
+        Tokenizador do pacote `tokenizers`, carregado de um arquivo tokenizer.json local ou do Hub.
+
+        Args:
+            name (str): Caminho do tokenizer.json ou identificador do modelo no Hugging Face Hub.
+        """
+        try:
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError("O tokenizador 'hf:' requer o pacote tokenizers") from e
+
+        self.name = f"hf:{name}"
+        self.tokenizer = Tokenizer.from_file(name) if os.path.isfile(name) else Tokenizer.from_pretrained(name)
+
+    def count_batch(self, texts):
+        # encode_batch tokeniza a lista inteira em paralelo (código nativo)
+        return [len(encoding.ids) for encoding in self.tokenizer.encode_batch(list(texts), add_special_tokens=False)]
+
+class TiktokenTokenizer:
+    def __init__(self, encoding_name):
+        """
+        Tokenizador do pacote `tiktoken`.
+
+        Args:
+            encoding_name (str): Nome do encoding (ex.: "cl100k_base").
+        """
+        try:
+            import tiktoken
+        except ImportError as e:
+            raise ImportError("O tokenizador 'tiktoken:' requer o pacote tiktoken") from e
+
+        self.name = f"tiktoken:{encoding_name}"
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+    def count_batch(self, texts):
+        return [len(tokens) for tokens in self.encoding.encode_ordinary_batch(list(texts))]
+
+@lru_cache(maxsize=None)
+def load_tokenizer(spec=CHUNK_TOKENIZER):
+    """
+    Carrega o tokenizador apenas uma vez por processo (o vocabulário do Hugging Face leva centenas
+    de milissegundos para ser lido).
+
+    Args:
+        spec (str): Tokenizador no formato de CHUNK_TOKENIZER.
+
+    Returns:
+        Objeto com `name` e `count_batch(texts) -> List[int]`.
+    """
+    backend, _, name = spec.partition(":")
+
+    if backend == "estimate":
+        return EstimateTokenizer()
+    if backend == "hf":
+        return HuggingFaceTokenizer(name)
+    if backend == "tiktoken":
+        return TiktokenTokenizer(name)
+
+    raise ValueError(f"Tokenizador inválido: {spec}. Use 'estimate', 'hf:<modelo>' ou 'tiktoken:<encoding>'")
+
+class TokenCounter:
+    def __init__(self, tokenizer, max_entries=50000):
+        """
+        Conta tokens em lote, com cache por texto: cabeçalhos, rodapés e frases repetidas entre
+        páginas são tokenizados uma única vez.
+
+        Args:
+            tokenizer: Tokenizador retornado por `load_tokenizer`.
+            max_entries (int): Máximo de textos mantidos no cache.
+        """
+        self.tokenizer = tokenizer
+        self.max_entries = max_entries
+        self._counts = {}
+
+    def count_batch(self, texts):
+        """
+        Conta os tokens de cada texto, tokenizando em uma única chamada apenas os que não estão em cache.
+
+        Args:
+            texts (List[str]): Textos a medir.
+
+        Returns:
+            List[int]: Número de tokens de cada texto.
+        """
+        missing = list({text for text in texts if text not in self._counts})
+
+        if missing:
+            if len(self._counts) + len(missing) > self.max_entries:
+                self._counts.clear()
+            self._counts.update(zip(missing, self.tokenizer.count_batch(missing)))
+
+        return [self._counts[text] for text in texts]
+
+    def count(self, text):
+        return self.count_batch([text])[0]
+
+class TokenChunker:
+    def __init__(self, chunk_tokens=200, overlap_tokens=20, min_chunk_tokens=50, tokenizer=None):
+        """
+        Divide os documentos em chunks medidos em tokens (do tokenizador configurado; o padrão é uma
+        aproximação), sem atravessar páginas e começando um novo chunk a cada título de seção.
+        Cabeçalhos e rodapés repetidos nas páginas de um mesmo arquivo não contam como títulos.
+
+        Cada página é segmentada em frases; todas as frases de todos os documentos são medidas em
+        um único lote e depois agrupadas até `chunk_tokens`. Os chunks consecutivos de uma mesma
+        seção repetem as últimas frases do anterior (até `overlap_tokens`). A divisão é
+        determinística, então `calculate_chunk_ids` produz os mesmos IDs para o mesmo conteúdo.
+
+        Args:
+            chunk_tokens (int): Máximo de tokens por chunk.
+            overlap_tokens (int): Máximo de tokens repetidos do chunk anterior da mesma seção.
+            min_chunk_tokens (int): Abaixo deste tamanho, um título não encerra o chunk atual (evita chunks minúsculos).
+            tokenizer: Tokenizador (padrão: `load_tokenizer()` com CHUNK_TOKENIZER).
+        """
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_chunk_tokens = min_chunk_tokens
+        self.counter = TokenCounter(tokenizer or load_tokenizer())
+        self.stats = {}
+
+    def settings(self):
+        """
+        Parâmetros que determinam a divisão, registrados no manifesto de ingestão.
+
+        Returns:
+            dict: Versão, tokenizador e tamanhos.
+        """
+        return {
+            "version": CHUNKER_VERSION,
+            "tokenizer": self.counter.tokenizer.name,
+            "chunk_tokens": self.chunk_tokens,
+            "overlap_tokens": self.overlap_tokens,
+            "min_chunk_tokens": self.min_chunk_tokens,
+        }
+
+    @staticmethod
+    def running_lines(documents):
+        """
+        Encontra os cabeçalhos e rodapés de página: linhas (com os números normalizados) que se repetem
+        em pelo menos duas páginas e em pelo menos metade das páginas do mesmo arquivo.
+
+        Args:
+            documents (List[Document]): Páginas carregadas dos PDFs.
+
+        Returns:
+            dict[str, set[str]]: Linhas normalizadas repetidas, por arquivo de origem (metadado `source`).
+        """
+        pages_by_source = Counter(document.metadata.get("source") for document in documents)
+        line_pages = {}
+
+        for document in documents:
+            lines = {DIGITS_PATTERN.sub("#", line.strip()) for line in document.page_content.splitlines() if line.strip()}
+            line_pages.setdefault(document.metadata.get("source"), Counter()).update(lines)
+
+        return {
+            source: {line for line, pages in counts.items() if pages >= 2 and pages * 2 >= pages_by_source[source]}
+            for source, counts in line_pages.items()
+        }
+
+    def segment(self, text, running_lines=frozenset()):
+        """
+        Segmenta o texto de uma página em unidades (frases ou títulos).
+
+        Args:
+            text (str): Texto da página.
+            running_lines (set[str]): Cabeçalhos e rodapés do arquivo (ver `running_lines`), removidos do texto.
+
+        Returns:
+            List[tuple[str, str, bool]]: Separador que precede a unidade, texto da unidade e se é um título.
+        """
+        units = []
+        separator = ""
+
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                separator = "\n\n" if units else ""
+                continue
+
+            # Cabeçalhos e rodapés de página não são conteúdo: nem títulos nem continuação da frase anterior
+            if DIGITS_PATTERN.sub("#", line) in running_lines:
+                continue
+
+            if HEADING_PATTERN.match(line) and not line.endswith("."):
+                units.append((separator, line, True))
+                separator = "\n"
+                continue
+
+            # Linhas quebradas pelo PDF no meio de uma frase continuam a frase anterior
+            sentences = SENTENCE_BOUNDARY.split(line)
+            if units and separator == "\n" and not units[-1][2] and not units[-1][1].endswith((".", "!", "?", ":", ";")):
+                previous_separator, previous_text, _ = units.pop()
+                units.append((previous_separator, f"{previous_text} {sentences[0]}", False))
+                sentences = sentences[1:]
+
+            for sentence in sentences:
+                units.append((separator, sentence, False))
+                separator = " "
+            separator = "\n"
+
+        return units
+
+    def split_oversized(self, text):
+        """
+        Divide uma frase maior que `chunk_tokens` em partes de palavras inteiras que cabem no limite.
+
+        Args:
+            text (str): Frase a dividir.
+
+        Returns:
+            List[str]: Partes da frase.
+        """
+        words = text.split(" ")
+        if len(words) == 1:
+            return [text]
+
+        middle = len(words) // 2
+        parts = []
+        for part in (" ".join(words[:middle]), " ".join(words[middle:])):
+            parts.extend([part] if self.counter.count(part) <= self.chunk_tokens else self.split_oversized(part))
+        return parts
+
+    def pack(self, document, units, counts, section=None):
+        """
+        Agrupa as unidades de uma página em chunks de até `chunk_tokens`.
+
+        Args:
+            document (Document): Página de origem (os metadados são copiados para os chunks).
+            units (List[tuple[str, str, bool]]): Unidades da página (ver `segment`).
+            counts (List[int]): Tokens de cada unidade.
+            section (Optional[str]): Último título das páginas anteriores do mesmo arquivo, que vale
+                para o texto do topo da página até o primeiro título.
+
+        Returns:
+            List[Document]: Chunks da página.
+        """
+        chunks = []
+        current, current_tokens = [], 0
+
+        def flush():
+            if current:
+                text = "".join(separator + unit for separator, unit, _tokens in current).strip()
+                chunks.append(Document(page_content=text, metadata={**document.metadata, "section": section or "", "tokens": current_tokens}))
+
+        for (separator, unit, is_heading), tokens in zip(units, counts):
+            if is_heading:
+                # Um título inicia um novo chunk, a menos que o atual ainda seja pequeno demais
+                if current_tokens >= self.min_chunk_tokens:
+                    flush()
+                    current, current_tokens = [], 0
+                section = unit
+
+            pieces = [(separator, unit, tokens)]
+            if tokens > self.chunk_tokens:
+                pieces = [(separator if index == 0 else " ", part, self.counter.count(part))
+                          for index, part in enumerate(self.split_oversized(unit))]
+
+            for piece_separator, piece, piece_tokens in pieces:
+                if current and current_tokens + piece_tokens > self.chunk_tokens:
+                    flush()
+
+                    # Repete as últimas unidades do chunk anterior, dentro do limite de sobreposição
+                    overlap, overlap_tokens = [], 0
+                    for previous in reversed(current):
+                        if overlap_tokens + previous[2] > self.overlap_tokens or overlap_tokens + previous[2] + piece_tokens > self.chunk_tokens:
+                            break
+                        overlap.insert(0, previous)
+                        overlap_tokens += previous[2]
+                    current, current_tokens = overlap, overlap_tokens
+
+                current.append((piece_separator, piece, piece_tokens))
+                current_tokens += piece_tokens
+
+        flush()
+        return chunks
+
+    def split_documents(self, documents):
+        """
+        Divide todas as páginas de uma vez, medindo as frases em um único lote.
+
+        Args:
+            documents (List[Document]): Páginas carregadas dos PDFs.
+
+        Returns:
+            List[Document]: Chunks, com `section` e `tokens` nos metadados.
+        """
+        start_time = time.perf_counter()
+
+        running_lines = self.running_lines(documents)
+        segmented = [self.segment(document.page_content, running_lines.get(document.metadata.get("source"), frozenset()))
+                     for document in documents]
+        counts = iter(self.counter.count_batch([unit for units in segmented for _separator, unit, _heading in units]))
+
+        chunks = []
+        sections = {}
+        for document, units in zip(documents, segmented):
+            # A seção continua de uma página para a seguinte do mesmo arquivo até o próximo título
+            source = document.metadata.get("source")
+            chunks.extend(self.pack(document, units, [next(counts) for _ in units], sections.get(source)))
+            sections[source] = next((unit for _separator, unit, is_heading in reversed(units) if is_heading), sections.get(source))
+
+        elapsed = time.perf_counter() - start_time
+        self.stats = {
+            "pages": len(documents),
+            "chunks": len(chunks),
+            "tokens": sum(chunk.metadata["tokens"] for chunk in chunks),
+            "chunks_per_second": len(chunks) / elapsed if elapsed else 0.0,
+        }
+        print(f"👉 Divisão: {self.stats['chunks']} chunks de {self.stats['pages']} páginas "
+              f"({self.stats['tokens']} tokens, {self.stats['chunks_per_second']:.0f} chunks/s)")
+
+        return chunks
@@ -0,0 +1,103 @@
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from services.tracing import get_tracer
+
+class EmbeddingPipeline:
+    def __init__(self, embedding_function, batch_size=32, max_workers=4, max_retries=3, retry_backoff=1.0):
+        """
+        Etapa de ingestão entre `split_documents` e a escrita no Chroma. Gera os embeddings
+        dos chunks em lotes, com várias requisições simultâneas ao servidor Ollama, e grava
+        cada lote no Chroma assim que seus embeddings ficam prontos.
+
+        Args:
+            embedding_function (Embeddings): Cliente de embeddings (ex.: OllamaEmbeddings).
+            batch_size (int): Número de chunks por lote.
+            max_workers (int): Número de lotes embeddados ao mesmo tempo.
+            max_retries (int): Número de novas tentativas de um lote antes de desistir.
+            retry_backoff (float): Espera inicial (em segundos) entre tentativas, dobrada a cada falha.
+        """
+        self.embedding_function = embedding_function
+        self.batch_size = max(batch_size, 1)
+        self.max_workers = max(max_workers, 1)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    def embed_batch(self, texts):
+        """
+        Gera os embeddings de um lote, tentando novamente em caso de falha.
+
+        Args:
+            texts (List[str]): Textos do lote.
+
+        Returns:
+            List[List[float]]: Embeddings do lote, na mesma ordem dos textos.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                with get_tracer().span("embed", chunks=len(texts), bytes=sum(len(text.encode("utf-8")) for text in texts), attempt=attempt):
+                    return self.embedding_function.embed_documents(texts)
+
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+
+                wait_seconds = self.retry_backoff * (2 ** attempt)
+                print(f"⚠️ Falha ao gerar embeddings do lote ({e}). Nova tentativa em {wait_seconds:.1f}s")
+                time.sleep(wait_seconds)
+
+    def run(self, db, chunks):
+        """
+        Gera os embeddings dos chunks e os grava no Chroma, lote a lote.
+
+        As gravações acontecem na thread chamadora, à medida que os lotes terminam, de modo
+        que apenas as requisições ao Ollama são concorrentes. Um lote que falha em todas as
+        tentativas não interrompe os demais; a exceção é relançada ao final.
+
+        Args:
+            db (Chroma): Banco de dados vetorial de destino.
+            chunks (List[Document]): Chunks com o `id` já definido nos metadados.
+
+        Returns:
+            int: Número de chunks gravados.
+        """
+        batches = [chunks[start:start + self.batch_size] for start in range(0, len(chunks), self.batch_size)]
+        written_chunks = 0
+        failed_batches = []
+        start_time = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Cada lote roda em uma cópia do contexto atual, para que seus spans fiquem sob o span da ingestão
+            futures = {
+                executor.submit(contextvars.copy_context().run, self.embed_batch, [chunk.page_content for chunk in batch]): batch
+                for batch in batches
+            }
+
+            for future in as_completed(futures):
+                batch = futures[future]
+
+                try:
+                    embeddings = future.result()
+
+                except Exception as e:
+                    failed_batches.append(e)
+                    print(f"❌ Lote de {len(batch)} chunks descartado após {self.max_retries + 1} tentativas: {e}")
+                    continue
+
+                # Grava o lote já embeddado diretamente na coleção, sem recalcular os embeddings
+                with get_tracer().span("vector.write", operation="upsert", chunks=len(batch)):
+                    db._collection.upsert(
+                        ids=[chunk.metadata["id"] for chunk in batch],
+                        embeddings=embeddings,
+                        documents=[chunk.page_content for chunk in batch],
+                        metadatas=[chunk.metadata for chunk in batch],
+                    )
+
+                written_chunks += len(batch)
+                elapsed = time.perf_counter() - start_time
+                print(f"👉 {written_chunks}/{len(chunks)} chunks gravados ({written_chunks / elapsed:.1f} chunks/s)")
+
+        if failed_batches:
+            raise RuntimeError(f"{len(failed_batches)} lote(s) de embeddings falharam; {written_chunks}/{len(chunks)} chunks gravados") from failed_batches[0]
+
+        return written_chunks
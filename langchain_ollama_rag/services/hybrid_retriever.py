@@ -0,0 +1,62 @@
+from langchain.schema.document import Document
+
+# Constante da Reciprocal Rank Fusion (valor usual na literatura)
+RRF_K = 60
+
+class HybridRetriever:
+    def __init__(self, db, bm25_index, fetch_k=20, rrf_k=RRF_K):
+        """
+        Combina a busca densa do Chroma com a busca léxica BM25 por Reciprocal Rank Fusion.
+        Termos exatos (ex.: nomes de cartas como "Draw Four") são encontrados pelo BM25 mesmo
+        quando a busca densa não os coloca entre os primeiros, o que permite manter k pequeno.
+
+        Args:
+            db (Chroma): Banco de dados vetorial.
+            bm25_index (BM25Index): Índice léxico com os mesmos IDs de chunk do Chroma.
+            fetch_k (int): Número de candidatos buscados em cada ranking antes da fusão.
+            rrf_k (int): Constante de suavização da fusão.
+        """
+        self.db = db
+        self.bm25_index = bm25_index
+        self.fetch_k = fetch_k
+        self.rrf_k = rrf_k
+
+    def retrieve(self, question_text, k=5, query_embedding=None):
+        """
+        Busca os chunks mais relevantes combinando os dois rankings.
+
+        Args:
+            question_text (str): Texto da pergunta.
+            k (int): Número de chunks a devolver.
+            query_embedding (List[float]): Embedding da pergunta já calculado (evita recalculá-lo na busca densa).
+
+        Returns:
+            List[Tuple[Document, float]]: Chunks e suas pontuações de fusão, da maior para a menor.
+        """
+        fetch_k = max(self.fetch_k, k)
+        if query_embedding is None:
+            dense_results = self.db.similarity_search_with_score(question_text, k=fetch_k)
+        else:
+            dense_results = self.db.similarity_search_by_vector_with_relevance_scores(query_embedding, k=fetch_k)
+        lexical_results = self.bm25_index.search(question_text, k=fetch_k)
+
+        fused_scores, documents = {}, {}
+
+        for rank, (doc, _score) in enumerate(dense_results, start=1):
+            doc_id = doc.metadata.get("id")
+            documents[doc_id] = doc
+            fused_scores[doc_id] = fused_scores.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank)
+
+        for rank, (doc_id, _score) in enumerate(lexical_results, start=1):
+            fused_scores[doc_id] = fused_scores.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank)
+
+        top_ids = sorted(fused_scores, key=fused_scores.get, reverse=True)[:k]
+
+        # Lê do Chroma apenas os chunks vindos só do BM25
+        missing_ids = [doc_id for doc_id in top_ids if doc_id not in documents]
+        if missing_ids:
+            items = self.db.get(ids=missing_ids, include=["documents", "metadatas"])
+            for doc_id, text, metadata in zip(items["ids"], items["documents"], items["metadatas"]):
+                documents[doc_id] = Document(page_content=text, metadata=metadata or {})
+
+        return [(documents[doc_id], fused_scores[doc_id]) for doc_id in top_ids if doc_id in documents]
@@ -0,0 +1,192 @@
+import os, json, hashlib
+
+MANIFEST_VERSION = 1
+
+class IngestionManifest:
+    def __init__(self, manifest_path, files=None, settings=None):
+        """
+        Manifesto de ingestão endereçado por conteúdo. Para cada PDF já ingerido, guarda o
+        mtime, o tamanho e o hash SHA-256 do arquivo, além do hash de cada chunk gerado
+        (ID do chunk -> hash do conteúdo).
+
+        Args:
+            manifest_path (str): Caminho do arquivo JSON do manifesto.
+            files (dict): Entradas já carregadas, indexadas pelo caminho do PDF.
+            settings (dict): Parâmetros de processamento (ex.: do chunker) com que os chunks foram gerados.
+        """
+        self.manifest_path = manifest_path
+        self.files = files or {}
+        self.settings = settings or {}
+        self.settings_changed = False  # O manifesto do disco foi gerado com outros parâmetros de processamento
+
+        # Hashes calculados em `diff` para os arquivos alterados, usados em `update_file`
+        self._pending_hashes = {}
+
+    @classmethod
+    def load(cls, manifest_path, settings=None):
+        """
+        Carrega o manifesto do disco. Um manifesto ausente, corrompido, de outra versão ou
+        gerado com outros parâmetros de processamento é tratado como vazio, o que força a
+        reingestão de todos os arquivos. No último caso, `settings_changed` indica que o banco
+        deve ser recriado.
+
+        Args:
+            manifest_path (str): Caminho do arquivo JSON do manifesto.
+            settings (dict): Parâmetros de processamento atuais (ex.: `TokenChunker.settings()`).
+
+        Returns:
+            IngestionManifest: Manifesto carregado.
+        """
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as manifest_file:
+                data = json.load(manifest_file)
+
+            if data.get("version") == MANIFEST_VERSION and data.get("settings", {}) == (settings or {}):
+                return cls(manifest_path, data.get("files", {}), settings)
+
+            # Os chunks e vetores já gravados são incompatíveis com os parâmetros atuais
+            manifest = cls(manifest_path, settings=settings)
+            manifest.settings_changed = bool(data.get("files"))
+            return manifest
+
+        except (OSError, ValueError):
+            pass
+
+        return cls(manifest_path, settings=settings)
+
+    def save(self):
+        """
+        Grava o manifesto de forma atômica (arquivo temporário + rename), para que uma
+        interrupção não deixe um JSON truncado.
+        """
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        temporary_path = f"{self.manifest_path}.tmp"
+
+        with open(temporary_path, "w", encoding="utf-8") as manifest_file:
+            json.dump({"version": MANIFEST_VERSION, "settings": self.settings, "files": self.files}, manifest_file)
+
+        os.replace(temporary_path, self.manifest_path)
+
+    @staticmethod
+    def hash_file(file_path, block_size=1 << 20):
+        """
+        Calcula o SHA-256 do arquivo lendo-o em blocos.
+
+        Args:
+            file_path (str): Caminho do arquivo.
+            block_size (int): Tamanho de cada bloco lido.
+
+        Returns:
+            str: Hash hexadecimal do conteúdo do arquivo.
+        """
+        digest = hashlib.sha256()
+
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(block_size), b""):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    def diff(self, pdf_file_paths, pdf_directory=None):
+        """
+        Compara os arquivos do diretório com o manifesto, sem fazer o parsing dos PDFs.
+
+        Um arquivo com mtime e tamanho iguais aos registrados é considerado inalterado.
+        Caso contrário o hash do conteúdo é recalculado: se for igual ao registrado (ex.: o
+        arquivo foi apenas tocado), só o mtime é atualizado.
+
+        O manifesto é compartilhado por todos os diretórios ingeridos no mesmo banco: só conta
+        como removido um arquivo registrado que fica dentro de `pdf_directory` e não está mais lá.
+
+        Args:
+            pdf_file_paths (List[str]): Caminhos dos arquivos PDF presentes no diretório.
+            pdf_directory (str): Diretório percorrido. Sem ele, nenhum arquivo é considerado removido.
+
+        Returns:
+            tuple[List[str], List[str]]: Arquivos novos ou alterados e arquivos removidos do diretório.
+        """
+        changed_files = []
+
+        for file_path in pdf_file_paths:
+            stat = os.stat(file_path)
+            entry = self.files.get(file_path)
+
+            if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                continue
+
+            file_hash = self.hash_file(file_path)
+
+            if entry and entry["sha256"] == file_hash:
+                entry["mtime"], entry["size"] = stat.st_mtime_ns, stat.st_size
+                continue
+
+            self._pending_hashes[file_path] = (stat.st_mtime_ns, stat.st_size, file_hash)
+            changed_files.append(file_path)
+
+        present_files = set(pdf_file_paths)
+        removed_files = [file_path for file_path in self.files
+                         if file_path not in present_files and self._is_under(file_path, pdf_directory)]
+
+        return changed_files, removed_files
+
+    @staticmethod
+    def _is_under(file_path, directory):
+        """
+        Indica se o arquivo fica dentro do diretório (ou de uma de suas subpastas).
+        """
+        if directory is None:
+            return False
+
+        directory = os.path.abspath(directory)
+        return os.path.commonpath([os.path.abspath(file_path), directory]) == directory
+
+    def has_file(self, file_path):
+        """
+        Indica se o arquivo já foi ingerido alguma vez.
+        """
+        return file_path in self.files
+
+    def chunk_ids(self, file_path):
+        """
+        Retorna os IDs dos chunks registrados para o arquivo.
+
+        Args:
+            file_path (str): Caminho do arquivo PDF.
+
+        Returns:
+            set[str]: IDs dos chunks registrados.
+        """
+        return set(self.files.get(file_path, {}).get("chunks", {}))
+
+    def update_file(self, file_path, chunks):
+        """
+        Registra a nova versão do arquivo e os chunks gerados a partir dela.
+
+        Args:
+            file_path (str): Caminho do arquivo PDF.
+            chunks (List[Document]): Chunks do arquivo, já com `id` e `chunk_hash` nos metadados.
+        """
+        if file_path in self._pending_hashes:
+            mtime, size, file_hash = self._pending_hashes.pop(file_path)
+        else:
+            stat = os.stat(file_path)
+            mtime, size, file_hash = stat.st_mtime_ns, stat.st_size, self.hash_file(file_path)
+
+        self.files[file_path] = {
+            "mtime": mtime,
+            "size": size,
+            "sha256": file_hash,
+            "chunks": {chunk.metadata["id"]: chunk.metadata["chunk_hash"] for chunk in chunks},
+        }
+
+    def remove_file(self, file_path):
+        """
+        Remove o arquivo do manifesto.
+
+        Args:
+            file_path (str): Caminho do arquivo PDF.
+
+        Returns:
+            set[str]: IDs dos chunks que pertenciam ao arquivo.
+        """
+        return set(self.files.pop(file_path, {}).get("chunks", {}))
@@ -1,21 +1,103 @@
-from langchain_community.document_loaders.pdf import PyPDFDirectoryLoader
+import os
+from langchain_core.documents import Document
+from services.pdf_text_cache import PYPDF_PARSER, get_pdf_text_cache, parse_pypdf_pages
 
 # Função para carregar todos os PDFs de um diretório usando LangChain
 def load_documents_from_directory(pdf_directory_path: str):
     """
-    Carrega todos os arquivos PDF em um diretório usando o PyPDFDirectoryLoader da LangChain.
+    Carrega todos os arquivos PDF de um diretório e suas subpastas, uma página por documento.
+
+    Mantém todas as páginas em memória: para diretórios grandes, prefira `iter_documents_from_directory`.
 
     Args:
         pdf_directory_path (str): Caminho para o diretório contendo os arquivos PDF a serem processados.
 
     Returns:
-        List[Document]: Uma lista de documentos contendo o texto extraído de cada arquivo PDF.
+        List[Document]: Uma lista de documentos contendo o texto extraído de cada página.
+    """
+    return list(iter_documents_from_directory(pdf_directory_path))
+
+# Função para percorrer as páginas dos PDFs de um diretório sem carregá-las todas de uma vez
+def iter_documents_from_directory(pdf_directory_path: str):
+    """
+    Gera as páginas de todos os PDFs de um diretório e suas subpastas, arquivo por arquivo.
+
+    Args:
+        pdf_directory_path (str): Caminho para o diretório contendo os arquivos PDF.
+
+    Returns:
+        Iterator[Document]: As páginas, na ordem de `find_pdf_files`.
+    """
+    return iter_documents_from_files(find_pdf_files(pdf_directory_path))
+
+# Função para listar os arquivos PDF de um diretório e suas subpastas
+def find_pdf_files(pdf_directory_path: str):
+    """
+    Percorre o diretório e suas subpastas à procura de arquivos PDF, em ordem determinística.
+
+    Args:
+        pdf_directory_path (str): Caminho para o diretório contendo os arquivos PDF.
+
+    Returns:
+        List[str]: Caminhos dos arquivos PDF encontrados.
+    """
+    pdf_files = []
+
+    for root, dirs, files in os.walk(pdf_directory_path):
+        dirs.sort()  # Garante a mesma ordem de visita entre execuções
+        for file in sorted(files):
+            if file.lower().endswith('.pdf') and not file.startswith('.'):
+                pdf_files.append(os.path.join(root, file))
+
+    return pdf_files
+
+# Função para carregar apenas os arquivos PDF informados
+def load_documents_from_files(pdf_file_paths):
+    """
+    Carrega uma lista de arquivos PDF usando o PyPDFLoader da LangChain, uma página por documento.
+
+    Args:
+        pdf_file_paths (List[str]): Caminhos dos arquivos PDF a serem carregados.
+
+    Returns:
+        List[Document]: Uma lista de documentos contendo o texto extraído de cada página.
+    """
+    return list(iter_documents_from_files(pdf_file_paths))
+
+# Função para percorrer as páginas dos arquivos PDF informados, um arquivo de cada vez
+def iter_documents_from_files(pdf_file_paths):
+    """
+    Gera as páginas dos arquivos PDF, lendo um arquivo de cada vez, de modo que apenas as
+    páginas do arquivo atual ficam em memória.
+
+    Args:
+        pdf_file_paths (Iterable[str]): Caminhos dos arquivos PDF a serem carregados.
+
+    Returns:
+        Iterator[Document]: As páginas de cada arquivo, na ordem informada.
+    """
+    for pdf_file_path in pdf_file_paths:
+        try:
+            yield from load_pdf_pages(pdf_file_path)
+
+        except Exception as e:
+            # Captura e trata exceções que possam ocorrer durante o processamento do PDF
+            raise RuntimeError(f"Erro ao processar o arquivo {pdf_file_path}: {str(e)}")
+
+# Função para carregar as páginas de um PDF, consultando antes o cache de texto extraído
+def load_pdf_pages(pdf_file_path):
+    """
+    Carrega as páginas de um arquivo PDF. O texto extraído fica no cache em disco
+    (`PDF_TEXT_CACHE_PATH`), indexado pelo hash do conteúdo: um arquivo inalterado não é lido
+    de novo pelo PyPDFLoader, mesmo que tenha sido renomeado ou lido antes pelo bedrock_claude.
+
+    Args:
+        pdf_file_path (str): Caminho do arquivo PDF.
+
+    Returns:
+        List[Document]: Uma página por documento, com `source` e os metadados do PyPDFLoader.
     """
-    try:
-        # Carrega todos os PDFs do diretório usando o PyPDFDirectoryLoader
-        directory_loader = PyPDFDirectoryLoader(pdf_directory_path)
-        return directory_loader.load()
+    cache = get_pdf_text_cache()
+    pages = cache.load(pdf_file_path, PYPDF_PARSER, parse_pypdf_pages) if cache else parse_pypdf_pages(pdf_file_path)
 
-    except Exception as e:
-        # Captura e trata exceções que possam ocorrer durante o processamento dos PDFs no diretório
-        raise print(status_code=500, detail=f"Erro ao processar o diretório {pdf_directory_path}: {str(e)}")
\ No newline at end of file
+    return [Document(page_content=page["text"], metadata={"source": pdf_file_path, **page["metadata"]}) for page in pages]
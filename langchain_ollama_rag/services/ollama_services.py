@@ -1,11 +1,16 @@
+import time
 from langchain.schema.document import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma  # Importando a classe Chroma do pacote atualizado
 from langchain.prompts import ChatPromptTemplate
 from langchain_community.llms.ollama import Ollama
 
 from prompts.promptGameRules import promptAskGameRules as get_prompt
-from embedding.embedding_models import get_embedding_ollama
+from embedding.embedding_models import OLLAMA_BASE_URL, get_embedding_ollama
+from services.chromadb_service import BM25_INDEX_PATH, get_chroma_db, sync_bm25_index
+from services.bm25_index import BM25Index
+from services.chunking_service import TokenChunker
+from services.hybrid_retriever import HybridRetriever
+from services.rerank_service import ContextPacker, estimate_tokens
+from services.tracing import get_tracer, traced
 
 
 class OllamaService:
@@ -13,58 +18,246 @@ class OllamaService:
         """
         Inicializa o serviço de interação com o modelo Ollama e gerencia o armazenamento de dados 
         utilizando o Chroma como sistema de banco de dados vetorial.
-        Define o modelo a ser utilizado e o caminho do diretório onde os dados do Chroma serão armazenados.
+        Define o modelo a ser utilizado; os dados do Chroma ficam em `CHROMA_PATH` (services/chromadb_service.py).
+
+        Os handles (embedding, Chroma, LLM e template de prompt) são abertos sob demanda na
+        primeira consulta e reutilizados nas seguintes. Use `close()` ou `reload()` sempre que
+        o banco de dados for alterado por `clear_database()` ou `add_to_chroma()`.
         """
         self.model_id = 'mistral'  # Identificador do modelo a ser utilizado
-        self.chroma_directory = 'chroma'  # Diretório para armazenar dados do Chroma
+        self.hnsw_config = None  # Parâmetros HNSW que substituem os de HNSW_CONFIG
+        self.ann_index = None  # Índice IVF-PQ opcional (services.ann_index.IVFPQIndex) usado no lugar do HNSW
+        self.use_hybrid = True  # Combina a busca densa com a busca léxica BM25
+        self.chunker = TokenChunker()  # Divisão dos documentos em chunks medidos em tokens (ver CHUNK_TOKENIZER)
+        self.context_packer = ContextPacker()  # Deduplicação e orçamento de tokens do contexto; re-ranking opcional (`scorer`). None desativa
+
+        # Handles reutilizados entre consultas (inicializados de forma preguiçosa)
+        self._embedding_function = None
+        self._db = None
+        self._model = None
+        self._prompt_template = None
+        self._bm25_index = None
+
+    def get_embedding_function(self):
+        """
+        Retorna a função de embedding, criando-a apenas na primeira chamada.
+
+        Returns:
+            OllamaEmbeddings: Cliente de embeddings reutilizado entre consultas.
+        """
+        if self._embedding_function is None:
+            self._embedding_function = get_embedding_ollama()
+        return self._embedding_function
+
+    def get_database(self):
+        """
+        Retorna a coleção Chroma aberta, abrindo-a apenas na primeira chamada.
+
+        Returns:
+            Chroma: Banco de dados vetorial reutilizado entre consultas.
+        """
+        if self._db is None:
+            self._db = get_chroma_db(self.get_embedding_function(), self.hnsw_config)
+        return self._db
+
+    def get_bm25_index(self):
+        """
+        Retorna o índice léxico BM25, carregando-o apenas na primeira chamada. Se o índice estiver
+        ausente ou com um número de chunks diferente do da coleção (ex.: banco ingerido antes da
+        existência do índice), ele é completado a partir do Chroma antes de ser usado na busca híbrida.
+
+        Returns:
+            BM25Index: Índice BM25 reutilizado entre consultas.
+        """
+        if self._bm25_index is None:
+            bm25_index = BM25Index.load(BM25_INDEX_PATH)
+            db = self.get_database()
+
+            if len(bm25_index) != db._collection.count() and sync_bm25_index(db, bm25_index):
+                bm25_index.save()
+            self._bm25_index = bm25_index
+        return self._bm25_index
+
+    def get_model(self):
+        """
+        Retorna o cliente do modelo Ollama, criando-o apenas na primeira chamada.
+
+        Returns:
+            Ollama: Cliente do LLM reutilizado entre consultas.
+        """
+        if self._model is None:
+            self._model = Ollama(model=self.model_id, base_url=OLLAMA_BASE_URL)
+        return self._model
+
+    def get_prompt_template(self):
+        """
+        Retorna o template de prompt compilado, criando-o apenas na primeira chamada.
+
+        Returns:
+            ChatPromptTemplate: Template de prompt reutilizado entre consultas.
+        """
+        if self._prompt_template is None:
+            self._prompt_template = ChatPromptTemplate.from_template(get_prompt())
+        return self._prompt_template
+
+    def close(self):
+        """
+        Libera a coleção Chroma aberta e o índice BM25. Deve ser chamado antes de `clear_database()`,
+        para que nenhum handle aponte para um diretório removido. Os clientes de embedding, LLM e o
+        template não dependem do banco e continuam em cache.
+        """
+        self._db = None
+        self._bm25_index = None
+
+        # O chromadb mantém um cache de clientes por diretório; sem limpá-lo, uma nova
+        # instância do Chroma reutilizaria o estado do diretório apagado.
+        try:
+            from chromadb.api.client import SharedSystemClient
+            SharedSystemClient.clear_system_cache()
+        except (ImportError, AttributeError):
+            pass
+
+    def reload(self):
+        """
+        Fecha e reabre a coleção Chroma, para que as próximas consultas enxerguem os
+        documentos adicionados ou removidos desde a abertura anterior. O índice IVF-PQ, se
+        houver, é reconstruído a partir da coleção reaberta, para não devolver IDs removidos.
+
+        Returns:
+            Chroma: Banco de dados vetorial reaberto.
+        """
+        self.close()
+        db = self.get_database()
+
+        if self.ann_index is not None:
+            self.ann_index.build_from_chroma(db)
+
+        return db
 
     def split_documents(self, documents: list[Document]) -> list[Document]:
         """
         Divide os documentos carregados em chunks menores para facilitar o processamento.
 
+        Os chunks são medidos em tokens do tokenizador configurado (CHUNK_TOKENIZER), não atravessam
+        páginas e começam em cada título de seção (ver services/chunking_service.py).
+
         Args:
             documents (list[Document]): Lista de documentos a serem divididos.
 
         Returns:
             list[Document]: Lista de chunks gerados a partir dos documentos.
         """
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=800,  # Tamanho máximo de cada chunk
-            chunk_overlap=80,  # Sobreposição de caracteres entre chunks consecutivos
-            length_function=len,  # Função para calcular o comprimento do texto
-            is_separator_regex=False,  # Define se um regex será usado para separar textos
-        )
-        return text_splitter.split_documents(documents)
+        return self.chunker.split_documents(documents)
 
-    def invoke_model(self, question_text):
+    def retrieve(self, question_text, k=5, query_embedding=None):
         """
-        Invoca o modelo Ollama com a pergunta fornecida e retorna a resposta gerada.
+        Busca no Chroma os chunks mais similares à pergunta. Se `ann_index` estiver definido, a
+        busca aproximada é feita no índice IVF-PQ e os documentos são lidos do Chroma. Com
+        `use_hybrid`, a busca densa é combinada com a busca léxica BM25.
 
         Args:
             question_text (str): Texto da pergunta a ser feita ao modelo.
+            k (int): Número de chunks a recuperar.
+            query_embedding (list[float]): Embedding da pergunta já calculado (ex.: de forma assíncrona);
+                se None, é calculado aqui.
 
         Returns:
-            str: Resposta gerada pelo modelo Ollama com base na pergunta e no contexto dos documentos.
+            list[tuple[Document, float]]: Chunks encontrados e suas pontuações.
         """
-        # Define a função de embedding a ser utilizada
-        embedding_function = get_embedding_ollama()  # Obtém a função de embedding específica para o Ollama
+        if self.ann_index is not None:
+            if query_embedding is None:
+                query_embedding = self.get_embedding_function().embed_query(question_text)
+            return self.ann_index.similarity_search_with_score(self.get_database(), query_embedding, k=k)
 
-        # Cria o banco de dados Chroma com a função de embedding definida
-        db = Chroma(persist_directory=self.chroma_directory, embedding_function=embedding_function)
+        if self.use_hybrid and len(self.get_bm25_index()):
+            return HybridRetriever(self.get_database(), self.get_bm25_index()).retrieve(question_text, k=k, query_embedding=query_embedding)
+
+        if query_embedding is not None:
+            return self.get_database().similarity_search_by_vector_with_relevance_scores(query_embedding, k=k)
+
+        return self.get_database().similarity_search_with_score(question_text, k=k)
+
+    def retrieve_context(self, question_text, query_embedding=None):
+        """
+        Busca os chunks relevantes para a pergunta e, com `context_packer`, mantém apenas os
+        melhores dentro do orçamento de tokens do contexto.
+
+        Args:
+            question_text (str): Texto da pergunta a ser feita ao modelo.
+            query_embedding (list[float]): Embedding da pergunta já calculado (opcional).
+
+        Returns:
+            list[tuple[Document, float]]: Chunks que entram no contexto e suas pontuações.
+        """
+        tracer = get_tracer()
 
         # Realiza a busca de similaridade no banco de dados com base na pergunta
-        results = db.similarity_search_with_score(question_text, k=5)
+        if self.context_packer is None:
+            with tracer.span("retrieve", k=5) as span:
+                results = self.retrieve(question_text, k=5, query_embedding=query_embedding)
+                span.set(documents=len(results))
+            return results
+
+        # Busca mais candidatos e mantém apenas os melhores dentro do orçamento de tokens
+        with tracer.span("retrieve", k=self.context_packer.fetch_k) as span:
+            candidates = self.retrieve(question_text, k=self.context_packer.fetch_k, query_embedding=query_embedding)
+            span.set(documents=len(candidates))
+
+        with tracer.span("rerank") as span:
+            results, stats = self.context_packer.pack(question_text, candidates)
+            span.set(**stats)
+
+        print(f"👉 Contexto: {stats['packed']}/{stats['candidates']} chunks, {stats['packed_tokens']} tokens "
+              f"({stats['saved_tokens']} tokens economizados em relação ao top-{self.context_packer.baseline_k})")
+        return results
+
+    def build_prompt(self, question_text, results):
+        """
+        Monta o prompt final a partir da pergunta e dos chunks recuperados.
 
+        Args:
+            question_text (str): Texto da pergunta a ser feita ao modelo.
+            results (list[tuple[Document, float]]): Chunks recuperados pela busca.
+
+        Returns:
+            str: Prompt formatado para o modelo.
+        """
         # Monta o texto de contexto a partir dos documentos retornados pela busca
         context_text = "\n\n---\n\n".join([doc.page_content for doc, _score in results])
+        return self.get_prompt_template().format(context=context_text, question=question_text)
+
+    @traced("query")
+    def invoke_model(self, question_text):
+        """
+        Invoca o modelo Ollama com a pergunta fornecida e retorna a resposta gerada.
+
+        Args:
+            question_text (str): Texto da pergunta a ser feita ao modelo.
+
+        Returns:
+            str: Resposta gerada pelo modelo Ollama com base na pergunta e no contexto dos documentos.
+        """
+        tracer = get_tracer()
+
+        # Busca os chunks relevantes e seleciona os que entram no contexto
+        results = self.retrieve_context(question_text)
+
+        # Cria o prompt com o contexto e a pergunta
+        with tracer.span("prompt.build") as span:
+            prompt = self.build_prompt(question_text, results)
+            span.set(bytes=len(prompt.encode("utf-8")), tokens=estimate_tokens(prompt))
 
-        # Cria um template de prompt com o contexto e a pergunta
-        prompt_template = ChatPromptTemplate.from_template(get_prompt())
-        prompt = prompt_template.format(context=context_text, question=question_text)
+        # Gera a resposta em streaming com o modelo Ollama já inicializado, medindo o tempo até o primeiro token
+        with tracer.span("llm.completion", model=self.model_id) as span:
+            start_time = time.perf_counter()
+            response_parts = []
+            for text_part in self.get_model().stream(prompt):
+                if not response_parts:
+                    tracer.record("llm.first_token", time.perf_counter() - start_time, model=self.model_id)
+                response_parts.append(text_part)
 
-        # Inicializa o modelo Ollama e obtém a resposta
-        model = Ollama(model=self.model_id)    
-        response_text = model.invoke(prompt)
+            response_text = "".join(response_parts)
+            span.set(bytes=len(response_text.encode("utf-8")), tokens=estimate_tokens(response_text))
 
         # Obtém os IDs das fontes dos documentos utilizados na resposta
         source_ids = [doc.metadata.get("id", None) for doc, _score in results]
@@ -0,0 +1,9 @@
+"""
+Cache em disco do texto extraído dos PDFs, indexado pelo hash do conteúdo do arquivo e pelo parser.
+
+A implementação (`PdfTextCache`, `get_pdf_text_cache`, `parse_pypdf_pages`...) é compartilhada com
+o bedrock_claude e fica em rag_common/pdf_text_cache.py, de modo que um PDF lido por um dos pipelines
+não é lido de novo pelo outro.
+"""
+from rag_common.pdf_text_cache import (PDF_TEXT_CACHE_MAX_BYTES, PDF_TEXT_CACHE_PATH, PDF_TEXT_CACHE_VERSION, PYPDF_PARSER,
+                                       PdfTextCache, get_pdf_text_cache, parse_pypdf_pages, parser_id)
@@ -0,0 +1,182 @@
+from services.bm25_index import BM25Index, tokenize
+from services.hybrid_retriever import RRF_K
+from rag_common.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+def shingles(text, size=5):
+    """
+    Conjunto de sequências de `size` termos consecutivos do texto, usado na detecção de quase-duplicatas.
+    """
+    tokens = tokenize(text)
+    return {tuple(tokens[start:start + size]) for start in range(max(len(tokens) - size + 1, 1))}
+
+def trim_overlap(previous_text, text, max_overlap=400, min_overlap=20):
+    """
+    Remove de `text` o trecho repetido de `previous_text` criado pelo `chunk_overlap` do
+    splitter: o início de `text` que repete o final de `previous_text`, ou o final de `text`
+    que repete o início de `previous_text` (quando os chunks entram fora de ordem).
+
+    Args:
+        previous_text (str): Chunk já incluído no contexto.
+        text (str): Chunk a incluir.
+        max_overlap (int): Tamanho máximo (em caracteres) da sobreposição procurada.
+        min_overlap (int): Tamanho mínimo para considerar uma sobreposição.
+
+    Returns:
+        str: `text` sem a sobreposição.
+    """
+    for size in range(min(max_overlap, len(previous_text), len(text)), min_overlap - 1, -1):
+        if previous_text.endswith(text[:size]):
+            return text[size:].lstrip()
+        if previous_text.startswith(text[-size:]):
+            return text[:-size].rstrip()
+    return text
+
+class LexicalOverlapScorer:
+    """
+    Pontuador local opcional: BM25 calculado apenas sobre os candidatos recuperados (`BM25Index.score`,
+    a mesma fórmula da busca léxica). Não depende de modelos adicionais e roda em microssegundos.
+    Com a busca híbrida (`use_hybrid`), o BM25 já entra na ordem dos candidatos: prefira então o
+    `CrossEncoderScorer` ou nenhum pontuador.
+    """
+
+    def __call__(self, question_text, texts, k1=1.5, b=0.75):
+        return BM25Index.score(texts, question_text, k1, b)
+
+class CrossEncoderScorer:
+    def __init__(self, model_name="cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"):
+        """
+        Pontuador com um cross-encoder local (sentence-transformers), mais preciso que o
+        pontuador léxico. O modelo é carregado apenas no primeiro uso.
+
+        Args:
+            model_name (str): Modelo cross-encoder (o padrão é multilíngue e cobre português).
+        """
+        self.model_name = model_name
+        self._model = None
+
+    def __call__(self, question_text, texts):
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+            self._model = CrossEncoder(self.model_name)
+
+        return [float(score) for score in self._model.predict([(question_text, text) for text in texts])]
+
+class ContextPacker:
+    def __init__(self, scorer=None, token_budget=800, fetch_k=20, baseline_k=5, dedupe_threshold=0.8,
+                 count_tokens=estimate_tokens, rrf_k=RRF_K):
+        """
+        Etapa pós-busca: recebe mais candidatos que o necessário, descarta quase-duplicatas,
+        opcionalmente reordena com um pontuador local e inclui os melhores chunks até esgotar o
+        orçamento de tokens do contexto.
+
+        A ordem do pontuador não substitui a da busca: as duas são combinadas por Reciprocal Rank
+        Fusion, para que a similaridade semântica continue valendo (ex.: perguntas parafraseadas,
+        sem termos em comum com o chunk).
+
+        Args:
+            scorer (Callable[[str, List[str]], List[float]]): Pontuador local (ex.: `LexicalOverlapScorer`
+                ou `CrossEncoderScorer`); None (padrão) mantém a ordem da busca.
+            token_budget (int): Máximo de tokens do contexto montado.
+            fetch_k (int): Número de candidatos a buscar antes do re-ranking.
+            baseline_k (int): k da busca sem re-ranking, usado para calcular a economia de tokens.
+            dedupe_threshold (float): Similaridade de Jaccard (entre shingles) a partir da qual um chunk é descartado.
+            count_tokens (Callable[[str], int]): Função de contagem de tokens.
+            rrf_k (int): Constante de suavização da fusão entre a ordem da busca e a do pontuador.
+        """
+        self.scorer = scorer
+        self.token_budget = token_budget
+        self.fetch_k = fetch_k
+        self.baseline_k = baseline_k
+        self.dedupe_threshold = dedupe_threshold
+        self.count_tokens = count_tokens
+        self.rrf_k = rrf_k
+
+    def deduplicate(self, results):
+        """
+        Remove chunks quase idênticos a um chunk mais bem colocado.
+
+        Args:
+            results (List[Tuple[Document, float]]): Candidatos na ordem da busca.
+
+        Returns:
+            List[Tuple[Document, float]]: Candidatos sem quase-duplicatas.
+        """
+        kept, kept_shingles = [], []
+
+        for doc, score in results:
+            doc_shingles = shingles(doc.page_content)
+            is_duplicate = any(
+                len(doc_shingles & other) / (len(doc_shingles | other) or 1) >= self.dedupe_threshold
+                for other in kept_shingles
+            )
+            if not is_duplicate:
+                kept.append((doc, score))
+                kept_shingles.append(doc_shingles)
+
+        return kept
+
+    def rank(self, question_text, candidates):
+        """
+        Ordena os candidatos combinando a posição na busca com a posição segundo o pontuador.
+
+        Args:
+            question_text (str): Texto da pergunta.
+            candidates (List[Tuple[Document, float]]): Candidatos na ordem da busca.
+
+        Returns:
+            List[Tuple[Document, float]]: Candidatos reordenados, com a pontuação da fusão (ou,
+            sem pontuador, na ordem e com a pontuação da busca).
+        """
+        if self.scorer is None or not candidates:
+            return candidates
+
+        scores = self.scorer(question_text, [doc.page_content for doc, _score in candidates])
+        fused = [1.0 / (self.rrf_k + rank) for rank in range(1, len(candidates) + 1)]
+        scorer_order = sorted(range(len(candidates)), key=lambda position: scores[position], reverse=True)
+        for rank, position in enumerate(scorer_order, start=1):
+            fused[position] += 1.0 / (self.rrf_k + rank)
+
+        # sorted é estável: em caso de empate, prevalece a ordem da busca
+        order = sorted(range(len(candidates)), key=lambda position: fused[position], reverse=True)
+        return [(candidates[position][0], fused[position]) for position in order]
+
+    def pack(self, question_text, results):
+        """
+        Seleciona os chunks que entram no prompt.
+
+        Args:
+            question_text (str): Texto da pergunta.
+            results (List[Tuple[Document, float]]): Candidatos na ordem da busca.
+
+        Returns:
+            Tuple[List[Tuple[Document, float]], dict]: Chunks selecionados (com a pontuação de
+            `rank` e o texto sem sobreposição) e estatísticas de tokens.
+        """
+        baseline_tokens = sum(self.count_tokens(doc.page_content) for doc, _score in results[:self.baseline_k])
+
+        candidates = self.deduplicate(results)
+        ranked = self.rank(question_text, candidates)
+
+        packed, packed_texts, used_tokens = [], [], 0
+        for doc, rerank_score in ranked:
+            text = doc.page_content
+            for previous_text in packed_texts:
+                text = trim_overlap(previous_text, text)
+
+            tokens = self.count_tokens(text)
+            if not text or used_tokens + tokens > self.token_budget:
+                continue
+
+            packed.append((doc.__class__(page_content=text, metadata=doc.metadata), rerank_score))
+            packed_texts.append(doc.page_content)
+            used_tokens += tokens
+
+        stats = {
+            "candidates": len(results),
+            "after_dedupe": len(candidates),
+            "packed": len(packed),
+            "baseline_tokens": baseline_tokens,
+            "packed_tokens": used_tokens,
+            "saved_tokens": baseline_tokens - used_tokens,
+        }
+        return packed, stats
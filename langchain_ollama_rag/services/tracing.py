@@ -0,0 +1,11 @@
+"""
+Rastreamento leve das etapas do pipeline RAG (carga dos PDFs, divisão, embeddings, escrita no
+vetor, busca, montagem do prompt, primeiro token e conclusão do LLM).
+
+A implementação (spans, exportadores, `get_tracer`, `traced`...) é compartilhada com o
+bedrock_claude e fica em rag_common/tracing.py; aqui só se define o nome do tracer no OpenTelemetry.
+"""
+from rag_common.tracing import (EXPORTERS, InMemoryExporter, NoopExporter, OpenTelemetryExporter, Span,
+                                StdoutJsonExporter, Tracer, get_tracer, set_tracer, set_tracer_name, traced)
+
+set_tracer_name("langchain_ollama_rag")
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Os testes importam os módulos como o próprio projeto (ex.: `embedding.micro_batcher`), a partir
+# do diretório langchain_ollama_rag/, de onde quer que o pytest seja executado
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,110 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
+import pytest
+from embedding.micro_batcher import EmbeddingMicroBatcher
+
+class RecordingEmbedder:
+    def __init__(self, delay=0.0, release=None):
+        # Registra os lotes recebidos e devolve `[len(texto)]` como vetor de cada texto
+        self.batches = []
+        self.delay = delay
+        self.release = release
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        if self.release is not None:
+            self.release.wait(5)
+        time.sleep(self.delay)
+        return [[float(len(text))] for text in texts]
+
+def test_concurrent_requests_share_a_batch_and_each_gets_its_vector():
+    embedder = RecordingEmbedder()
+    batcher = EmbeddingMicroBatcher(embedder, max_batch_size=8, max_wait_ms=200)
+
+    futures = [batcher.submit(text) for text in ["a", "bb", "ccc", "bb"]]
+
+    assert [future.result(timeout=5) for future in futures] == [[1.0], [2.0], [3.0], [2.0]]
+    # Um único lote, com o texto repetido enviado uma vez
+    assert embedder.batches == [["a", "bb", "ccc"]]
+    assert batcher.metrics()["requests"] == 4
+    batcher.close()
+
+def test_batches_are_limited_to_max_batch_size():
+    embedder = RecordingEmbedder()
+    batcher = EmbeddingMicroBatcher(embedder, max_batch_size=2, max_wait_ms=200)
+
+    futures = [batcher.submit(str(index)) for index in range(5)]
+
+    assert [future.result(timeout=5) for future in futures] == [[1.0]] * 5
+    assert all(len(batch) <= 2 for batch in embedder.batches)
+    assert sorted(text for batch in embedder.batches for text in batch) == ["0", "1", "2", "3", "4"]
+    batcher.close()
+
+def test_batch_error_is_fanned_out_to_every_caller():
+    def failing(texts):
+        raise ConnectionError("ollama indisponível")
+
+    batcher = EmbeddingMicroBatcher(failing, max_batch_size=4, max_wait_ms=100)
+    futures = [batcher.submit(text) for text in ["a", "b"]]
+
+    for future in futures:
+        with pytest.raises(ConnectionError):
+            future.result(timeout=5)
+    batcher.close()
+
+def test_short_reply_fails_only_the_missing_texts():
+    batcher = EmbeddingMicroBatcher(lambda texts: [[1.0]], max_batch_size=4, max_wait_ms=100)
+    first, second = batcher.submit("a"), batcher.submit("b")
+
+    assert first.result(timeout=5) == [1.0]
+    with pytest.raises(ValueError):
+        second.result(timeout=5)
+    batcher.close()
+
+def test_cancelled_request_does_not_block_the_rest_of_the_batch():
+    embedder = RecordingEmbedder()
+    batcher = EmbeddingMicroBatcher(embedder, max_batch_size=4, max_wait_ms=200)
+
+    cancelled, kept = batcher.submit("cancelado"), batcher.submit("mantido")
+    assert cancelled.cancel()
+
+    assert kept.result(timeout=5) == [7.0]
+    assert embedder.batches == [["mantido"]]
+    batcher.close()
+
+def test_aembed_timeout_does_not_block_other_callers():
+    release = threading.Event()
+    embedder = RecordingEmbedder(release=release)
+    batcher = EmbeddingMicroBatcher(embedder, max_batch_size=4, max_wait_ms=0, max_in_flight=1)
+
+    async def scenario():
+        # O primeiro lote fica preso em `embed_batch`; os pedidos seguintes esperam na fila
+        blocking = asyncio.ensure_future(batcher.aembed("primeiro"))
+        await asyncio.sleep(0.05)
+
+        waiting = asyncio.ensure_future(batcher.aembed("espera"))
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(batcher.aembed("desiste"), timeout=0.05)
+
+        release.set()
+        return await asyncio.wait_for(asyncio.gather(blocking, waiting), timeout=5)
+
+    assert asyncio.run(scenario()) == [[8.0], [6.0]]
+    assert all("desiste" not in batch for batch in embedder.batches)
+    batcher.close()
+
+def test_unexpected_error_resolves_every_pending_future():
+    batcher = EmbeddingMicroBatcher(lambda texts: [[0.0]] * len(texts))
+    broken = Future()
+    broken.set_running_or_notify_cancel = lambda: (_ for _ in ()).throw(RuntimeError("estado inválido"))
+    healthy = Future()
+
+    batcher._slots.acquire()
+    with pytest.raises(RuntimeError):
+        batcher._dispatch([("a", healthy, time.perf_counter()), ("b", broken, time.perf_counter())])
+
+    with pytest.raises(RuntimeError):
+        healthy.result(timeout=1)
+    batcher.close()
@@ -0,0 +1,82 @@
+import sys
+import resource
+
+def percentile(values, fraction):
+    """
+    Percentil por interpolação linear.
+
+    Args:
+        values (List[float]): Amostras.
+        fraction (float): Percentil entre 0 e 1.
+
+    Returns:
+        float: Valor do percentil (0.0 se não houver amostras).
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def summarize(samples):
+    """
+    Resume amostras de latência (em segundos) em p50, p95, p99 e média, em milissegundos.
+    """
+    return {
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "mean_ms": (sum(samples) / len(samples) * 1000) if samples else 0.0,
+    }
+
+def peak_rss_mb():
+    """
+    Pico de memória residente do processo, em MB (o Linux reporta em KB e o macOS em bytes).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def flatten(report, prefix=""):
+    """
+    Achata o relatório em um dicionário `caminho.da.métrica -> valor` numérico.
+    """
+    metrics = {}
+    for key, value in report.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{path}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[path] = value
+    return metrics
+
+def compare_reports(baseline, current, tolerance, higher_is_better=(), width=48):
+    """
+    Compara o relatório atual com uma baseline e imprime a variação de cada métrica.
+
+    Args:
+        baseline (dict): Relatório salvo anteriormente.
+        current (dict): Relatório da execução atual.
+        tolerance (float): Variação relativa tolerada antes de considerar regressão (0.1 = 10%).
+        higher_is_better (Tuple[str]): Trechos do caminho das métricas em que um valor maior é melhor
+            (as demais são latências e memória).
+        width (int): Largura da coluna com o caminho da métrica.
+
+    Returns:
+        List[str]: Métricas que regrediram.
+    """
+    baseline_metrics, current_metrics = flatten(baseline["results"]), flatten(current["results"])
+    regressions = []
+
+    for path in sorted(baseline_metrics.keys() & current_metrics.keys()):
+        before, after = baseline_metrics[path], current_metrics[path]
+        change = (after - before) / before if before else 0.0
+        regressed = change < -tolerance if any(marker in path for marker in higher_is_better) else change > tolerance
+
+        if regressed:
+            regressions.append(path)
+        print(f"{'REGRESSÃO' if regressed else 'ok':>9} | {path:<{width}} {before:12.2f} -> {after:12.2f} ({change:+.1%})")
+
+    return regressions
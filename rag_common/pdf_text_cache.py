@@ -0,0 +1,269 @@
+"""
+Cache em disco do texto extraído dos PDFs, compartilhado pelo langchain_ollama_rag e pelo
+bedrock_claude por meio dos respectivos services/pdf_text_cache.py: os dois pipelines usam o
+mesmo formato e o mesmo caminho padrão, de modo que um PDF lido por um deles não é lido de novo
+pelo outro.
+
+O arquivo é limitado a `PDF_TEXT_CACHE_MAX_BYTES`: ao gravar, as entradas acessadas há mais
+tempo são descartadas. Para consultar ou reduzir o cache manualmente:
+
+    python -m rag_common.pdf_text_cache [--path ARQUIVO] [--prune MAX_BYTES]
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import argparse
+import threading
+from importlib import metadata
+
+# Caminho do arquivo SQLite. Vazio desativa o cache.
+PDF_TEXT_CACHE_PATH = os.environ.get("PDF_TEXT_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "pdf_text_cache.sqlite3"))
+
+# Tamanho máximo das páginas armazenadas (comprimidas), em bytes. 0 desativa o limite.
+PDF_TEXT_CACHE_MAX_BYTES = int(os.environ.get("PDF_TEXT_CACHE_MAX_BYTES", str(1 << 30)))
+
+# Versão do formato dos registros: alterá-la invalida todas as entradas existentes
+PDF_TEXT_CACHE_VERSION = 1
+
+def parser_id(*packages):
+    """
+    Identificador de um parser para a chave do cache: os pacotes usados na extração e suas
+    versões instaladas (ex.: `parser_id("langchain-community", "pypdf")`).
+    """
+    versions = []
+    for package in packages:
+        try:
+            versions.append(f"{package}={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{package}=unknown")
+    return ",".join(versions)
+
+# Identificador do PyPDFLoader da LangChain (`parse_pypdf_pages`), usado pelos dois pipelines
+PYPDF_PARSER = parser_id("langchain-community", "pypdf")
+
+def parse_pypdf_pages(pdf_file_path):
+    """
+    Extrai as páginas de um PDF com o PyPDFLoader da LangChain, no formato do cache.
+
+    Args:
+        pdf_file_path (str): Caminho do arquivo PDF.
+
+    Returns:
+        List[dict]: Texto e metadados do PyPDFLoader de cada página, sem o caminho do arquivo (`source`).
+    """
+    from langchain_community.document_loaders.pdf import PyPDFLoader
+
+    return [{"text": page.page_content, "metadata": {key: value for key, value in page.metadata.items() if key != "source"}}
+            for page in PyPDFLoader(pdf_file_path).lazy_load()]
+
+class PdfTextCache:
+    def __init__(self, path=PDF_TEXT_CACHE_PATH, max_bytes=PDF_TEXT_CACHE_MAX_BYTES):
+        """
+        Cache em disco (SQLite) do texto extraído de cada página dos PDFs.
+
+        A chave é o SHA-256 do conteúdo do arquivo mais o identificador do parser (biblioteca e
+        versão), de modo que renomear ou mover um PDF não invalida a entrada, e trocar de parser ou
+        atualizá-lo não devolve texto extraído de outra forma. Cada arquivo é um registro: a lista
+        de páginas (`{"text": ..., "metadata": {...}}`, sem o caminho do arquivo) em JSON comprimido
+        com zlib, com o tamanho e o horário do último acesso usados no descarte.
+
+        Args:
+            path (str): Caminho do arquivo SQLite.
+            max_bytes (int): Tamanho máximo das páginas armazenadas; acima dele, `put` descarta as
+                entradas acessadas há mais tempo (0 desativa o limite).
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Vários processos (pool de extração, os dois pipelines) podem gravar no mesmo arquivo
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS pdf_text (file_hash TEXT, parser TEXT, pages BLOB, "
+                                 "size INTEGER, accessed REAL, PRIMARY KEY (file_hash, parser))")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS pdf_text_accessed ON pdf_text (accessed)")
+        self._connection.commit()
+
+    @staticmethod
+    def hash_file(file_path, block_size=1 << 20):
+        """
+        Calcula o SHA-256 do conteúdo do arquivo, lendo-o em blocos.
+        """
+        digest = hashlib.sha256()
+
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(block_size), b""):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def _parser_key(parser):
+        return f"{PDF_TEXT_CACHE_VERSION}:{parser}"
+
+    def get(self, file_hash, parser):
+        """
+        Busca as páginas de um arquivo e atualiza o horário do seu último acesso.
+
+        Args:
+            file_hash (str): SHA-256 do conteúdo do arquivo.
+            parser (str): Identificador do parser (ex.: `parser_id("pymupdf")`).
+
+        Returns:
+            Optional[List[dict]]: Páginas do arquivo, ou None quando não estão em cache.
+        """
+        key = (file_hash, self._parser_key(parser))
+
+        with self._lock:
+            row = self._connection.execute("SELECT pages FROM pdf_text WHERE file_hash = ? AND parser = ?", key).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+            self._connection.execute("UPDATE pdf_text SET accessed = ? WHERE file_hash = ? AND parser = ?", (time.time(), *key))
+            self._connection.commit()
+
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def put(self, file_hash, parser, pages):
+        """
+        Armazena as páginas de um arquivo e, se o cache passar de `max_bytes`, descarta as entradas
+        acessadas há mais tempo.
+
+        Args:
+            file_hash (str): SHA-256 do conteúdo do arquivo.
+            parser (str): Identificador do parser.
+            pages (List[dict]): Páginas do arquivo, com `text` e `metadata`.
+        """
+        blob = zlib.compress(json.dumps(pages, ensure_ascii=False).encode("utf-8"))
+
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO pdf_text (file_hash, parser, pages, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                                     (file_hash, self._parser_key(parser), blob, len(blob), time.time()))
+            if self.max_bytes:
+                self.evictions += self._evict(self.max_bytes)
+            self._connection.commit()
+
+    def _evict(self, max_bytes):
+        # Remove as entradas acessadas há mais tempo até o total caber em `max_bytes` (sem commit)
+        excess = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM pdf_text").fetchone()[0] - max_bytes
+        if excess <= 0:
+            return 0
+
+        evicted = []
+        for file_hash, parser, size in self._connection.execute("SELECT file_hash, parser, size FROM pdf_text ORDER BY accessed"):
+            if excess <= 0:
+                break
+            evicted.append((file_hash, parser))
+            excess -= size
+
+        self._connection.executemany("DELETE FROM pdf_text WHERE file_hash = ? AND parser = ?", evicted)
+        return len(evicted)
+
+    def prune(self, max_bytes):
+        """
+        Reduz o cache a no máximo `max_bytes`, descartando as entradas acessadas há mais tempo.
+
+        Args:
+            max_bytes (int): Tamanho máximo das páginas armazenadas, em bytes.
+
+        Returns:
+            int: Número de entradas removidas.
+        """
+        with self._lock:
+            evicted = self._evict(max_bytes)
+            self._connection.commit()
+
+            if evicted:
+                # Devolve ao sistema o espaço liberado no arquivo
+                self._connection.execute("VACUUM")
+        self.evictions += evicted
+        return evicted
+
+    def load(self, file_path, parser, parse):
+        """
+        Devolve as páginas do arquivo a partir do cache ou, na ausência, chamando `parse` e
+        armazenando o resultado.
+
+        Args:
+            file_path (str): Caminho do arquivo PDF.
+            parser (str): Identificador do parser.
+            parse (Callable[[str], List[dict]]): Função que extrai as páginas do arquivo.
+
+        Returns:
+            List[dict]: Páginas do arquivo, com `text` e `metadata`.
+        """
+        file_hash = self.hash_file(file_path)
+        pages = self.get(file_hash, parser)
+
+        if pages is None:
+            pages = parse(file_path)
+            self.put(file_hash, parser, pages)
+
+        return pages
+
+    def stats(self):
+        """
+        Retorna os contadores de acertos, falhas e descartes, o número de entradas e o tamanho armazenado.
+        """
+        with self._lock:
+            entries, stored_bytes = self._connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pdf_text").fetchone()
+
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions, "entries": entries, "bytes": stored_bytes}
+
+    def close(self):
+        """
+        Fecha a conexão com o arquivo SQLite.
+        """
+        with self._lock:
+            self._connection.close()
+
+# Uma conexão por processo: a conexão SQLite não pode ser herdada pelos processos filhos
+_pdf_text_cache = None
+_pdf_text_cache_pid = None
+_shared_lock = threading.Lock()
+
+def get_pdf_text_cache():
+    """
+    Abre o cache de texto dos PDFs uma vez por processo.
+
+    Returns:
+        Optional[PdfTextCache]: O cache, ou None se `PDF_TEXT_CACHE_PATH` estiver vazio.
+    """
+    global _pdf_text_cache, _pdf_text_cache_pid
+    if not PDF_TEXT_CACHE_PATH:
+        return None
+
+    with _shared_lock:
+        if _pdf_text_cache is None or _pdf_text_cache_pid != os.getpid():
+            _pdf_text_cache = PdfTextCache(PDF_TEXT_CACHE_PATH)
+            _pdf_text_cache_pid = os.getpid()
+    return _pdf_text_cache
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=PDF_TEXT_CACHE_PATH, help="Arquivo SQLite do cache")
+    parser.add_argument("--prune", type=int, metavar="MAX_BYTES", help="Reduz o cache a no máximo MAX_BYTES")
+    args = parser.parse_args()
+
+    if not args.path or not os.path.exists(args.path):
+        sys.exit(f"Cache não encontrado: {args.path or '(PDF_TEXT_CACHE_PATH vazio)'}")
+
+    cache = PdfTextCache(args.path, max_bytes=0)
+    if args.prune is not None:
+        print(f"Entradas removidas: {cache.prune(args.prune)}")
+
+    stats = cache.stats()
+    print(f"{args.path}: {stats['entries']} arquivos, {stats['bytes'] / (1024 * 1024):.1f} MB")
+    cache.close()
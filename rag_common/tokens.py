@@ -0,0 +1,9 @@
+# Aproximação usada para estimar tokens a partir do número de caracteres (compartilhada pelo
+# langchain_ollama_rag e pelo bedrock_claude)
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estima o número de tokens de um texto a partir do número de caracteres.
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
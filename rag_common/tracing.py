@@ -0,0 +1,269 @@
+"""
+Rastreamento leve das etapas dos pipelines (carga dos PDFs, divisão, embeddings, busca, montagem
+do prompt, primeiro token e conclusão do modelo), compartilhado pelo langchain_ollama_rag e pelo
+bedrock_claude por meio dos respectivos services/tracing.py.
+
+Cada etapa é um `Span` com duração, atributos (bytes, tokens, quantidade de chunks...) e o span
+pai, para que as operações possam ser agrupadas. Os spans finalizados são enviados a um
+exportador: JSON no stdout, memória (para testes e benchmarks) ou OpenTelemetry (opcional).
+
+O exportador padrão é definido pela variável de ambiente TRACE_EXPORTER ("none", "stdout",
+"memory" ou "otel"); sem ela, os spans são descartados e o custo é apenas o da medição. O nome
+do tracer no OpenTelemetry é definido por cada projeto com `set_tracer_name`.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+
+# Span ativo no contexto atual (thread ou tarefa), usado como pai dos spans seguintes
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+# Nome do tracer no OpenTelemetry (cada projeto define o seu com `set_tracer_name`)
+_tracer_name = "rag"
+
+class Span:
+    def __init__(self, name, trace_id, parent_id=None, attributes=None, start_time=None):
+        """
+        Etapa rastreada do pipeline.
+
+        Args:
+            name (str): Nome da etapa (ex.: "retrieve", "llm.first_token").
+            trace_id (str): Identificador do rastreamento (compartilhado por todos os spans de uma operação).
+            parent_id (str): Identificador do span pai, se houver.
+            attributes (dict): Atributos iniciais da etapa.
+            start_time (float): Início em segundos desde a época (padrão: agora).
+        """
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time() if start_time is None else start_time
+        self.duration = None
+        self.status = "ok"
+
+    def set(self, **attributes):
+        """
+        Adiciona ou atualiza atributos do span (ex.: `bytes=...`, `tokens=...`).
+        """
+        self.attributes.update(attributes)
+        return self
+
+    def to_dict(self):
+        """
+        Representação serializável do span.
+        """
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": None if self.duration is None else self.duration * 1000,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+class NoopExporter:
+    # Descarta os spans (padrão quando nenhum exportador é configurado)
+    def export(self, span):
+        pass
+
+class StdoutJsonExporter:
+    def __init__(self, stream=None):
+        """
+        Escreve cada span finalizado como uma linha JSON (formato aceito pelo CloudWatch e
+        por agregadores de log).
+
+        Args:
+            stream (TextIO): Destino das linhas (padrão: sys.stdout).
+        """
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            print(line, file=self.stream or sys.stdout, flush=True)
+
+class InMemoryExporter:
+    def __init__(self):
+        """
+        Guarda os spans finalizados em memória, para testes e benchmarks.
+        """
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def by_name(self, name):
+        """
+        Retorna os spans finalizados com o nome informado.
+        """
+        with self._lock:
+            return [span for span in self.spans if span.name == name]
+
+    def clear(self):
+        """
+        Descarta os spans guardados.
+        """
+        with self._lock:
+            self.spans.clear()
+
+class OpenTelemetryExporter:
+    def __init__(self, tracer_name=None):
+        """
+        Reenvia os spans ao OpenTelemetry (pacote opcional `opentelemetry-api`), preservando os
+        instantes de início e fim. A configuração do provider e do exportador OTLP fica a cargo
+        da aplicação.
+
+        Args:
+            tracer_name (str): Nome do tracer no OpenTelemetry (padrão: o de `set_tracer_name`).
+        """
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError("O exportador OpenTelemetry requer o pacote opentelemetry-api") from e
+
+        self._trace = trace
+        self._tracer = trace.get_tracer(tracer_name or _tracer_name)
+
+    def export(self, span):
+        start_ns = int(span.start_time * 1e9)
+        otel_span = self._tracer.start_span(span.name, start_time=start_ns,
+                                            attributes={key: value for key, value in span.attributes.items() if value is not None})
+        otel_span.set_attribute("trace.parent_id", span.parent_id or "")
+        if span.status != "ok":
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.attributes.get("error")))
+        otel_span.end(end_time=start_ns + int((span.duration or 0) * 1e9))
+
+class Tracer:
+    def __init__(self, exporter=None):
+        """
+        Cria spans aninhados e os envia ao exportador ao final de cada etapa.
+
+        Args:
+            exporter: Objeto com o método `export(span)` (padrão: NoopExporter).
+        """
+        self.exporter = exporter or NoopExporter()
+
+    def _new_span(self, name, attributes, start_time=None):
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        return Span(name, trace_id, parent.span_id if parent else None, attributes, start_time)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Mede a duração do bloco como um span filho do span ativo.
+
+        Exemplo:
+            with tracer.span("split", pages=len(pages)) as span:
+                chunks = chunker.split_documents(pages)
+                span.set(chunks=len(chunks))
+
+        Args:
+            name (str): Nome da etapa.
+            **attributes: Atributos iniciais do span.
+
+        Yields:
+            Span: Span em andamento, para adicionar atributos.
+        """
+        span = self._new_span(name, attributes)
+        token = _current_span.set(span)
+        start_time = time.perf_counter()
+
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.duration = time.perf_counter() - start_time
+            _current_span.reset(token)
+            self.exporter.export(span)
+
+    def record(self, name, duration, start_time=None, **attributes):
+        """
+        Registra uma etapa já medida (ex.: tempo até o primeiro token de um stream, ou uma
+        etapa executada em outro processo) como filha do span ativo.
+
+        Args:
+            name (str): Nome da etapa.
+            duration (float): Duração em segundos.
+            start_time (float): Início em segundos desde a época (padrão: agora - duração).
+            **attributes: Atributos do span.
+
+        Returns:
+            Span: Span registrado.
+        """
+        span = self._new_span(name, attributes, time.time() - duration if start_time is None else start_time)
+        span.duration = duration
+        self.exporter.export(span)
+        return span
+
+# Exportadores selecionáveis pela variável de ambiente TRACE_EXPORTER
+EXPORTERS = {
+    "none": NoopExporter,
+    "stdout": StdoutJsonExporter,
+    "memory": InMemoryExporter,
+    "otel": OpenTelemetryExporter,
+}
+
+_tracer = None
+
+def get_tracer():
+    """
+    Retorna o tracer do processo, criado na primeira chamada com o exportador de TRACE_EXPORTER.
+
+    Returns:
+        Tracer: Tracer compartilhado.
+    """
+    global _tracer
+    if _tracer is None:
+        exporter_name = os.environ.get("TRACE_EXPORTER", "none").lower()
+        if exporter_name not in EXPORTERS:
+            raise ValueError(f"Exportador de rastreamento inválido: {exporter_name}. Opções: {', '.join(EXPORTERS)}")
+        _tracer = Tracer(EXPORTERS[exporter_name]())
+    return _tracer
+
+def traced(name, **attributes):
+    """
+    Decorador que executa a função dentro de um span do tracer do processo, tornando-o o pai
+    dos spans criados durante a chamada.
+
+    Args:
+        name (str): Nome da etapa.
+        **attributes: Atributos iniciais do span.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(name, **attributes):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def set_tracer(tracer):
+    """
+    Substitui o tracer do processo (ex.: `set_tracer(Tracer(InMemoryExporter()))` em testes).
+    """
+    global _tracer
+    _tracer = tracer
+
+def set_tracer_name(tracer_name):
+    """
+    Define o nome do tracer no OpenTelemetry usado pelos exportadores criados daqui em diante
+    (ex.: `set_tracer_name("bedrock_claude")`).
+    """
+    global _tracer_name
+    _tracer_name = tracer_name